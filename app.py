@@ -1,24 +1,75 @@
-from flask import Flask, render_template, jsonify
-from datetime import datetime
-import schedule
 import time
-import threading
+STARTUP_BEGAN = time.perf_counter()
+
+from flask import Flask, render_template, jsonify, request
+from datetime import datetime
+import atexit
 import signal
 import sys
 import os
+import threading
+from typing import TYPE_CHECKING
 
 from config import get_config
 from utils.logger import get_app_logger
-from models.inventory import InventoryModel
+from utils.pid_file import write_pid_file, remove_pid_file
+from utils.control_token import read_control_token
+from utils.startup_timer import StartupTimer
+from utils.compression import ResponseCompressor
+from utils.request_metrics import instrument_app
+from utils.static_assets import StaticAssets
+from utils.profiler import RequestProfiler
+from utils.exceptions import ConfigurationError
+from models.inventory import InventoryModel, PARTITION_MODES
+from models.change_log import ChangeLog
 from services.inventory_service import InventoryService
 from services.backup_service import BackupService
+from services.analytics_service import AnalyticsService
+from services.health_service import HealthService
+from services.settings_service import SettingsService
+from services.dashboard_service import DashboardService
+from services.handover_service import HandoverService
 from routes.inventory import create_inventory_routes
 from routes.settings import create_settings_routes
 from routes.logs import create_logs_routes
+from routes.analytics import create_analytics_routes
+from routes.backups import create_backup_routes
+from routes.health import create_health_routes
+from routes.dashboard import create_dashboard_routes
+from routes.metrics import create_metrics_routes
+from routes.handover import create_handover_routes
+
+if TYPE_CHECKING:
+    from services.fragment_service import FragmentService
+    from services.federation_service import FederationService
+    from services.replication_service import ReplicationService
+    from services.import_export_service import ImportExportService
+    from services.search_service import SearchService
 
 app = Flask(__name__)
 config = get_config()
 logger = get_app_logger(config.LOG_FILE)
+startup_timer = StartupTimer(STARTUP_BEGAN)
+startup_timer.record("imports", STARTUP_BEGAN)
+instrument_app(app)
+profiler = RequestProfiler(
+    logger,
+    config.PROFILE_DIR,
+    sample_rate=config.PROFILE_SAMPLE_RATE,
+    interval_ms=config.PROFILE_INTERVAL_MS,
+    max_files=config.PROFILE_MAX_FILES,
+    admin_token=config.PROFILE_ADMIN_TOKEN
+)
+profiler.init_app(app)
+ResponseCompressor(config.COMPRESSION_MIN_SIZE, config.COMPRESSION_LEVEL).init_app(app)
+StaticAssets(logger).init_app(app)
+
+
+@app.before_request
+def record_first_request():
+    if startup_timer.first_request_ms is None and request.path not in ("/healthz", "/readyz"):
+        if startup_timer.mark_first_request():
+            logger.info(f"Första förfrågan besvaras {startup_timer.first_request_ms:.0f} ms efter processtart")
 
 
 def setup_signal_handlers():
@@ -27,6 +78,7 @@ def setup_signal_handlers():
         logger.info(f"Mottagen signal {signum}. Stänger av gracefully...")
         logger.info("Sparar eventuella pågående transaktioner...")
         logger.info("Flask-server stängs av")
+        remove_pid_file(config.APP_PID_FILE)
         sys.exit(0)
 
     signal.signal(signal.SIGTERM, signal_handler)
@@ -43,7 +95,16 @@ def initialize_app():
     config.__post_init__()
 
     logger.info("Kontrollerar databas...")
-    if not os.path.exists(config.data_file):
+    if config.INVENTORY_PARTITION_BY not in PARTITION_MODES:
+        raise ConfigurationError(
+            f"INVENTORY_PARTITION_BY måste vara {' eller '.join(PARTITION_MODES)}, inte {config.INVENTORY_PARTITION_BY!r}"
+        )
+    if config.INVENTORY_PARTITION_BY != "none":
+        logger.info(f"Partitionerat lager ({config.INVENTORY_PARTITION_BY}): {config.partitions_dir}")
+    elif os.path.isdir(config.partitions_dir) and any(name.endswith(".json") for name in os.listdir(config.partitions_dir)):
+        # InventoryModel slår ihop partitionerna till inventory.json
+        logger.info(f"Partitionering avslagen, partitionerna i {config.partitions_dir} slås ihop")
+    elif not os.path.exists(config.data_file):
         with open(config.data_file, "w", encoding='utf-8') as f:
             import json
             json.dump([], f)
@@ -51,6 +112,9 @@ def initialize_app():
     else:
         logger.info("Databas hittades: inventory.json")
 
+    if config.REPLICATION_PRIMARY_URL:
+        logger.info(f"Skrivskyddad replika av {config.REPLICATION_PRIMARY_URL}")
+
     setup_signal_handlers()
     logger.info("Uppdateringslogik har flyttats till updater.py")
 
@@ -59,30 +123,126 @@ def initialize_app():
 
 def create_services():
     """Create and configure all services"""
-    inventory_model = InventoryModel(config.data_file, config.CACHE_TTL_SECONDS)
+    # Valfria delar (sök, fragment, federation, replikering, import/export) läses in här
+    # och inte vid modulimport, så deras importtid hamnar i startfasen som skapar dem
+    from services.fragment_service import FragmentService
+    from services.federation_service import FederationService, build_sites
+    from services.replication_service import ReplicationService
+    from services.import_export_service import ImportExportService
+    from services.search_service import SearchService
+
+    change_log = ChangeLog(config.change_log_file)
+    inventory_model = InventoryModel(
+        config.data_file, config.CACHE_TTL_SECONDS, change_log, config.LOCK_SLOW_SECONDS, logger,
+        partition_by=config.INVENTORY_PARTITION_BY, partitions_dir=config.partitions_dir
+    )
+    if not config.REPLICATION_PRIMARY_URL:
+        # En replika får sitt utgångsläge från primärens ögonblicksbild
+        inventory_model.record_baseline()
     inventory_service = InventoryService(inventory_model, logger)
-    backup_service = BackupService(config.DATA_DIR, config.BACKUP_DIR, logger)
-
-    return inventory_service, backup_service
-
-
-def schedule_backup(backup_service: BackupService):
-    logger.info("Läser in modul: Backup-schemaläggare")
-    schedule.every(2).days.at(config.BACKUP_SCHEDULE_TIME).do(backup_service.backup_database)
-    logger.info("Startar modul: Backup-schemaläggare")
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
-
-
-def start_scheduler(backup_service: BackupService):
-    scheduler_thread = threading.Thread(target=lambda: schedule_backup(backup_service), daemon=True)
-    scheduler_thread.start()
+    backup_service = BackupService(
+        config.DATA_DIR,
+        config.BACKUP_DIR,
+        logger,
+        snapshot_provider=inventory_model.snapshot,
+        change_log=change_log,
+        change_log_retention_days=config.CHANGE_LOG_RETENTION_DAYS
+    )
+    analytics_service = AnalyticsService(
+        inventory_model,
+        change_log,
+        logger,
+        window_days=config.ANALYTICS_WINDOW_DAYS,
+        short_window_days=config.ANALYTICS_SHORT_WINDOW_DAYS,
+        lead_time_days=config.ANALYTICS_LEAD_TIME_DAYS,
+        cover_days=config.ANALYTICS_COVER_DAYS
+    )
+
+    health_service = HealthService(inventory_model, backup_service, analytics_service, logger)
+    settings_service = SettingsService(config.settings_file, logger)
+    dashboard_service = DashboardService(inventory_model, settings_service, logger)
+    search_service = SearchService(inventory_model, logger, min_similarity=config.SEARCH_MIN_SIMILARITY)
+    fragment_service = FragmentService(inventory_model, dashboard_service, logger, inventory_service, search_service)
+    federation_service = FederationService(
+        build_sites(config.SITE_NAME, inventory_model, config.SITES, config.CACHE_TTL_SECONDS,
+                    config.FEDERATION_TIMEOUT_SECONDS),
+        logger,
+        max_workers=config.FEDERATION_MAX_WORKERS,
+        max_age_seconds=config.FEDERATION_REFRESH_SECONDS
+    )
+    replication_service = ReplicationService(
+        inventory_model,
+        logger,
+        primary_url=config.REPLICATION_PRIMARY_URL,
+        batch_size=config.REPLICATION_BATCH_SIZE,
+        wait_seconds=config.REPLICATION_WAIT_SECONDS,
+        timeout=config.REPLICATION_TIMEOUT_SECONDS,
+        max_catchup_entries=config.REPLICATION_MAX_CATCHUP_ENTRIES
+    )
+    health_service.replication_service = replication_service
+    import_export_service = ImportExportService(
+        inventory_model, logger, chunk_rows=config.IMPORT_CHUNK_ROWS, max_errors=config.IMPORT_MAX_REPORTED_ERRORS
+    )
+    handover_service = HandoverService(
+        inventory_model, health_service, logger,
+        token=config.CONTROL_TOKEN or read_control_token(config.CONTROL_TOKEN_FILE) or "",
+        timeout=config.HANDOVER_TIMEOUT_SECONDS
+    )
+
+    return (inventory_service, backup_service, analytics_service, inventory_model, health_service,
+            settings_service, dashboard_service, fragment_service, federation_service, replication_service,
+            import_export_service, search_service, handover_service)
+
+
+def start_scheduler(backup_service: BackupService, analytics_service: AnalyticsService,
+                    federation_service: "FederationService", search_service: "SearchService"):
+    from utils.scheduler import JobScheduler, DailyTrigger, IntervalTrigger
+
+    logger.info("Läser in modul: Schemaläggare")
+    scheduler = JobScheduler(logger, max_workers=config.SCHEDULER_MAX_WORKERS)
+    if not config.REPLICATION_PRIMARY_URL:
+        # Primären äger backuperna; en replika är en kopia av den och tar inga egna
+        scheduler.add_job(
+            "backup",
+            lambda: backup_service.backup_database(config.BACKUP_MAX_FILES),
+            DailyTrigger(config.BACKUP_SCHEDULE_TIME, config.BACKUP_SCHEDULE_INTERVAL_DAYS)
+        )
+        scheduler.add_job("backup_verify", backup_service.verify_backups, DailyTrigger(config.BACKUP_VERIFY_TIME))
+    scheduler.add_job(
+        "consumption_analytics",
+        analytics_service.recompute,
+        IntervalTrigger(config.ANALYTICS_REFRESH_SECONDS),
+        run_immediately=True
+    )
+    # Bygger sökindexet vid start och håller det ikapp, så att sökningar inte behöver göra det
+    scheduler.add_job(
+        "search_index",
+        search_service.refresh,
+        IntervalTrigger(config.SEARCH_REFRESH_SECONDS),
+        run_immediately=True
+    )
+    if config.SITES:
+        scheduler.add_job(
+            "federation_refresh",
+            federation_service.refresh,
+            IntervalTrigger(config.FEDERATION_REFRESH_SECONDS),
+            run_immediately=True
+        )
+    scheduler.start()
+    logger.info("Startar modul: Schemaläggare")
+    return scheduler
+
+
+def get_render_mode() -> str:
+    """'server' ger serverrenderade fragment, 'client' bygger DOM i JavaScript. Kan styras med ?render=."""
+    render_mode = request.args.get("render", config.RENDER_MODE)
+    return render_mode if render_mode in ("client", "server") else config.RENDER_MODE
 
 
 @app.route("/")
 def index():
-    return render_template("index.html", current_date=datetime.now().strftime("%Y-%m-%d"))
+    return render_template("index.html", current_date=datetime.now().strftime("%Y-%m-%d"),
+                           render_mode=get_render_mode())
 
 
 @app.route("/admin")
@@ -93,7 +253,8 @@ def admin():
 @app.route("/dashboard")
 def dashboard():
     logger.info("Renderar dashboard.html")
-    return render_template("dashboard.html", current_date=datetime.now().strftime("%Y-%m-%d"))
+    return render_template("dashboard.html", current_date=datetime.now().strftime("%Y-%m-%d"),
+                           render_mode=get_render_mode())
 
 
 @app.route("/changelog")
@@ -115,26 +276,131 @@ def check_version():
         return jsonify({"update_needed": False, "message": "Kunde inte kontrollera uppdateringsstatus"}), 500
 
 
-def register_routes(inventory_service: InventoryService, backup_service: BackupService):
+def start_deferred(backup_service: BackupService, analytics_service: AnalyticsService,
+                   health_service: HealthService, federation_service: "FederationService",
+                   search_service: "SearchService") -> None:
+    """Startar icke-kritiska delar efter att porten är bunden."""
+    with startup_timer.phase("scheduler (bakgrund)"):
+        health_service.scheduler = start_scheduler(backup_service, analytics_service, federation_service,
+                                                   search_service)
+    startup_timer.report(logger)
+
+
+def register_routes(inventory_service: InventoryService, backup_service: BackupService,
+                    analytics_service: AnalyticsService, inventory_model: InventoryModel,
+                    health_service: HealthService, settings_service: SettingsService,
+                    dashboard_service: DashboardService, fragment_service: "FragmentService",
+                    federation_service: "FederationService", replication_service: "ReplicationService",
+                    import_export_service: "ImportExportService", search_service: "SearchService",
+                    handover_service: HandoverService):
     """Register all route blueprints"""
+    # Flask tar inte emot blueprints efter första förfrågan, och porten besvarar förfrågningar
+    # direkt när den är bunden; därför registreras alla här, men de valfria läses in först nu
+    from routes.fragments import create_fragment_routes
+    from routes.profiles import create_profile_routes
+    from routes.sites import create_site_routes
+    from routes.replication import create_replication_routes
+    from routes.import_export import create_import_export_routes
+    from routes.search import create_search_routes
+
+    # Först, så att en process som lämnat över skickar vidare innan något annat körs
+    app.register_blueprint(create_handover_routes(handover_service))
+
     inventory_bp = create_inventory_routes(inventory_service)
-    settings_bp = create_settings_routes(config.settings_file, logger)
+    settings_bp = create_settings_routes(settings_service, logger)
     logs_bp = create_logs_routes(config.LOG_FILE, logger)
+    analytics_bp = create_analytics_routes(analytics_service)
+    backups_bp = create_backup_routes(backup_service, inventory_model, logger)
+    health_bp = create_health_routes(health_service)
+    dashboard_bp = create_dashboard_routes(dashboard_service, logger)
+    fragments_bp = create_fragment_routes(fragment_service, logger)
+    metrics_bp = create_metrics_routes(inventory_model)
+    profiles_bp = create_profile_routes(profiler)
+    sites_bp = create_site_routes(federation_service, config.SITE_NAME)
+    replication_bp = create_replication_routes(replication_service)
+    import_export_bp = create_import_export_routes(import_export_service, logger)
+    search_bp = create_search_routes(search_service)
 
     app.register_blueprint(inventory_bp)
     app.register_blueprint(settings_bp)
     app.register_blueprint(logs_bp)
+    app.register_blueprint(analytics_bp)
+    app.register_blueprint(backups_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(fragments_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(profiles_bp)
+    app.register_blueprint(sites_bp)
+    app.register_blueprint(replication_bp)
+    app.register_blueprint(import_export_bp)
+    app.register_blueprint(search_bp)
+
+
+def get_cli_option(name: str, default):
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
 
 
 if __name__ == "__main__":
     debug = '--debug' in sys.argv
     config.DEBUG = debug
-
-    inventory_service, backup_service = initialize_app()
-    register_routes(inventory_service, backup_service)
-
-    logger.info("Läser in modul: Schemaläggning")
-    start_scheduler(backup_service)
-    logger.info("Servern är redo!")
-
-    app.run(debug=debug, host=config.HOST, port=config.PORT)
\ No newline at end of file
+    # Updater startar appen på en egen port bakom trafikväxeln vid blue/green
+    config.HOST = get_cli_option('--host', config.HOST)
+    config.PORT = int(get_cli_option('--port', config.PORT))
+    # En replika bredvid primären på samma maskin behöver egen datakatalog och PID-fil
+    config.DATA_DIR = get_cli_option('--data-dir', config.DATA_DIR)
+    config.REPLICATION_PRIMARY_URL = get_cli_option('--primary', config.REPLICATION_PRIMARY_URL)
+    if config.REPLICATION_PRIMARY_URL:
+        config.APP_PID_FILE = f"replica-{config.PORT}.pid"
+        # Egen logg och egna backuper i replikans datakatalog, så den aldrig rör primärens filer
+        config.BACKUP_DIR = os.path.join(config.DATA_DIR, "db_backup")
+        config.LOG_FILE = os.path.join(config.DATA_DIR, "app.log")
+        get_app_logger(config.LOG_FILE)
+
+    with startup_timer.phase("initialize"):
+        services = initialize_app()
+    inventory_service, backup_service, analytics_service, inventory_model, health_service = services[:5]
+    federation_service, replication_service, search_service = services[8], services[9], services[11]
+    health_service.startup_timer = startup_timer
+
+    def restart_scheduler():
+        health_service.scheduler = start_scheduler(backup_service, analytics_service, federation_service,
+                                                   search_service)
+
+    # Schemaläggaren stoppas vid överlämning och startas om ifall växlingen avbryts
+    services[12].restart_scheduler = restart_scheduler
+
+    with startup_timer.phase("register_routes"):
+        register_routes(*services)
+
+    write_pid_file(config.APP_PID_FILE, port=config.PORT, script=config.APP_SCRIPT)
+    atexit.register(remove_pid_file, config.APP_PID_FILE)
+
+    with startup_timer.phase("store warm-up"):
+        health_service.warm_up()
+    replication_service.start()
+
+    if debug or not config.DEFERRED_STARTUP:
+        health_service.scheduler = start_scheduler(backup_service, analytics_service, federation_service,
+                                                   search_service)
+        startup_timer.report(logger)
+        logger.info("Servern är redo!")
+        app.run(debug=debug, host=config.HOST, port=config.PORT)
+    else:
+        from werkzeug.serving import make_server
+
+        # Bind porten direkt så att läsningar kan besvaras medan resten startar i bakgrunden
+        with startup_timer.phase("bind"):
+            server = make_server(config.HOST, config.PORT, app, threaded=True)
+        threading.Thread(
+            target=start_deferred,
+            args=(backup_service, analytics_service, health_service, federation_service, search_service),
+            name="deferred-startup",
+            daemon=True
+        ).start()
+        logger.info(f"Servern är redo! Lyssnar på {config.HOST}:{config.PORT}")
+        server.serve_forever()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Lastgenerator med blandad last: handskannrar som drar av saldo och väggskärmar som pollar lagret.
+
+Kör från projektroten:
+
+    python -m benchmarks.load                                   # i processen via Flasks testklient
+    python -m benchmarks.load --scanners 40 --screens 8 --duration 60
+    python -m benchmarks.load --url http://localhost:8000 --item-ids 12,13,14
+
+Mot en riktig server dras saldo av på riktigt, därför måste --item-ids anges
+explicit. Rapporten innehåller genomströmning, p50/p95/p99-latens per klienttyp,
+förlorade uppdateringar (förväntat mot faktiskt slutsaldo) och väntetid på
+InventoryModel-låset enligt /metrics.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.run import build_app, quiet_logger
+from benchmarks.synthetic import generate_items
+from routes.metrics import create_metrics_routes
+
+HOT_ITEM_QUANTITY = 1_000_000
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+class TestClientTarget:
+    """Kör förfrågningar i processen; varje tråd får en egen testklient."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client
+
+    def request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None,
+                body: Optional[Dict[str, Any]] = None) -> Response:
+        response = self._client().open(path, method=method, headers=headers or {}, json=body)
+        return response.status_code, dict(response.headers), response.get_data()
+
+
+class HttpTarget:
+    """Kör förfrågningar mot en körande server via urllib."""
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None,
+                body: Optional[Dict[str, Any]] = None) -> Response:
+        headers = dict(headers or {})
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers["Content-Type"] = "application/json"
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, dict(response.headers), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, dict(e.headers), e.read()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def parse_histogram(metrics_text: str, name: str, lock: str = "inventory") -> Dict[str, Dict[str, float]]:
+    """Läser _sum, _count och hinkarna per operation för ett lås ur Prometheus textformat."""
+    result: Dict[str, Dict[str, float]] = defaultdict(lambda: {"sum": 0.0, "count": 0.0, "buckets": {}})
+    for line in metrics_text.splitlines():
+        if not line.startswith(name):
+            continue
+        series, _, value = line.rpartition(" ")
+        labels = {}
+        if "{" in series:
+            metric, _, label_text = series.partition("{")
+            for pair in label_text.rstrip("}").split(","):
+                key, _, label_value = pair.partition("=")
+                labels[key] = label_value.strip('"')
+        else:
+            metric = series
+        # Partitionerade lager har ett lås per partition (inventory:<brand>); de summeras per operation
+        if labels.get("lock") != lock and not labels.get("lock", "").startswith(f"{lock}:"):
+            continue
+        operation = labels.get("operation", "")
+        if metric == f"{name}_sum":
+            result[operation]["sum"] += float(value)
+        elif metric == f"{name}_count":
+            result[operation]["count"] += float(value)
+        elif metric == f"{name}_bucket":
+            buckets = result[operation]["buckets"]
+            buckets[labels.get("le")] = buckets.get(labels.get("le"), 0.0) + float(value)
+    return dict(result)
+
+
+def lock_metrics(metrics_text: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+    return {
+        "wait": parse_histogram(metrics_text, "lock_wait_seconds"),
+        "hold": parse_histogram(metrics_text, "lock_hold_seconds")
+    }
+
+
+def _delta(before: Dict[str, Dict[str, float]], after: Dict[str, Dict[str, float]],
+           operation: str, threshold: str) -> Tuple[float, float, float]:
+    state = after.get(operation, {"sum": 0.0, "count": 0.0, "buckets": {}})
+    previous = before.get(operation, {"sum": 0.0, "count": 0.0, "buckets": {}})
+    count = state["count"] - previous["count"]
+    total = state["sum"] - previous["sum"]
+    under = state["buckets"].get(threshold, 0.0) - previous["buckets"].get(threshold, 0.0)
+    return count, total, count - under
+
+
+def lock_contention(before: Dict[str, Dict[str, Dict[str, float]]], after: Dict[str, Dict[str, Dict[str, float]]],
+                    threshold: str = "0.001") -> Dict[str, Dict[str, float]]:
+    """Skillnaden i låsväntan och hålltid under körningen, per operation."""
+    report = {}
+    for operation in sorted(after["wait"]):
+        count, wait_total, waited_long = _delta(before["wait"], after["wait"], operation, threshold)
+        if count <= 0:
+            continue
+        _, hold_total, _ = _delta(before["hold"], after["hold"], operation, threshold)
+        report[operation] = {
+            "acquisitions": int(count),
+            "total_wait_ms": round(wait_total * 1000, 3),
+            "mean_wait_ms": round(wait_total / count * 1000, 4),
+            "waited_over_1ms": int(waited_long),
+            "total_hold_ms": round(hold_total * 1000, 3),
+            "mean_hold_ms": round(hold_total / count * 1000, 4)
+        }
+    return report
+
+
+def fetch_quantities(target, item_ids: List[int]) -> Dict[int, int]:
+    status, _, body = target.request("GET", "/api/inventory")
+    if status != 200:
+        raise RuntimeError(f"GET /api/inventory gav status {status}")
+    wanted = set(item_ids)
+    return {item['id']: int(item['quantity']) for item in json.loads(body) if item['id'] in wanted}
+
+
+def fetch_metrics(target) -> str:
+    status, _, body = target.request("GET", "/metrics")
+    return body.decode('utf-8') if status == 200 else ""
+
+
+class LoadRun:
+    def __init__(self, target, item_ids: List[int], scanners: int, screens: int, duration: float,
+                 scan_interval: float, poll_interval: float, seed: int):
+        self.target = target
+        self.item_ids = item_ids
+        self.scanners = scanners
+        self.screens = screens
+        self.duration = duration
+        self.scan_interval = scan_interval
+        self.poll_interval = poll_interval
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.subtracted: Dict[int, int] = defaultdict(int)
+        self._stop = threading.Event()
+
+    def _timed(self, kind: str, method: str, path: str, headers=None, body=None) -> Optional[Response]:
+        started = time.perf_counter()
+        try:
+            response = self.target.request(method, path, headers, body)
+        except Exception:
+            with self._lock:
+                self.errors[kind] += 1
+            return None
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.latencies[kind].append(elapsed)
+            self.statuses[kind][response[0]] += 1
+        return response
+
+    def _scanner(self, number: int) -> None:
+        rng = random.Random(self.seed + number)
+        while not self._stop.is_set():
+            item_id = rng.choice(self.item_ids)
+            response = self._timed("scanner", "POST", f"/api/inventory/{item_id}/subtract", body={"quantity": 1})
+            if response is not None and response[0] == 200:
+                with self._lock:
+                    self.subtracted[item_id] += 1
+            if self.scan_interval:
+                self._stop.wait(rng.uniform(0.5, 1.5) * self.scan_interval)
+
+    def _screen(self, number: int) -> None:
+        rng = random.Random(self.seed + 10_000 + number)
+        etag = None
+        # Skärmar startar utspritt över pollintervallet, som i verkligheten
+        self._stop.wait(rng.uniform(0, self.poll_interval))
+        while not self._stop.is_set():
+            headers = {"Accept-Encoding": "gzip"}
+            if etag:
+                headers["If-None-Match"] = etag
+            response = self._timed("screen", "GET", "/api/inventory", headers=headers)
+            if response is not None and response[0] == 200:
+                etag = response[1].get("ETag", etag)
+            self._stop.wait(self.poll_interval)
+
+    def run(self) -> Dict[str, Any]:
+        initial = fetch_quantities(self.target, self.item_ids)
+        missing = sorted(set(self.item_ids) - set(initial))
+        if missing:
+            raise RuntimeError(f"Objekt saknas i lagret: {missing}")
+        metrics_before = lock_metrics(fetch_metrics(self.target))
+
+        threads = [threading.Thread(target=self._scanner, args=(n,), daemon=True) for n in range(self.scanners)]
+        threads += [threading.Thread(target=self._screen, args=(n,), daemon=True) for n in range(self.screens)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        self._stop.wait(self.duration)
+        self._stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        final = fetch_quantities(self.target, self.item_ids)
+        metrics_after = lock_metrics(fetch_metrics(self.target))
+        return self._report(elapsed, initial, final, metrics_before, metrics_after)
+
+    def _report(self, elapsed: float, initial: Dict[int, int], final: Dict[int, int],
+                metrics_before, metrics_after) -> Dict[str, Any]:
+        clients = {}
+        for kind in ("scanner", "screen"):
+            latencies = sorted(self.latencies.get(kind, []))
+            clients[kind] = {
+                "requests": len(latencies),
+                "errors": self.errors.get(kind, 0),
+                "statuses": {str(status): count for status, count in sorted(self.statuses[kind].items())},
+                "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(percentile(latencies, 0.50), 3),
+                "p95_ms": round(percentile(latencies, 0.95), 3),
+                "p99_ms": round(percentile(latencies, 0.99), 3),
+                "max_ms": round(latencies[-1], 3) if latencies else 0.0
+            }
+
+        lost_updates = {}
+        for item_id in self.item_ids:
+            expected = max(0, initial[item_id] - self.subtracted.get(item_id, 0))
+            actual = final.get(item_id)
+            # Fler kvar än förväntat = ett bekräftat avdrag skrevs över av ett annat
+            if actual is not None and actual > expected:
+                lost_updates[str(item_id)] = actual - expected
+
+        return {
+            "duration_s": round(elapsed, 3),
+            "clients": clients,
+            "confirmed_subtracts": sum(self.subtracted.values()),
+            "lost_updates": sum(lost_updates.values()),
+            "lost_updates_per_item": lost_updates,
+            "lock_contention": lock_contention(metrics_before, metrics_after)
+        }
+
+
+def build_local_target(work_dir: str, items: int, hot_items: int,
+                       partition_by: str = "none") -> Tuple[TestClientTarget, List[int]]:
+    catalog = generate_items(items)
+    hot_ids = [item['id'] for item in catalog[:hot_items]]
+    for item in catalog[:hot_items]:
+        # Högt saldo så att avdragen aldrig slår i noll och döljer förlorade uppdateringar
+        item['quantity'] = HOT_ITEM_QUANTITY
+    with open(os.path.join(work_dir, "inventory.json"), 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, indent=4, ensure_ascii=False)
+
+    app, model, _ = build_app(work_dir, quiet_logger(), partition_by)
+    app.register_blueprint(create_metrics_routes(model))
+    return TestClientTarget(app), hot_ids
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print(f"Körtid: {report['duration_s']} s")
+    for kind, stats in report["clients"].items():
+        print(f"  {kind:8s} {stats['requests']:7d} förfrågningar  {stats['throughput_rps']:8.1f}/s  "
+              f"p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  "
+              f"fel {stats['errors']}  status {stats['statuses']}")
+    print(f"Bekräftade avdrag: {report['confirmed_subtracts']}, förlorade uppdateringar: {report['lost_updates']}")
+    for operation, stats in report["lock_contention"].items():
+        print(f"  lås {operation:16s} {stats['acquisitions']:7d} st  medel {stats['mean_wait_ms']:8.3f} ms  "
+              f"totalt {stats['total_wait_ms']:10.1f} ms  >1 ms: {stats['waited_over_1ms']}  "
+              f"hålltid medel {stats['mean_hold_ms']:8.3f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Blandad last från skannrar och väggskärmar")
+    parser.add_argument("--url", help="Bas-URL till en körande server; utan den körs appen i processen")
+    parser.add_argument("--item-ids", help="Kommaseparerade ID:n att dra av från (krävs med --url)")
+    parser.add_argument("--scanners", type=int, default=20, help="Antal samtidiga skannrar")
+    parser.add_argument("--screens", type=int, default=5, help="Antal väggskärmar som pollar /api/inventory")
+    parser.add_argument("--duration", type=float, default=30.0, help="Körtid i sekunder")
+    parser.add_argument("--scan-interval", type=float, default=0.2, help="Medeltid mellan skanningar per skanner")
+    parser.add_argument("--poll-interval", type=float, default=3.0, help="Pollintervall för skärmarna")
+    parser.add_argument("--items", type=int, default=1000, help="Katalogstorlek i processen")
+    parser.add_argument("--hot-items", type=int, default=10, help="Antal objekt som skannrarna delar på i processen")
+    parser.add_argument("--partition-by", choices=["none", "brand"], default="none",
+                        help="Lagrets partitionering i processen")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="load_report.json", help="Fil att skriva JSON-rapporten till")
+    args = parser.parse_args()
+
+    work_dir = None
+    try:
+        if args.url:
+            if not args.item_ids:
+                parser.error("--item-ids krävs med --url eftersom saldot dras av på riktigt")
+            target = HttpTarget(args.url)
+            item_ids = [int(item_id) for item_id in args.item_ids.split(",")]
+        else:
+            work_dir = tempfile.mkdtemp(prefix="inventory-load-")
+            target, item_ids = build_local_target(work_dir, args.items, args.hot_items, args.partition_by)
+
+        print(f"Kör {args.scanners} skannrar och {args.screens} skärmar i {args.duration:.0f} s "
+              f"mot {args.url or 'testklienten'}...")
+        report = LoadRun(target, item_ids, args.scanners, args.screens, args.duration,
+                         args.scan_interval, args.poll_interval, args.seed).run()
+    finally:
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report["meta"] = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "target": args.url or "test_client",
+        "scanners": args.scanners,
+        "screens": args.screens,
+        "scan_interval": args.scan_interval,
+        "poll_interval": args.poll_interval,
+        "partition_by": args.partition_by,
+        "item_ids": item_ids
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    print_summary(report)
+    print(f"Rapport skriven till {args.output}")
+    return 1 if report["lost_updates"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
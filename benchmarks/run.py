@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Benchmarks för lagrets heta vägar med syntetiska kataloger.
+
+Kör från projektroten:
+
+    python -m benchmarks.run                       # 1k, 10k, 100k objekt + 1M loggrader
+    python -m benchmarks.run --quick               # 1k, 10k objekt + 100k loggrader
+    python -m benchmarks.run --save-baseline       # spara resultatet som ny baslinje
+
+Resultatet skrivs som JSON och jämförs mot benchmarks/baseline.json.
+Avvikelser över toleransen listas och ger exit code 1.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import Flask
+
+from benchmarks.synthetic import write_inventory, write_log
+from models.change_log import ChangeLog
+from models.inventory import InventoryModel, InventoryItem
+from services.inventory_service import InventoryService
+from services.settings_service import SettingsService
+from services.dashboard_service import DashboardService
+from routes.inventory import create_inventory_routes
+from routes.logs import create_logs_routes
+from routes.dashboard import create_dashboard_routes
+from utils.compression import ResponseCompressor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+PROJECT_ROOT = os.path.dirname(BENCHMARK_DIR)
+
+
+def measure(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(timings[0], 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+        "max_ms": round(timings[-1], 4)
+    }
+
+
+def quiet_logger() -> logging.Logger:
+    # Loggmeddelandena formateras fortfarande, men skrivs inte till disk
+    logger = logging.getLogger("benchmark")
+    logger.handlers = [logging.NullHandler()]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def build_app(work_dir: str, logger: logging.Logger, partition_by: str = "none"):
+    change_log = ChangeLog(os.path.join(work_dir, "inventory_changes.jsonl"))
+    model = InventoryModel(os.path.join(work_dir, "inventory.json"), 1.0, change_log, logger=logger,
+                           partition_by=partition_by)
+    service = InventoryService(model, logger)
+    settings_service = SettingsService(os.path.join(work_dir, "dashboard_settings.json"), logger)
+    dashboard_service = DashboardService(model, settings_service, logger)
+
+    app = Flask(__name__, template_folder=os.path.join(PROJECT_ROOT, "templates"))
+    ResponseCompressor().init_app(app)
+    app.register_blueprint(create_inventory_routes(service))
+    app.register_blueprint(create_logs_routes(os.path.join(work_dir, "app.log"), logger))
+    app.register_blueprint(create_dashboard_routes(dashboard_service, logger))
+    return app, model, service
+
+
+def run_inventory_benchmarks(size: int, app: Flask, model: InventoryModel,
+                             service: InventoryService) -> Dict[str, Dict[str, float]]:
+    items = write_inventory(model.data_file, size)
+    model.clear_cache()
+    client = app.test_client()
+    headers = {"Accept-Encoding": "gzip"}
+
+    reads = max(5, min(50, 200000 // size))
+    writes = max(3, min(20, 20000 // size))
+    middle_id = items[size // 2]['id']
+
+    results = {
+        "model.get_all[cold]": measure(model.get_all, reads, setup=model.clear_cache),
+        "model.get_all[warm]": measure(model.get_all, reads),
+        "model.snapshot[warm]": measure(model.snapshot, reads),
+        "service.get_all_items": measure(service.get_all_items, reads),
+    }
+
+    # Serialiseringen cachas per publicerad lista; kall = direkt efter en skrivning
+    touch = InventoryItem.from_dict(dict(items[0]))
+
+    def invalidate():
+        model.update(touch)
+
+    results["service.get_inventory_json[cold]"] = measure(service.get_inventory_json, writes, setup=invalidate)
+    results["service.get_inventory_json[warm]"] = measure(service.get_inventory_json, reads)
+
+    added_ids: List[int] = []
+
+    def add():
+        added_ids.append(model.add(InventoryItem(0, "Bench", "Bench family", f"Part {len(added_ids)}", 5, 2, 10)).id)
+
+    results["model.add"] = measure(add, writes)
+    results["model.update"] = measure(lambda: model.update(InventoryItem.from_dict(dict(items[size // 2], quantity=7))), writes)
+    results["model.delete"] = measure(lambda: model.delete(added_ids.pop()), writes)
+
+    first = client.get("/api/inventory", headers=headers)
+    etag = first.headers.get("ETag")
+    results["route.GET /api/inventory[warm]"] = measure(lambda: client.get("/api/inventory", headers=headers), reads)
+    results["route.GET /api/inventory[304]"] = measure(
+        lambda: client.get("/api/inventory", headers=dict(headers, **{"If-None-Match": etag})), reads
+    )
+    results["route.GET /api/dashboard/default/inventory"] = measure(
+        lambda: client.get("/api/dashboard/default/inventory", headers=headers), reads
+    )
+    results["route.POST /api/inventory/<id>/subtract"] = measure(
+        lambda: client.post(f"/api/inventory/{middle_id}/subtract", json={"quantity": 1}), writes
+    )
+    return {f"{name}@{size}": result for name, result in results.items()}
+
+
+def run_log_benchmarks(lines: int, work_dir: str, app: Flask) -> Dict[str, Dict[str, float]]:
+    write_log(os.path.join(work_dir, "app.log"), lines)
+    client = app.test_client()
+    lines_per_page = 1000
+    last_page = (lines + lines_per_page - 1) // lines_per_page
+
+    results = {
+        "route.GET /logs[first page]": measure(lambda: client.get(f"/logs?format=json&page=1&lines={lines_per_page}"), 3),
+        "route.GET /logs[last page]": measure(
+            lambda: client.get(f"/logs?format=json&page={last_page}&lines={lines_per_page}"), 3
+        ),
+    }
+    return {f"{name}@{lines}": result for name, result in results.items()}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any],
+            tolerance: float, min_delta_ms: float) -> List[str]:
+    regressions = []
+    for name, result in sorted(results.items()):
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        current_ms, previous_ms = result["median_ms"], previous["median_ms"]
+        ratio = current_ms / previous_ms if previous_ms > 0 else float("inf")
+        marker = ""
+        # Små absoluta skillnader på mikrosekundoperationer är brus, inte regressioner
+        if ratio > 1 + tolerance and current_ms - previous_ms > min_delta_ms:
+            marker = "  <-- REGRESSION"
+            regressions.append(name)
+        print(f"{name:60s} {previous_ms:10.3f} -> {current_ms:10.3f} ms  ({ratio:5.2f}x){marker}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks för lagrets heta vägar")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Kommaseparerade katalogstorlekar")
+    parser.add_argument("--log-lines", type=int, default=1_000_000, help="Antal rader i syntetisk app.log")
+    parser.add_argument("--quick", action="store_true", help="Mindre körning: 1k och 10k objekt, 100k loggrader")
+    parser.add_argument("--output", default="benchmark_report.json", help="Fil att skriva JSON-rapporten till")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baslinje att jämföra mot")
+    parser.add_argument("--save-baseline", action="store_true", help="Spara resultatet som ny baslinje")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Tillåten försämring av median (0.5 = +50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Minsta absoluta försämring som räknas")
+    args = parser.parse_args()
+
+    sizes = [1000, 10000] if args.quick else [int(size) for size in args.sizes.split(",")]
+    log_lines = 100_000 if args.quick else args.log_lines
+
+    work_dir = tempfile.mkdtemp(prefix="inventory-bench-")
+    try:
+        # Blueprints är moduldefinierade och kan bara registreras en gång, så en app
+        # används för alla storlekar och katalogfilen skrivs om mellan dem
+        app, model, service = build_app(work_dir, quiet_logger())
+        results: Dict[str, Dict[str, float]] = {}
+        for size in sizes:
+            print(f"Kör lagerbenchmarks för {size} objekt...")
+            results.update(run_inventory_benchmarks(size, app, model, service))
+        print(f"Kör loggbenchmarks för {log_lines} rader...")
+        results.update(run_log_benchmarks(log_lines, work_dir, app))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "log_lines": log_lines
+        },
+        "results": results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    print(f"Rapport skriven till {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+        print(f"Baslinje sparad i {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Ingen baslinje hittad - kör med --save-baseline för att skapa en")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"Jämför mot baslinje från {baseline.get('meta', {}).get('created')} ({baseline.get('meta', {}).get('platform')})")
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"{len(regressions)} regression(er) över toleransen {args.tolerance:.0%}:")
+        for name in regressions:
+            print(f"  - {name}")
+        return 1
+    print("Inga regressioner")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
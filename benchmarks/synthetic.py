@@ -0,0 +1,55 @@
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+BRANDS = ["Canon", "HP", "Epson", "Brother", "Lexmark", "Ricoh", "Xerox", "Kyocera", "Konica", "Sharp"]
+PARTS = ["Fuser", "Drum", "Toner", "Pickup roller", "Transfer belt", "Waste box", "Feed roller", "Formatter"]
+LOG_LEVELS = ["INFO"] * 18 + ["WARNING", "ERROR"]
+
+
+def generate_items(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Deterministisk katalog: samma antal och seed ger alltid samma fil."""
+    rng = random.Random(seed)
+    families_per_brand = max(1, count // (len(BRANDS) * len(PARTS)))
+    items = []
+    for item_id in range(1, count + 1):
+        brand = BRANDS[(item_id - 1) % len(BRANDS)]
+        low_status = rng.randint(1, 10)
+        items.append({
+            'id': item_id,
+            'Brand': brand,
+            'product_family': f"{brand} {1000 + rng.randrange(families_per_brand)}",
+            'spare_part': f"{rng.choice(PARTS)} {item_id}",
+            'quantity': rng.randint(0, 40),
+            'low_status': low_status,
+            'high_status': low_status + rng.randint(5, 20)
+        })
+    return items
+
+
+def write_inventory(path: str, count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    items = generate_items(count, seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(items, f, indent=4, ensure_ascii=False)
+    return items
+
+
+def write_log(path: str, lines: int, seed: int = 42) -> None:
+    """Skriver en app.log i samma format som utils.logger."""
+    rng = random.Random(seed)
+    started = datetime(2026, 1, 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        batch = []
+        for number in range(lines):
+            timestamp = started + timedelta(milliseconds=number * 250)
+            item_id = rng.randint(1, 10000)
+            batch.append(
+                f"{timestamp:%Y-%m-%d %H:%M:%S},{number % 1000:03d} [{rng.choice(LOG_LEVELS)}] "
+                f"Inventory status: ID={item_id}, Brand={BRANDS[item_id % len(BRANDS)]}, "
+                f"Quantity={rng.randint(0, 40)}, Status=mid, Action=Se över saldot\n"
+            )
+            if len(batch) >= 10000:
+                f.writelines(batch)
+                batch = []
+        f.writelines(batch)
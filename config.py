@@ -1,6 +1,6 @@
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
 
 
 @dataclass
@@ -11,7 +11,9 @@ class AppConfig:
     LOG_FILE: str = "app.log"
     UPDATER_LOG_FILE: str = "updater.log"
     LOCK_FILE: str = "updater.lock"
+    UPDATE_STAGING_DIR: str = ".update_staging"
     APP_SCRIPT: str = "app.py"
+    APP_PID_FILE: str = "app.pid"
 
     HOST: str = "0.0.0.0"
     PORT: int = 5000
@@ -20,15 +22,82 @@ class AppConfig:
     BACKUP_MAX_FILES: int = 5
     VERSION_BACKUP_MAX_FILES: int = 3
     BACKUP_SCHEDULE_TIME: str = "17:00"
+    BACKUP_SCHEDULE_INTERVAL_DAYS: int = 2
+    BACKUP_VERIFY_TIME: str = "03:00"
+    CHANGE_LOG_RETENTION_DAYS: int = 35
     UPDATE_SCHEDULE_DAY: str = "monday"
     UPDATE_SCHEDULE_TIME: str = "02:00"
 
+    DEPLOY_MODE: str = "restart"
+    BLUE_GREEN_PORTS: Tuple[int, int] = (5001, 5002)
+    READINESS_TIMEOUT_SECONDS: float = 60.0
+    DRAIN_TIMEOUT_SECONDS: float = 30.0
+    # Delad hemlighet för updaterns styranrop (överlämning vid blue/green); sätts av updater.py,
+    # annars läses den från CONTROL_TOKEN_FILE som updater skapar första gången
+    CONTROL_TOKEN: str = field(default_factory=lambda: os.environ.get("APP_CONTROL_TOKEN", ""))
+    CONTROL_TOKEN_FILE: str = "control.token"
+    HANDOVER_TIMEOUT_SECONDS: float = 10.0
+
+    SUPERVISOR_ENABLED: bool = True
+    SUPERVISOR_BACKOFF_INITIAL_SECONDS: float = 1.0
+    SUPERVISOR_BACKOFF_MAX_SECONDS: float = 60.0
+    SUPERVISOR_STABLE_SECONDS: float = 60.0
+
     CACHE_TTL_SECONDS: float = 1.0
+    INVENTORY_PARTITION_BY: str = "none"
+    LOCK_SLOW_SECONDS: float = 0.25
+    SCHEDULER_MAX_WORKERS: int = 2
+    DEFERRED_STARTUP: bool = True
+    RENDER_MODE: str = "client"
+    COMPRESSION_MIN_SIZE: int = 500
+    COMPRESSION_LEVEL: int = 6
+
+    PROFILE_DIR: str = "profiles"
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_FILES: int = 200
+    # Token för headern X-Profile-Token och /admin/profiles; läses från miljön så att den inte checkas in
+    PROFILE_ADMIN_TOKEN: str = field(default_factory=lambda: os.environ.get("PROFILE_ADMIN_TOKEN", ""))
+
+    SITE_NAME: str = "main"
+    # Övriga lager: namn → datakatalog på samma maskin eller bas-URL till en annan instans
+    SITES: Dict[str, str] = field(default_factory=dict)
+    FEDERATION_REFRESH_SECONDS: int = 30
+    FEDERATION_TIMEOUT_SECONDS: float = 3.0
+    FEDERATION_MAX_WORKERS: int = 8
+
+    IMPORT_CHUNK_ROWS: int = 5000
+    IMPORT_MAX_REPORTED_ERRORS: int = 100
+
+    # Andel av sökningens trigram ett objekt måste innehålla för att räknas som träff
+    SEARCH_MIN_SIMILARITY: float = 0.5
+    SEARCH_REFRESH_SECONDS: int = 30
+
+    # Bas-URL till primären; tom betyder att instansen själv är primär
+    REPLICATION_PRIMARY_URL: str = ""
+    REPLICATION_BATCH_SIZE: int = 1000
+    REPLICATION_WAIT_SECONDS: float = 10.0
+    REPLICATION_TIMEOUT_SECONDS: float = 5.0
+    REPLICATION_MAX_CATCHUP_ENTRIES: int = 20000
+
+    ANALYTICS_REFRESH_SECONDS: int = 300
+    ANALYTICS_WINDOW_DAYS: int = 28
+    ANALYTICS_SHORT_WINDOW_DAYS: int = 7
+    ANALYTICS_LEAD_TIME_DAYS: int = 7
+    ANALYTICS_COVER_DAYS: int = 14
 
     @property
     def data_file(self) -> str:
         return os.path.join(self.DATA_DIR, "inventory.json")
 
+    @property
+    def change_log_file(self) -> str:
+        return os.path.join(self.DATA_DIR, "inventory_changes.jsonl")
+
+    @property
+    def partitions_dir(self) -> str:
+        return os.path.join(self.DATA_DIR, "partitions")
+
     @property
     def settings_file(self) -> str:
         return os.path.join(self.DATA_DIR, "dashboard_settings.json")
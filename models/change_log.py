@@ -0,0 +1,268 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class ChangeLog:
+    """
+    Append-only journal (JSON lines) över alla mutationer i lagret.
+
+    Varje rad är en post med löpnummer (seq), tidsstämpel, operation,
+    objektets tillstånd efter ändringen och kvantitetsförändringen (delta).
+    """
+
+    _TAIL_READ_BYTES = 64 * 1024
+    _OFFSET_HINTS = 64
+
+    def __init__(self, log_file: str):
+        self.log_file = log_file
+        self._lock = threading.Lock()
+        self._last_seq: Optional[int] = None
+        self._known_size = 0
+        self.generation = 0
+        # seq → (generation, byte-offset efter posten), så att den som läser vidare slipper läsa om filen
+        self._offsets: "OrderedDict[int, Tuple[int, int]]" = OrderedDict()
+
+    def _read_tail_seq(self) -> int:
+        if not os.path.exists(self.log_file):
+            self._known_size = 0
+            return 0
+
+        size = os.path.getsize(self.log_file)
+        self._known_size = size
+        if size == 0:
+            return 0
+
+        with open(self.log_file, 'rb') as f:
+            f.seek(max(0, size - self._TAIL_READ_BYTES))
+            tail = f.read().decode('utf-8', errors='replace')
+
+        for line in reversed(tail.splitlines()):
+            try:
+                return int(json.loads(line)['seq'])
+            except (ValueError, KeyError, TypeError):
+                continue
+        return 0
+
+    def last_seq(self) -> int:
+        with self._lock:
+            if self._last_seq is None:
+                self._last_seq = self._read_tail_seq()
+            return self._last_seq
+
+    def reload(self) -> int:
+        """Läser om senaste seq från filen, t.ex. efter att en annan process skrivit i journalen."""
+        with self._lock:
+            self._last_seq = self._read_tail_seq()
+            return self._last_seq
+
+    def append(self, op: str, item: Dict[str, Any], delta: int = 0) -> Dict[str, Any]:
+        with self._lock:
+            if self._last_seq is None or self.size() != self._known_size:
+                # Filen har ändrats utanför denna instans (t.ex. annan process)
+                self._last_seq = self._read_tail_seq()
+
+            entry = {
+                'seq': self._last_seq + 1,
+                'ts': time.time(),
+                'op': op,
+                'item': item,
+                'delta': delta
+            }
+
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            line = json.dumps(entry, ensure_ascii=False) + '\n'
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+            self._last_seq = entry['seq']
+            self._known_size = os.path.getsize(self.log_file)
+            return entry
+
+    def append_many(self, changes: List[Tuple[str, Dict[str, Any], int]]) -> List[Dict[str, Any]]:
+        """Journalför många ändringar (op, objekt, delta) med en enda skrivning, t.ex. vid import."""
+        if not changes:
+            return []
+        with self._lock:
+            if self._last_seq is None or self.size() != self._known_size:
+                self._last_seq = self._read_tail_seq()
+
+            now = time.time()
+            entries = [
+                {'seq': self._last_seq + i, 'ts': now, 'op': op, 'item': item, 'delta': delta}
+                for i, (op, item, delta) in enumerate(changes, start=1)
+            ]
+
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+
+            self._last_seq = entries[-1]['seq']
+            self._known_size = os.path.getsize(self.log_file)
+            return entries
+
+    def append_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """Skriver färdiga poster oförändrade, med sina seq (replikering från en primär)."""
+        with self._lock:
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+
+            self._last_seq = entries[-1]['seq']
+            self._known_size = os.path.getsize(self.log_file)
+
+    def reset(self) -> None:
+        """Tömmer journalen, t.ex. när en replika börjar om från en primär med lägre seq."""
+        with self._lock:
+            if os.path.exists(self.log_file):
+                os.remove(self.log_file)
+            self._last_seq = 0
+            self._known_size = 0
+            self.generation += 1
+            self._offsets.clear()
+
+    def size(self) -> int:
+        return os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+
+    def read_from_offset(self, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Läser alla kompletta poster från en byte-offset.
+
+        Returns:
+            Tuple med (poster, ny offset). Om filen krympt (t.ex. efter
+            trunkering) börjar läsningen om från början.
+        """
+        if not os.path.exists(self.log_file):
+            return [], 0
+
+        if os.path.getsize(self.log_file) < offset:
+            offset = 0
+
+        entries = []
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            for raw_line in f:
+                if not raw_line.endswith(b'\n'):
+                    break
+                offset += len(raw_line)
+                try:
+                    entries.append(json.loads(raw_line))
+                except ValueError:
+                    continue
+        return entries, offset
+
+    def iter_entries(self, since_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.log_file):
+            return
+
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('seq', 0) > since_seq:
+                    yield entry
+
+    def read_after(self, since_seq: int, limit: int) -> List[Dict[str, Any]]:
+        """
+        Upp till `limit` poster med seq efter `since_seq`, i ordning.
+
+        Var läsningen slutade sparas per seq, så en läsare som fortsätter
+        där den slutade (en replika som pollar) bara läser de nya raderna.
+        """
+        if not os.path.exists(self.log_file):
+            return []
+
+        with self._lock:
+            hint = self._offsets.get(since_seq)
+            generation = self.generation
+        offset = hint[1] if hint is not None and hint[0] == generation and hint[1] <= self.size() else 0
+
+        entries = []
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            for raw_line in f:
+                if not raw_line.endswith(b'\n'):
+                    break
+                offset += len(raw_line)
+                try:
+                    entry = json.loads(raw_line)
+                except ValueError:
+                    continue
+                if entry.get('seq', 0) <= since_seq:
+                    continue
+                entries.append(entry)
+                if len(entries) >= limit:
+                    break
+
+        if entries:
+            with self._lock:
+                if generation == self.generation:
+                    self._offsets[entries[-1]['seq']] = (generation, offset)
+                    while len(self._offsets) > self._OFFSET_HINTS:
+                        self._offsets.popitem(last=False)
+        return entries
+
+    def first_seq(self) -> Optional[int]:
+        for entry in self.iter_entries():
+            return entry.get('seq')
+        return None
+
+    def compact(self, keep_after_seq: int, keep_after_ts: float) -> int:
+        """
+        Tar bort poster som är äldre än både keep_after_seq och keep_after_ts.
+
+        Returns:
+            Antal borttagna poster
+        """
+        with self._lock:
+            if not os.path.exists(self.log_file):
+                return 0
+
+            temp_file = f"{self.log_file}.tmp"
+            removed = 0
+            with open(self.log_file, 'r', encoding='utf-8') as src, \
+                    open(temp_file, 'w', encoding='utf-8') as dst:
+                for line in src:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        removed += 1
+                        continue
+                    if entry.get('seq', 0) <= keep_after_seq and entry.get('ts', 0) < keep_after_ts:
+                        removed += 1
+                        continue
+                    dst.write(line)
+
+            os.replace(temp_file, self.log_file)
+            self._known_size = self.size()
+            if removed:
+                self.generation += 1
+            return removed
+
+
+def apply_entry(state: Dict[int, Dict[str, Any]], entry: Dict[str, Any]) -> None:
+    """Applicerar en loggpost på ett tillstånd indexerat på objekt-id."""
+    op = entry.get('op')
+    item = entry.get('item', {})
+    if op == 'restore':
+        state.clear()
+        for restored in item.get('items', []):
+            state[restored['id']] = restored
+    elif op == 'delete':
+        state.pop(item.get('id'), None)
+    elif op in ('add', 'update'):
+        state[item['id']] = item
@@ -1,10 +1,33 @@
 import json
+import logging
 import os
+import re
 import threading
 import time
-from typing import List, Dict, Optional, Any
+from contextlib import ExitStack
+from typing import Callable, List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass
 
+from models.change_log import ChangeLog, apply_entry
+from utils.exceptions import ConfigurationError
+from utils.locks import InstrumentedLock
+from utils.metrics import get_metrics
+
+_metrics = get_metrics()
+FILE_IO_SECONDS = _metrics.histogram(
+    "inventory_file_io_seconds", "Tid för läsning och skrivning av lagerfilen", ["operation"]
+)
+CACHE_LOOKUPS = _metrics.counter(
+    "inventory_cache_lookups_total", "Cacheuppslag i InventoryModel per utfall (hit, revalidated, miss)", ["result"]
+)
+OPERATIONS = _metrics.counter(
+    "inventory_operations_total", "Skrivoperationer i InventoryModel", ["operation"]
+)
+
+# Gränser för ett nytt objekt där de inte anges
+DEFAULT_LOW_STATUS = 5
+DEFAULT_HIGH_STATUS = 15
+
 
 @dataclass
 class InventoryItem:
@@ -24,8 +47,8 @@ class InventoryItem:
             product_family=data.get('product_family', ''),
             spare_part=data.get('spare_part', ''),
             quantity=int(data.get('quantity', 0)),
-            low_status=int(data.get('low_status', 5)),
-            high_status=int(data.get('high_status', 15))
+            low_status=int(data.get('low_status', DEFAULT_LOW_STATUS)),
+            high_status=int(data.get('high_status', DEFAULT_HIGH_STATUS))
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -40,15 +63,58 @@ class InventoryItem:
         }
 
 
-class InventoryModel:
-    def __init__(self, data_file: str, cache_ttl: float = 1.0):
+@dataclass
+class InventorySnapshot:
+    version: int
+    taken_at: float
+    items: List[Dict[str, Any]]
+
+
+# (resultat, ändringar att journalföra); resultat None betyder att objektet inte fanns
+Change = Callable[[List[Dict[str, Any]]], Tuple[Any, List[Tuple[str, Dict[str, Any], int]]]]
+
+UNBRANDED_PARTITION = "_utan_brand"
+
+
+PARTITION_MODES = ("none", "brand")
+
+
+def partition_key(brand: str) -> str:
+    """Filnamnssäker partitionsnyckel för ett Brand; varianter som "HP" och "hp" hamnar i samma partition."""
+    slug = re.sub(r"[^a-z0-9]+", "_", (brand or "").strip().lower()).strip("_")
+    return slug or UNBRANDED_PARTITION
+
+
+class InventoryPartition:
+    """
+    En lagerfil med eget lås och egen cache.
+
+    Skrivningar bygger alltid en ny lista som publiceras i cachen, så en
+    publicerad lista ändras aldrig och kan läsas utan lås. Lista, tidpunkt
+    och filens stat publiceras som en enda referens, så en läsare aldrig ser
+    en lista ihop med en annan listas stat.
+    """
+
+    def __init__(self, key: str, data_file: str, cache_ttl: float, lock: InstrumentedLock):
+        self.key = key
         self.data_file = data_file
-        self._lock = threading.RLock()
-        self._cache = None
-        self._cache_timestamp = 0
+        self.lock = lock
+        # (lista, publiceringstid, filens (mtime_ns, storlek) när listan skrevs eller lästes)
+        self._published: Optional[Tuple[List[Dict[str, Any]], float, Optional[Tuple[int, int]]]] = None
         self._cache_ttl = cache_ttl
 
+    def _stat_file(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.data_file)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
     def _read_file(self) -> List[Dict[str, Any]]:
+        with FILE_IO_SECONDS.time(operation="read"):
+            return self._read_file_untimed()
+
+    def _read_file_untimed(self) -> List[Dict[str, Any]]:
         try:
             if not os.path.exists(self.data_file):
                 return []
@@ -60,103 +126,719 @@ class InventoryModel:
             return []
 
     def _write_file(self, data: List[Dict[str, Any]]) -> None:
+        with FILE_IO_SECONDS.time(operation="write"):
+            self._write_file_untimed(data)
+
+    def _write_file_untimed(self, data: List[Dict[str, Any]]) -> None:
         temp_file = f"{self.data_file}.tmp"
         try:
             with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
 
-            if os.path.exists(self.data_file):
-                backup_file = f"{self.data_file}.backup"
-                os.replace(self.data_file, backup_file)
-
+            # os.replace är atomisk, så läsare ser alltid antingen gammal eller ny fil
             os.replace(temp_file, self.data_file)
 
-            if os.path.exists(f"{self.data_file}.backup"):
-                os.remove(f"{self.data_file}.backup")
-
         except Exception as e:
             if os.path.exists(temp_file):
                 os.remove(temp_file)
             raise e
 
     def _get_cached_data(self) -> Optional[List[Dict[str, Any]]]:
-        current_time = time.time()
-        if (self._cache is not None and
-            current_time - self._cache_timestamp < self._cache_ttl):
-            return self._cache
+        published = self._published
+        if published is not None and time.time() - published[1] < self._cache_ttl:
+            return published[0]
         return None
 
-    def _update_cache(self, data: List[Dict[str, Any]]) -> None:
-        self._cache = data
-        self._cache_timestamp = time.time()
+    def is_cache_warm(self) -> bool:
+        return self._get_cached_data() is not None
 
-    def get_all(self) -> List[InventoryItem]:
-        with self._lock:
-            cached_data = self._get_cached_data()
-            if cached_data is not None:
-                data = cached_data
+    def _update_cache(self, data: List[Dict[str, Any]], stamp: Optional[Tuple[int, int]] = None) -> None:
+        self._published = (data, time.time(), stamp if stamp is not None else self._stat_file())
+
+    def _unchanged_on_disk(self) -> bool:
+        published = self._published
+        return published is not None and published[2] is not None and self._stat_file() == published[2]
+
+    def _current_data(self) -> List[Dict[str, Any]]:
+        cached_data = self._get_cached_data()
+        if cached_data is not None:
+            CACHE_LOOKUPS.inc(result="hit")
+            return cached_data
+
+        # TTL har gått ut: behåll den publicerade listan om filen inte ändrats sedan den lästes
+        published = self._published
+        if self._unchanged_on_disk():
+            CACHE_LOOKUPS.inc(result="revalidated")
+            self._published = (published[0], time.time(), published[2])
+            return published[0]
+
+        CACHE_LOOKUPS.inc(result="miss")
+        data = self._read_file()
+        self._update_cache(data)
+        return data
+
+    def _fresh_data(self) -> List[Dict[str, Any]]:
+        # Skrivningar utgår från cachen bara om filen bevisligen är oförändrad, oavsett TTL
+        published = self._published
+        if self._unchanged_on_disk():
+            return published[0]
+        data = self._read_file()
+        self._update_cache(data)
+        return data
+
+    def published(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Den publicerade listan utan lås, eller None om den först måste
+        valideras mot filen. Pågår en skrivning i partitionen används den
+        publicerade listan ändå: skrivaren publicerar sin lista när den är klar.
+        """
+        cached_data = self._get_cached_data()
+        if cached_data is None and self._published is not None and self.lock.owner_operation is not None:
+            cached_data = self._published[0]
+        if cached_data is not None:
+            CACHE_LOOKUPS.inc(result="hit")
+        return cached_data
+
+    def items(self, operation: str = "read") -> List[Dict[str, Any]]:
+        cached_data = self.published()
+        if cached_data is not None:
+            return cached_data
+        with self.lock.hold(operation):
+            return self._current_data()
+
+    def mutate(self, operation: str, change: Change,
+               commit: Callable[[List[Tuple["InventoryPartition", List[Dict[str, Any]]]],
+                                 List[Tuple[str, Dict[str, Any], int]]], None]) -> Any:
+        """Kör `change` på en kopia av listan och skriver under låset; `commit` journalför och publicerar."""
+        with self.lock.hold(operation):
+            data = list(self._fresh_data())
+            result, entries = change(data)
+            if result is not None:
+                self._write_file(data)
+                commit([(self, data)], entries)
+            return result
+
+    def replace(self, data: List[Dict[str, Any]]) -> None:
+        """Ersätter hela innehållet; anroparen håller låset."""
+        self._write_file(data)
+        self._update_cache(data)
+
+    def clear_cache(self) -> None:
+        with self.lock.hold("clear_cache"):
+            self._published = None
+
+
+class InventoryModel:
+    """
+    Lagret, som en fil eller uppdelat i en partition per Brand.
+
+    Med `partition_by="brand"` har varje Brand en egen fil, ett eget lås och
+    en egen cache under `partitions_dir`, så skrivningar på olika Brands inte
+    väntar på varandra och en skrivning bara serialiserar sin egen partition.
+    Ett ID-index pekar ut partitionen för ett objekt; listor över alla Brands
+    slås ihop först vid läsning och återanvänds så länge ingen partition ändrats.
+    Utan partitionering används en partition med `data_file` som tidigare.
+    """
+
+    def __init__(self, data_file: str, cache_ttl: float = 1.0, change_log: Optional[ChangeLog] = None,
+                 slow_lock_seconds: float = 0.25, logger: Optional[logging.Logger] = None,
+                 partition_by: str = "none", partitions_dir: Optional[str] = None):
+        if partition_by not in PARTITION_MODES:
+            raise ConfigurationError(f"Okänd partitionering {partition_by!r}, använd {' eller '.join(PARTITION_MODES)}")
+        self.data_file = data_file
+        self.logger = logger
+        self.partition_by = partition_by
+        self.partitions_dir = partitions_dir or os.path.join(os.path.dirname(data_file), "partitions")
+        self._cache_ttl = cache_ttl
+        self._slow_lock_seconds = slow_lock_seconds
+        self._partitions: Dict[str, InventoryPartition] = {}
+        self._partitions_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._id_index: Optional[Dict[int, str]] = None
+        self._next_id = 1
+        self._merged: Optional[Tuple[List[List[Dict[str, Any]]], List[Dict[str, Any]]]] = None
+        self._version_lock = threading.Lock()
+        self._version_changed = threading.Condition(self._version_lock)
+        # Ökas före och efter varje publicering; udda betyder att en publicering pågår
+        self._publish_seq = 0
+        self.change_log = change_log
+        self._version = change_log.last_seq() if change_log else 0
+
+        if self.partitioned:
+            os.makedirs(self.partitions_dir, exist_ok=True)
+            self._split_single_file()
+            for name in sorted(os.listdir(self.partitions_dir)):
+                if name.endswith(".json"):
+                    self._partition(name[:-len(".json")])
+        else:
+            self._merge_partitions()
+            self._partitions[""] = InventoryPartition(
+                "", data_file, cache_ttl, InstrumentedLock("inventory", slow_lock_seconds, logger=logger)
+            )
+
+    @property
+    def partitioned(self) -> bool:
+        return self.partition_by == "brand"
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """Väntar högst `timeout` sekunder på en version efter `version` och returnerar aktuell version."""
+        with self._version_changed:
+            self._version_changed.wait_for(lambda: self._version != version, timeout)
+            return self._version
+
+    def _journal(self, changes: List[Tuple[str, Dict[str, Any], int]]) -> int:
+        """Journalför ändringarna och returnerar versionen efter dem; anroparen håller versionslåset."""
+        if not changes:
+            return self._version
+        if self.change_log is not None:
+            return max(self._version, self.change_log.append_many(changes)[-1]['seq'])
+        return self._version + len(changes)
+
+    def _journal_replicated(self, entries: List[Dict[str, Any]]) -> int:
+        if self.change_log is not None:
+            self.change_log.append_entries(entries)
+        return entries[-1]['seq']
+
+    def _publish(self, published: List[Tuple[InventoryPartition, List[Dict[str, Any]]]],
+                 journal: Callable[[], int]) -> None:
+        """
+        Journalför och publicerar partitionernas nya listor tillsammans med den nya versionen.
+
+        Journalen skrivs först; själva publiceringen är bara referensbyten
+        mellan två ökningar av _publish_seq, så snapshot() kan läsa utan lås
+        och bara behöver försöka igen om den överlappade just de bytena.
+        Anroparen håller partitionernas lås och har redan skrivit filerna.
+        """
+        stamps = [partition._stat_file() for partition, _ in published]
+        with self._version_changed:
+            version = journal()
+            self._publish_seq += 1
+            for (partition, data), stamp in zip(published, stamps):
+                partition._update_cache(data, stamp)
+            self._version = version
+            self._publish_seq += 1
+            self._version_changed.notify_all()
+
+    def _commit(self, published: List[Tuple[InventoryPartition, List[Dict[str, Any]]]],
+                changes: List[Tuple[str, Dict[str, Any], int]]) -> None:
+        self._publish(published, lambda: self._journal(changes))
+
+    def _partition(self, key: str) -> InventoryPartition:
+        with self._partitions_lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                lock = InstrumentedLock(f"inventory:{key}", self._slow_lock_seconds, logger=self.logger)
+                partition = InventoryPartition(key, os.path.join(self.partitions_dir, f"{key}.json"),
+                                               self._cache_ttl, lock)
+                self._partitions[key] = partition
+            return partition
+
+    def _partition_list(self) -> List[InventoryPartition]:
+        with self._partitions_lock:
+            return [self._partitions[key] for key in sorted(self._partitions)]
+
+    def _key_for(self, brand: str) -> str:
+        return partition_key(brand) if self.partitioned else ""
+
+    def _split_single_file(self) -> None:
+        """Första start med partitionering: dela upp den befintliga inventory.json per Brand."""
+        if not os.path.exists(self.data_file) or any(name.endswith(".json") for name in os.listdir(self.partitions_dir)):
+            return
+
+        source = InventoryPartition("", self.data_file, 0, InstrumentedLock("inventory", self._slow_lock_seconds))
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for item_data in source._read_file():
+            groups.setdefault(partition_key(item_data.get('Brand', '')), []).append(item_data)
+        for key, data in groups.items():
+            self._partition(key).replace(data)
+
+        os.replace(self.data_file, f"{self.data_file}.pre-partition")
+        if self.logger:
+            self.logger.info(f"Lagret uppdelat i {len(groups)} partitioner per Brand under {self.partitions_dir}")
+
+    def _merge_partitions(self) -> None:
+        """
+        Partitioneringen avslagen efter en uppdelning: slå ihop partitionerna till inventory.json igen.
+
+        En tom inventory.json räknas som saknad. Finns data både i filen och i
+        partitionerna går det inte att avgöra vilken som gäller, och då startar
+        lagret inte.
+        """
+        if not os.path.isdir(self.partitions_dir):
+            return
+        names = sorted(name for name in os.listdir(self.partitions_dir) if name.endswith(".json"))
+        if not names:
+            return
+
+        single = InventoryPartition("", self.data_file, 0, InstrumentedLock("inventory", self._slow_lock_seconds))
+        if single._read_file():
+            raise ConfigurationError(
+                f"Både {self.data_file} och {self.partitions_dir} innehåller data; flytta undan den som inte "
+                f"gäller eller sätt INVENTORY_PARTITION_BY = \"brand\""
+            )
+
+        data: List[Dict[str, Any]] = []
+        for name in names:
+            with open(os.path.join(self.partitions_dir, name), 'r', encoding='utf-8') as f:
+                data.extend(json.load(f))
+        data.sort(key=lambda item_data: int(item_data.get('id', 0)))
+        single.replace(data)
+
+        os.replace(self.partitions_dir, f"{self.partitions_dir}.pre-merge")
+        if self.logger:
+            self.logger.info(f"{len(names)} partitioner sammanslagna till {self.data_file} ({len(data)} objekt)")
+
+    def _build_index(self) -> Dict[int, str]:
+        index = {}
+        for partition in self._partition_list():
+            for item_data in partition.items("index"):
+                item_id = int(item_data.get('id', 0))
+                if item_id in index and self.logger:
+                    # Spår av en avbruten flytt mellan partitioner (se _move)
+                    self.logger.warning(f"Objekt {item_id} finns i både {index[item_id]} och {partition.key}")
+                index[item_id] = partition.key
+        self._next_id = max([self._next_id] + [item_id + 1 for item_id in index])
+        return index
+
+    def _locate(self, item_id: int, refresh: bool = False) -> Optional[InventoryPartition]:
+        if not self.partitioned:
+            return self._partitions[""]
+        with self._index_lock:
+            if self._id_index is None or refresh:
+                self._id_index = self._build_index()
+            key = self._id_index.get(item_id)
+        return self._partition(key) if key is not None else None
+
+    def _index_set(self, item_id: int, key: Optional[str]) -> None:
+        if not self.partitioned:
+            return
+        with self._index_lock:
+            if self._id_index is None:
+                return
+            if key is None:
+                self._id_index.pop(item_id, None)
             else:
-                data = self._read_file()
-                self._update_cache(data)
+                self._id_index[item_id] = key
 
-            return [InventoryItem.from_dict(item) for item in data]
+    def _allocate_id(self) -> int:
+        # Anropas utan partitionslås: indexbygget tar partitionernas lås efter indexlåset
+        with self._index_lock:
+            if self._id_index is None:
+                self._id_index = self._build_index()
+            item_id = self._next_id
+            self._next_id += 1
+            return item_id
+
+    def _mutate_item(self, item_id: int, operation: str, change: Change) -> Any:
+        # Ett inaktuellt index (t.ex. efter extern filändring) byggs om en gång innan vi ger upp
+        for refresh in (False, True):
+            partition = self._locate(item_id, refresh=refresh)
+            if partition is not None:
+                result = partition.mutate(operation, change, self._commit)
+                if result is not None:
+                    return result
+            if not self.partitioned:
+                break
+        return None
+
+    def is_cache_warm(self) -> bool:
+        return all(partition.is_cache_warm() for partition in self._partition_list())
+
+    def get_all(self) -> List[InventoryItem]:
+        return [InventoryItem.from_dict(item) for item in self.snapshot().items]
+
+    def snapshot(self) -> InventorySnapshot:
+        """
+        Returnerar en konsistent ögonblicksbild av lagret utan att ta några lås.
+
+        Partitionernas publicerade listor och versionen läses mellan två
+        läsningar av _publish_seq; har en publicering skett under tiden görs
+        läsningen om, så version och innehåll alltid hör ihop. En pågående
+        skrivning (fil och journal) väntar läsaren alltså inte på. Bara en
+        partition vars cache har gått ut och som ingen skriver i valideras
+        mot filen under sitt eget lås. Den sammanslagna listan byggs om bara
+        när någon partition publicerat en ny lista.
+        """
+        while True:
+            seq = self._publish_seq
+            partitions = self._partition_list()
+            version = self._version
+            lists = [partition.published() for partition in partitions]
+            lists = [partition.items("snapshot") if data is None else data for partition, data in zip(partitions, lists)]
+            if seq % 2 == 0 and seq == self._publish_seq:
+                break
+            time.sleep(0)
+
+        if len(lists) == 1:
+            return InventorySnapshot(version, time.time(), lists[0])
+
+        merged = self._merged
+        if merged is None or len(merged[0]) != len(lists) or any(a is not b for a, b in zip(merged[0], lists)):
+            merged = (lists, [item for data in lists for item in data])
+            self._merged = merged
+        return InventorySnapshot(version, time.time(), merged[1])
 
     def get_by_id(self, item_id: int) -> Optional[InventoryItem]:
-        items = self.get_all()
-        for item in items:
-            if item.id == item_id:
-                return item
+        for refresh in (False, True):
+            partition = self._locate(item_id, refresh=refresh)
+            if partition is not None:
+                for item_data in partition.items("get_by_id"):
+                    if item_data.get('id') == item_id:
+                        return InventoryItem.from_dict(item_data)
+            if not self.partitioned:
+                break
         return None
 
     def add(self, item: InventoryItem) -> InventoryItem:
-        with self._lock:
-            data = self._read_file()
+        partition = self._partition(self._key_for(item.Brand))
+        if item.id == 0 and self.partitioned:
+            item.id = self._allocate_id()
 
+        def change(data):
             if item.id == 0:
-                max_id = max([item_data.get('id', 0) for item_data in data] + [0])
-                item.id = max_id + 1
-
+                item.id = max([item_data.get('id', 0) for item_data in data] + [0]) + 1
             data.append(item.to_dict())
-            self._write_file(data)
-            self._update_cache(data)
+            return item, [('add', item.to_dict(), item.quantity)]
 
-            return item
+        partition.mutate("add", change, self._commit)
+        self._index_set(item.id, partition.key)
+        OPERATIONS.inc(operation="add")
+        return item
 
     def update(self, item: InventoryItem) -> bool:
-        with self._lock:
-            data = self._read_file()
+        source = self._locate(item.id)
+        if source is None and self.partitioned:
+            source = self._locate(item.id, refresh=True)
+        if source is None:
+            return False
 
+        target_key = self._key_for(item.Brand)
+        if source.key != target_key:
+            return self._move(item, source, self._partition(target_key))
+
+        def change(data):
             for i, item_data in enumerate(data):
                 if item_data.get('id') == item.id:
+                    old_quantity = int(item_data.get('quantity', 0))
                     data[i] = item.to_dict()
-                    self._write_file(data)
-                    self._update_cache(data)
-                    return True
+                    return True, [('update', item.to_dict(), item.quantity - old_quantity)]
+            return None, []
 
+        if source.mutate("update", change, self._commit) is None:
             return False
+        OPERATIONS.inc(operation="update")
+        return True
 
-    def delete(self, item_id: int) -> bool:
-        with self._lock:
-            data = self._read_file()
+    def _move(self, item: InventoryItem, source: InventoryPartition, target: InventoryPartition) -> bool:
+        """
+        Nytt Brand: flytta objektet mellan partitioner med båda låsen i fast ordning.
+
+        Målet skrivs före källan, så ett avbrott mellan de två skrivningarna
+        lämnar en dubblett (som indexbygget varnar för) i stället för ett
+        förlorat objekt. Båda listorna publiceras i samma publicering, så en
+        läsare ser objektet i exakt en partition.
+        """
+        first, second = sorted((source, target), key=lambda partition: partition.key)
+        with first.lock.hold("move"), second.lock.hold("move"):
+            source_data = source._fresh_data()
+            old = next((item_data for item_data in source_data if item_data.get('id') == item.id), None)
+            if old is None:
+                return False
+
+            target_data = list(target._fresh_data()) + [item.to_dict()]
+            source_data = [item_data for item_data in source_data if item_data.get('id') != item.id]
+            target._write_file(target_data)
+            source._write_file(source_data)
+            self._commit([(target, target_data), (source, source_data)],
+                         [('update', item.to_dict(), item.quantity - int(old.get('quantity', 0)))])
 
+        self._index_set(item.id, target.key)
+        OPERATIONS.inc(operation="update")
+        return True
+
+    def adjust_quantity(self, item_id: int, delta: int) -> Optional[Tuple[int, InventoryItem]]:
+        """
+        Ändrar saldot med `delta` (aldrig under 0) som en enda operation under låset.
+
+        Läsning och skrivning sker i samma kritiska sektion, så samtidiga
+        avdrag från flera skannrar kan inte skriva över varandra.
+        Returnerar (gammalt saldo, uppdaterat objekt) eller None om ID saknas.
+        """
+        def change(data):
+            for i, item_data in enumerate(data):
+                if item_data.get('id') == item_id:
+                    item = InventoryItem.from_dict(item_data)
+                    old_quantity = item.quantity
+                    item.quantity = max(0, old_quantity + delta)
+                    data[i] = item.to_dict()
+                    return (old_quantity, item), [('update', item.to_dict(), item.quantity - old_quantity)]
+            return None, []
+
+        result = self._mutate_item(item_id, "adjust_quantity", change)
+        if result is not None:
+            OPERATIONS.inc(operation="adjust_quantity")
+        return result
+
+    def delete(self, item_id: int) -> bool:
+        def change(data):
             for i, item_data in enumerate(data):
                 if item_data.get('id') == item_id:
                     del data[i]
-                    self._write_file(data)
-                    self._update_cache(data)
-                    return True
+                    return True, [('delete', item_data, -int(item_data.get('quantity', 0)))]
+            return None, []
 
+        if self._mutate_item(item_id, "delete", change) is None:
             return False
+        self._index_set(item_id, None)
+        OPERATIONS.inc(operation="delete")
+        return True
+
+    def _replace_partitions(self, data: List[Dict[str, Any]], journal: Callable[[], int]) -> None:
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for item_data in data:
+            groups.setdefault(self._key_for(item_data['Brand']), []).append(item_data)
+
+        for key in groups:
+            self._partition(key)
+        partitions = self._partition_list()
+        with ExitStack() as stack:
+            for partition in partitions:
+                stack.enter_context(partition.lock.hold("replace_all"))
+            published = [(partition, groups.get(partition.key, [])) for partition in partitions]
+            for partition, partition_data in published:
+                partition._write_file(partition_data)
+            self._publish(published, journal)
+
+        with self._index_lock:
+            self._id_index = None
+
+    def replace_all(self, items: List[Dict[str, Any]]) -> int:
+        data = [InventoryItem.from_dict(item).to_dict() for item in items]
+        self._replace_partitions(data, lambda: self._journal([('restore', {'items': data}, 0)]))
+        OPERATIONS.inc(operation="restore")
+        return len(data)
+
+    def reload(self) -> int:
+        """
+        Läser om lagret från disk: cacher, version och ID-index.
+
+        Används när en annan process har skrivit i samma datakatalog, t.ex.
+        den gamla instansen vid en blue/green-växling. Returnerar ny version.
+        """
+        if self.partitioned:
+            for name in sorted(os.listdir(self.partitions_dir)):
+                if name.endswith(".json"):
+                    self._partition(name[:-len(".json")])
+        partitions = self._partition_list()
+        with ExitStack() as stack:
+            for partition in partitions:
+                stack.enter_context(partition.lock.hold("reload"))
+            published = [(partition, partition._read_file()) for partition in partitions]
+            self._publish(published, lambda: max(self._version, self.change_log.reload())
+                          if self.change_log is not None else self._version)
+        with self._index_lock:
+            self._id_index = None
+        return self._version
+
+    def record_baseline(self) -> bool:
+        """
+        Journalför lagrets nuvarande innehåll som en restore-post om ändringsloggen är tom.
+
+        Utan den kan en återställning inte skilja ett lager som började tomt
+        från ett som hade data innan ändringsloggen infördes.
+        """
+        if self.change_log is None or self.change_log.last_seq() != 0:
+            return False
+        items = list(self.snapshot().items)
+        self._commit([], [('restore', {'items': items}, 0)])
+        if self.logger:
+            self.logger.info(f"Ändringsloggen startad med nuvarande lager som utgångsläge ({len(items)} objekt)")
+        return True
+
+    def upsert_many(self, rows: List[Dict[str, Any]], skip_invalid: bool = False) -> Tuple[int, int, int, List[int]]:
+        """
+        Lägger till eller uppdaterar många objekt i en enda skrivning per partition.
+
+        Nyckeln är (product_family, spare_part) som i find_by_product; ett
+        befintligt objekt behåller sitt id och får radens värden, ett nytt
+        objekt får nästa lediga id. Alla ändringar journalförs i en skrivning.
+        Indexlåset tas före partitionernas lås, som vid id-tilldelning.
+
+        Det sammanslagna objektet (befintliga värden plus radens, eller
+        standardgränserna för ett nytt) måste ha low_status < high_status.
+        Rader som bryter mot det avvisas; då skrivs ingenting, om inte
+        `skip_invalid` anges och bara de raderna hoppas över.
+
+        Returns:
+            Tuple med (tillagda, uppdaterade, oförändrade, index för avvisade rader)
+        """
+        # Målpartitionen är radens Brand, eller det befintliga objektets om raden saknar Brand
+        for row in rows:
+            self._partition(self._key_for(row.get('Brand', '')))
+
+        with ExitStack() as stack:
+            if self.partitioned:
+                stack.enter_context(self._index_lock)
+                if self._id_index is None:
+                    self._id_index = self._build_index()
+            partitions = {partition.key: partition for partition in self._partition_list()}
+            for key in sorted(partitions):
+                stack.enter_context(partitions[key].lock.hold("upsert_many"))
+
+            current = {key: partition._fresh_data() for key, partition in partitions.items()}
+            copies: Dict[str, List[Optional[Dict[str, Any]]]] = {}
+
+            def writable(key: str) -> List[Optional[Dict[str, Any]]]:
+                if key not in copies:
+                    copies[key] = list(current[key])
+                return copies[key]
+
+            location: Dict[Tuple[str, str], Tuple[str, int]] = {}
+            next_id = self._next_id
+            for key, data in current.items():
+                for i, item_data in enumerate(data):
+                    location.setdefault((item_data.get('product_family'), item_data.get('spare_part')), (key, i))
+                    next_id = max(next_id, int(item_data.get('id', 0)) + 1)
+
+            changes: List[Tuple[str, Dict[str, Any], int]] = []
+            moved: Dict[int, str] = {}
+            rejected: List[int] = []
+            added = updated = unchanged = 0
+            for index, row in enumerate(rows):
+                product_key = (row['product_family'], row['spare_part'])
+                found = location.get(product_key)
+                if found is None:
+                    item_data = InventoryItem.from_dict(dict(row, id=next_id)).to_dict()
+                    if item_data['high_status'] <= item_data['low_status']:
+                        rejected.append(index)
+                        continue
+                    next_id += 1
+                    target = self._key_for(item_data['Brand'])
+                    data = writable(target)
+                    location[product_key] = (target, len(data))
+                    data.append(item_data)
+                    moved[item_data['id']] = target
+                    changes.append(('add', item_data, item_data['quantity']))
+                    added += 1
+                    continue
+
+                key, i = found
+                old = (copies.get(key) or current[key])[i]
+                item_data = InventoryItem.from_dict(dict(old, **row, id=old['id'])).to_dict()
+                if item_data['high_status'] <= item_data['low_status']:
+                    rejected.append(index)
+                    continue
+                if item_data == old:
+                    unchanged += 1
+                    continue
+                target = self._key_for(item_data['Brand'])
+                if key == target:
+                    writable(key)[i] = item_data
+                else:
+                    # Nytt Brand: lämna en lucka i den gamla partitionen och lägg till i den nya
+                    writable(key)[i] = None
+                    data = writable(target)
+                    location[product_key] = (target, len(data))
+                    data.append(item_data)
+                    moved[item_data['id']] = target
+                changes.append(('update', item_data, item_data['quantity'] - int(old.get('quantity', 0))))
+                updated += 1
+
+            if rejected and not skip_invalid:
+                return 0, 0, 0, rejected
+
+            published = []
+            for key, data in copies.items():
+                data = [item_data for item_data in data if item_data is not None]
+                partitions[key]._write_file(data)
+                published.append((partitions[key], data))
+            self._commit(published, changes)
+            self._next_id = next_id
+            if self.partitioned and self._id_index is not None:
+                self._id_index.update(moved)
+
+        OPERATIONS.inc(added + updated, operation="upsert_many")
+        return added, updated, unchanged, rejected
+
+    def install_snapshot(self, items: List[Dict[str, Any]], seq: int) -> int:
+        """
+        Replika: ersätter lagret med primärens ögonblicksbild vid version `seq`.
+
+        Journalen behålls när `seq` ligger framåt (eller är samma version, t.ex.
+        vid omstart), men töms om primären har lägre seq än replikan, så att
+        replikans seq alltid följer primärens.
+        """
+        data = [InventoryItem.from_dict(item).to_dict() for item in items]
+
+        def journal() -> int:
+            if seq == self._version:
+                return seq
+            if self.change_log is not None and seq < self.change_log.last_seq():
+                self.change_log.reset()
+            return self._journal_replicated([{'seq': seq, 'ts': time.time(), 'op': 'restore',
+                                              'item': {'items': data}, 'delta': 0}])
+
+        self._replace_partitions(data, journal)
+        OPERATIONS.inc(operation="replicate_snapshot")
+        return len(data)
+
+    def apply_replicated(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        Replika: applicerar primärens poster i ordning och journalför dem med primärens seq.
+
+        Hela omgången sker under alla partitioners lås, så läsare ser lagret
+        antingen före eller efter den, aldrig halvvägs. Bara partitioner vars
+        innehåll ändrats skrivs om.
+        """
+        if not entries:
+            return 0
+
+        # Nya partitioner skapas innan låsen tas, så att låsordningen håller
+        for entry in entries:
+            item = entry.get('item', {})
+            for item_data in item.get('items', [item]) if entry.get('op') == 'restore' else [item]:
+                if 'Brand' in item_data:
+                    self._partition(self._key_for(item_data['Brand']))
+
+        partitions = self._partition_list()
+        with ExitStack() as stack:
+            for partition in partitions:
+                stack.enter_context(partition.lock.hold("replicate"))
+            before = {partition.key: partition._fresh_data() for partition in partitions}
+            state = {int(item_data.get('id', 0)): item_data for data in before.values() for item_data in data}
+            for entry in entries:
+                apply_entry(state, entry)
+
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            for item_data in state.values():
+                groups.setdefault(self._key_for(item_data.get('Brand', '')), []).append(item_data)
+            published = []
+            for partition in partitions:
+                data = groups.get(partition.key, [])
+                if data != before[partition.key]:
+                    partition._write_file(data)
+                    published.append((partition, data))
+            self._publish(published, lambda: self._journal_replicated(entries))
+
+        with self._index_lock:
+            self._id_index = None
+        OPERATIONS.inc(len(entries), operation="replicate")
+        return len(entries)
 
     def find_by_product(self, product_family: str, spare_part: str) -> Optional[InventoryItem]:
-        items = self.get_all()
-        for item in items:
-            if (item.product_family == product_family and
-                item.spare_part == spare_part):
-                return item
+        for item_data in self.snapshot().items:
+            if (item_data.get('product_family') == product_family and
+                item_data.get('spare_part') == spare_part):
+                return InventoryItem.from_dict(item_data)
         return None
 
     def clear_cache(self) -> None:
-        with self._lock:
-            self._cache = None
-            self._cache_timestamp = 0
\ No newline at end of file
+        for partition in self._partition_list():
+            partition.clear_cache()
+        with self._index_lock:
+            self._id_index = None
+        self._merged = None
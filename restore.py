@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+import sys
+import json
+from datetime import datetime
+from config import get_config
+from utils.logger import get_updater_logger
+from models.change_log import ChangeLog
+from models.inventory import InventoryModel
+from services.backup_service import BackupService
+
+
+def main():
+    config = get_config()
+    logger = get_updater_logger(config.UPDATER_LOG_FILE)
+
+    change_log = ChangeLog(config.change_log_file)
+    backup_service = BackupService(
+        config.DATA_DIR,
+        config.BACKUP_DIR,
+        logger,
+        change_log=change_log,
+        change_log_retention_days=config.CHANGE_LOG_RETENTION_DAYS
+    )
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--list":
+        print(json.dumps(backup_service.list_backups(), indent=4, ensure_ascii=False))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--verify":
+        results = backup_service.verify_backups()
+        print(json.dumps([result.to_dict() for result in results], indent=4, ensure_ascii=False))
+        sys.exit(0 if all(result.ok for result in results) else 1)
+    elif len(sys.argv) > 2 and sys.argv[1] == "--at":
+        target = datetime.fromisoformat(sys.argv[2])
+        dry_run = "--dry-run" in sys.argv
+        # Körs när app.py är stoppad; modellen skriver direkt till databasfilen
+        inventory_model = InventoryModel(
+            config.data_file, config.CACHE_TTL_SECONDS, change_log,
+            partition_by=config.INVENTORY_PARTITION_BY, partitions_dir=config.partitions_dir
+        )
+        plan = backup_service.restore_to(target.timestamp(), inventory_model, dry_run=dry_run)
+        print(json.dumps(plan.to_dict(), indent=4, ensure_ascii=False))
+    else:
+        print("Användning: python restore.py [--list|--verify|--at <YYYY-MM-DDTHH:MM> [--dry-run]]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+from flask import Blueprint, jsonify
+from services.analytics_service import AnalyticsService
+
+analytics_bp = Blueprint('analytics', __name__)
+
+
+def create_analytics_routes(analytics_service: AnalyticsService):
+    @analytics_bp.route("/api/analytics/consumption", methods=["GET"])
+    def get_consumption():
+        try:
+            forecasts = analytics_service.get_forecasts()
+            return jsonify({
+                "computed_at": analytics_service.computed_at,
+                "window_days": analytics_service.window_days,
+                "items": [forecast.to_dict() for forecast in forecasts]
+            })
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @analytics_bp.route("/api/analytics/consumption/<int:item_id>", methods=["GET"])
+    def get_item_consumption(item_id):
+        try:
+            forecast = analytics_service.get_forecast(item_id)
+            if forecast is None:
+                return jsonify({"error": "Item not found"}), 404
+            return jsonify(forecast.to_dict())
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    return analytics_bp
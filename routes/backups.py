@@ -0,0 +1,47 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime
+import logging
+from models.inventory import InventoryModel
+from services.backup_service import BackupService
+from utils.decorators import handle_errors
+
+backups_bp = Blueprint('backups', __name__)
+
+
+def create_backup_routes(backup_service: BackupService, inventory_model: InventoryModel, logger: logging.Logger):
+    @backups_bp.route("/api/backups", methods=["GET"])
+    @handle_errors(logger)
+    def list_backups():
+        return jsonify({
+            "backups": backup_service.list_backups(),
+            "last_backup_at": backup_service.latest_backup_time(),
+            "last_verification": backup_service.last_verification
+        })
+
+    @backups_bp.route("/api/backups/verify", methods=["POST"])
+    @handle_errors(logger)
+    def verify_backups():
+        results = backup_service.verify_backups()
+        return jsonify({
+            "ok": all(result.ok for result in results),
+            "results": [result.to_dict() for result in results]
+        })
+
+    @backups_bp.route("/api/backups/restore", methods=["POST"])
+    @handle_errors(logger)
+    def restore():
+        request_data = request.json or {}
+        timestamp = request_data.get("timestamp")
+        if not timestamp:
+            return jsonify({"error": "timestamp is required"}), 400
+
+        try:
+            target = datetime.fromisoformat(timestamp)
+        except (ValueError, TypeError):
+            return jsonify({"error": "timestamp must be an ISO 8601 date and time"}), 400
+
+        dry_run = bool(request_data.get("dry_run", False))
+        plan = backup_service.restore_to(target.timestamp(), inventory_model, dry_run=dry_run)
+        return jsonify({"message": "Dry run" if dry_run else "Inventory restored", "restore": plan.to_dict()}), 200
+
+    return backups_bp
@@ -0,0 +1,26 @@
+from flask import Blueprint, jsonify, request, Response
+import logging
+from services.dashboard_service import DashboardService
+from utils.decorators import handle_errors
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+
+def create_dashboard_routes(dashboard_service: DashboardService, logger: logging.Logger):
+    @dashboard_bp.route("/api/dashboard/<profile>/inventory", methods=["GET"])
+    @handle_errors(logger)
+    def get_dashboard_inventory(profile):
+        result = dashboard_service.get_payload(profile)
+        if result is None:
+            return jsonify({"error": f"Profile '{profile}' not found"}), 404
+
+        payload, etag = result
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = jsonify(payload)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    return dashboard_bp
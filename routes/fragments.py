@@ -0,0 +1,39 @@
+from flask import Blueprint, jsonify, request, Response
+import logging
+from services.fragment_service import FragmentService
+from utils.decorators import handle_errors
+
+fragments_bp = Blueprint('fragments', __name__)
+
+
+def create_fragment_routes(fragment_service: FragmentService, logger: logging.Logger):
+    def fragments_response(result):
+        # Klienten har redan senaste versionen - inget att byta ut
+        if result["version"] == request.args.get("since"):
+            return Response(status=204)
+        response = jsonify(result)
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    @fragments_bp.route("/api/dashboard/<profile>/fragments", methods=["GET"])
+    @handle_errors(logger)
+    def get_dashboard_fragments(profile):
+        result = fragment_service.dashboard_fragments(profile, request.args.get("since"))
+        if result is None:
+            return jsonify({"error": f"Profile '{profile}' not found"}), 404
+        return fragments_response(result)
+
+    @fragments_bp.route("/api/inventory/fragments", methods=["GET"])
+    @handle_errors(logger)
+    def get_inventory_fragments():
+        try:
+            offset = max(0, int(request.args.get("offset", 0)))
+            limit = max(1, min(int(request.args.get("limit", 100)), 500))
+        except ValueError:
+            return jsonify({"error": "offset and limit must be numbers"}), 400
+        query = request.args.get("q", "").strip()
+        if query:
+            return fragments_response(fragment_service.search_fragments(query, limit))
+        return fragments_response(fragment_service.inventory_fragments(request.args.get("since"), offset, limit))
+
+    return fragments_bp
@@ -0,0 +1,50 @@
+from flask import Blueprint, g, jsonify, request
+from services.handover_service import FORWARDED_HEADER, HandoverService
+
+handover_bp = Blueprint('handover', __name__)
+
+CONTROL_PREFIX = "/api/control/"
+
+
+def create_handover_routes(handover_service: HandoverService):
+    @handover_bp.before_app_request
+    def forward_after_handover():
+        if request.path.startswith(CONTROL_PREFIX):
+            return None
+        forwarded = handover_service.authorized(request.headers.get(FORWARDED_HEADER))
+        if forwarded and not handover_service.wait_for_takeover():
+            return jsonify({"error": "Service is being updated, try again"}), 503
+        if not handover_service.begin_request(request.method):
+            return handover_service.forward(request)
+        g.handover_counted = True
+        return None
+
+    @handover_bp.teardown_app_request
+    def end_request(exc):
+        if g.pop("handover_counted", False):
+            handover_service.end_request(request.method)
+
+    @handover_bp.route(f"{CONTROL_PREFIX}handover", methods=["POST"])
+    def hand_over():
+        if not handover_service.authorized(request.headers.get("X-Control-Token")):
+            return jsonify({"error": "Forbidden"}), 403
+        try:
+            port = int((request.get_json(silent=True) or {}).get("port"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "port is required"}), 400
+        drained = handover_service.hand_over(port)
+        return jsonify({"forward_port": port, "drained": drained}), 200
+
+    @handover_bp.route(f"{CONTROL_PREFIX}takeover", methods=["POST"])
+    def take_over():
+        if not handover_service.authorized(request.headers.get("X-Control-Token")):
+            return jsonify({"error": "Forbidden"}), 403
+        return jsonify({"data_version": handover_service.take_over()}), 200
+
+    @handover_bp.route(f"{CONTROL_PREFIX}resume", methods=["POST"])
+    def resume():
+        if not handover_service.authorized(request.headers.get("X-Control-Token")):
+            return jsonify({"error": "Forbidden"}), 403
+        return jsonify({"resumed": handover_service.resume()}), 200
+
+    return handover_bp
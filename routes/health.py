@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from services.health_service import HealthService
+
+health_bp = Blueprint('health', __name__)
+
+
+def create_health_routes(health_service: HealthService):
+    @health_bp.route("/healthz", methods=["GET"])
+    def healthz():
+        alive, status = health_service.liveness()
+        return jsonify(status), 200 if alive else 503
+
+    @health_bp.route("/readyz", methods=["GET"])
+    def readyz():
+        try:
+            ready, status = health_service.readiness()
+            return jsonify(status), 200 if ready else 503
+        except Exception as e:
+            return jsonify({"ready": False, "error": str(e)}), 503
+
+    return health_bp
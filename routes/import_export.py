@@ -0,0 +1,57 @@
+from datetime import datetime
+import logging
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.import_export_service import ImportExportService, UnsupportedFormatError
+from utils.decorators import handle_errors
+
+import_export_bp = Blueprint('import_export', __name__)
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _flag(name: str) -> bool:
+    return request.args.get(name, "").lower() in ("1", "true", "yes")
+
+
+def create_import_export_routes(import_export_service: ImportExportService, logger: logging.Logger):
+    @import_export_bp.route("/api/inventory/import", methods=["POST"])
+    @handle_errors(logger)
+    def import_inventory():
+        # Antingen multipart med fältet "file" eller filen direkt som body (?format=csv|xlsx)
+        upload = request.files.get("file")
+        filename = upload.filename if upload is not None else ""
+        stream = upload.stream if upload is not None else request.stream
+        try:
+            fmt = import_export_service.detect_format(filename, request.args.get("format"))
+            result = import_export_service.import_file(
+                stream, fmt, dry_run=_flag("dry_run"), skip_invalid=_flag("skip_invalid")
+            )
+        except UnsupportedFormatError as e:
+            return jsonify({"error": str(e)}), 415
+        except (UnicodeDecodeError, ValueError) as e:
+            return jsonify({"error": f"Could not read file: {e}"}), 400
+
+        status_code = 400 if result.invalid and not result.committed and not result.dry_run else 200
+        return jsonify({"import": result.to_dict()}), status_code
+
+    @import_export_bp.route("/api/inventory/export.csv", methods=["GET"])
+    def export_csv():
+        delimiter = ";" if request.args.get("delimiter") == ";" else ","
+        return Response(
+            stream_with_context(import_export_service.export_csv(delimiter)),
+            mimetype="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=lager-{datetime.now():%Y-%m-%d}.csv"}
+        )
+
+    @import_export_bp.route("/api/inventory/export.xlsx", methods=["GET"])
+    def export_xlsx():
+        if not import_export_service.supports_xlsx():
+            return jsonify({"error": "XLSX requires the openpyxl package on the server"}), 415
+        return Response(
+            stream_with_context(import_export_service.export_xlsx()),
+            mimetype=XLSX_MIMETYPE,
+            headers={"Content-Disposition": f"attachment; filename=lager-{datetime.now():%Y-%m-%d}.xlsx"}
+        )
+
+    return import_export_bp
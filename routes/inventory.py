@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from services.inventory_service import InventoryService
 from utils.validation import InventoryItemValidator
 from utils.exceptions import InventoryError, ValidationError
@@ -10,8 +10,34 @@ def create_inventory_routes(inventory_service: InventoryService):
     @inventory_bp.route("/api/inventory", methods=["GET"])
     def get_inventory():
         try:
-            inventory = inventory_service.get_all_items()
-            return jsonify([item.to_dict() for item in inventory])
+            etag, body = inventory_service.get_inventory_json()
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = Response(body, mimetype="application/json")
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @inventory_bp.route("/api/inventory/page", methods=["GET"])
+    def get_page():
+        try:
+            offset = max(0, int(request.args.get("offset", 0)))
+            limit = max(1, min(int(request.args.get("limit", 100)), 500))
+        except ValueError:
+            return jsonify({"error": "offset and limit must be numbers"}), 400
+        try:
+            return jsonify(inventory_service.get_page(offset, limit))
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @inventory_bp.route("/api/inventory/options", methods=["GET"])
+    def get_options():
+        try:
+            return jsonify(inventory_service.get_options(request.args.get("brand", ""),
+                                                         request.args.get("product_family", "")))
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
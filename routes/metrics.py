@@ -0,0 +1,19 @@
+from flask import Blueprint, Response
+from models.inventory import InventoryModel
+from utils.metrics import get_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def create_metrics_routes(inventory_model: InventoryModel):
+    registry = get_metrics()
+    registry.gauge("inventory_items", "Antal objekt i lagret",
+                   callback=lambda: len(inventory_model.snapshot().items))
+    registry.gauge("inventory_data_version", "Aktuell dataversion (ändringsloggens sekvensnummer)",
+                   callback=lambda: inventory_model.version)
+
+    @metrics_bp.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(registry.render(), content_type=registry.CONTENT_TYPE)
+
+    return metrics_bp
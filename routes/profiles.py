@@ -0,0 +1,42 @@
+from flask import Blueprint, Response, abort, jsonify, render_template, request
+from utils.profiler import PROFILE_HEADER, RequestProfiler, format_collapsed
+
+profiles_bp = Blueprint('profiles', __name__)
+
+COLLAPSED_CONTENT_TYPE = "text/plain; charset=utf-8"
+
+
+def create_profile_routes(profiler: RequestProfiler):
+    @profiles_bp.before_request
+    def require_admin():
+        # Utan token är profilerna lika öppna som /admin; med token krävs headern.
+        # Sidan själv innehåller inga data utan hämtar dem med headern.
+        if request.path.startswith("/api/") and profiler.admin_token and not profiler.is_admin():
+            abort(403)
+
+    @profiles_bp.route("/admin/profiles", methods=["GET"])
+    def profiles_page():
+        return render_template("profiles.html", token_required=bool(profiler.admin_token),
+                               token_header=PROFILE_HEADER)
+
+    @profiles_bp.route("/api/profiles", methods=["GET"])
+    def list_profiles():
+        limit = request.args.get("limit", 50, type=int)
+        return jsonify({
+            "status": profiler.status(),
+            "slowest": [profile.to_dict() for profile in profiler.slowest(limit)]
+        })
+
+    @profiles_bp.route("/api/profiles/<profile_id>.collapsed", methods=["GET"])
+    def profile_collapsed(profile_id):
+        profile = profiler.get(profile_id)
+        if profile is None:
+            return jsonify({"error": "Profile not found"}), 404
+        return Response(format_collapsed(profile.stacks), content_type=COLLAPSED_CONTENT_TYPE)
+
+    @profiles_bp.route("/api/profiles/aggregate.collapsed", methods=["GET"])
+    def aggregate_collapsed():
+        return Response(format_collapsed(profiler.aggregate(request.args.get("route"))),
+                        content_type=COLLAPSED_CONTENT_TYPE)
+
+    return profiles_bp
@@ -0,0 +1,40 @@
+from flask import Blueprint, jsonify, request
+from services.replication_service import ReplicationService
+
+replication_bp = Blueprint('replication', __name__)
+
+# Skrivningar som bara primären tar emot
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+WRITE_PREFIXES = ("/api/inventory", "/api/backups/restore")
+
+
+def create_replication_routes(replication_service: ReplicationService):
+    @replication_bp.before_app_request
+    def reject_writes_on_replica():
+        if (replication_service.is_replica and request.method in WRITE_METHODS and
+                request.path.startswith(WRITE_PREFIXES)):
+            return jsonify({
+                "error": "Read-only replica, send writes to the primary",
+                "primary": replication_service.primary_url
+            }), 403
+        return None
+
+    @replication_bp.route("/api/replication/changes", methods=["GET"])
+    def changes():
+        try:
+            since_seq = int(request.args.get("since", 0))
+            limit = max(1, min(int(request.args.get("limit", 1000)), 10000))
+            wait_seconds = max(0.0, float(request.args.get("wait", 0)))
+        except ValueError:
+            return jsonify({"error": "since, limit and wait must be numbers"}), 400
+        return jsonify(replication_service.changes_since(since_seq, limit, wait_seconds))
+
+    @replication_bp.route("/api/replication/snapshot", methods=["GET"])
+    def snapshot():
+        return jsonify(replication_service.snapshot())
+
+    @replication_bp.route("/api/replication/status", methods=["GET"])
+    def status():
+        return jsonify(replication_service.status())
+
+    return replication_bp
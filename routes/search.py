@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify, request
+from services.search_service import SearchService
+
+search_bp = Blueprint('search', __name__)
+
+
+def create_search_routes(search_service: SearchService):
+    @search_bp.route("/api/search", methods=["GET"])
+    def search():
+        query = request.args.get("q", "").strip()
+        if not query:
+            return jsonify({"error": "q is required"}), 400
+        try:
+            limit = max(1, min(int(request.args.get("limit", 20)), 500))
+        except ValueError:
+            return jsonify({"error": "limit must be a number"}), 400
+        return jsonify(search_service.search(query, limit))
+
+    return search_bp
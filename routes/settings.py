@@ -1,19 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import json
 import logging
 from services.settings_service import SettingsService
 from utils.decorators import handle_errors
 
 settings_bp = Blueprint('settings', __name__)
 
+STREAM_HEARTBEAT_SECONDS = 15
 
-def create_settings_routes(settings_file: str, logger: logging.Logger):
-    settings_service = SettingsService(settings_file, logger)
 
+def create_settings_routes(settings_service: SettingsService, logger: logging.Logger):
     @settings_bp.route("/api/settings", methods=["GET"])
     @handle_errors(logger)
     def get_settings():
-        settings = settings_service.get_settings()
-        return jsonify(settings)
+        settings, etag = settings_service.get_settings_with_etag()
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = jsonify(settings)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     @settings_bp.route("/api/settings", methods=["POST"])
     @handle_errors(logger)
@@ -25,4 +32,56 @@ def create_settings_routes(settings_file: str, logger: logging.Logger):
         validated_settings = settings_service.save_settings(new_settings)
         return jsonify({"message": "Settings saved", "settings": validated_settings}), 200
 
-    return settings_bp
\ No newline at end of file
+    @settings_bp.route("/api/settings/profiles", methods=["GET"])
+    @handle_errors(logger)
+    def list_profiles():
+        return jsonify({"profiles": settings_service.list_profiles()})
+
+    @settings_bp.route("/api/settings/profiles/<name>", methods=["GET"])
+    @handle_errors(logger)
+    def get_profile(name):
+        profile = settings_service.get_profile(name)
+        if profile is None:
+            return jsonify({"error": f"Profile '{name}' not found"}), 404
+        return jsonify(profile)
+
+    @settings_bp.route("/api/settings/profiles/<name>", methods=["POST"])
+    @handle_errors(logger)
+    def save_profile(name):
+        new_settings = request.json
+        if not new_settings:
+            return jsonify({"error": "No settings provided"}), 400
+
+        validated_settings = settings_service.save_profile(name, new_settings)
+        return jsonify({"message": "Profile saved", "profile": name, "settings": validated_settings}), 200
+
+    @settings_bp.route("/api/settings/profiles/<name>", methods=["DELETE"])
+    @handle_errors(logger)
+    def delete_profile(name):
+        if not settings_service.delete_profile(name):
+            return jsonify({"error": f"Profile '{name}' not found"}), 404
+        return jsonify({"message": "Profile deleted", "profile": name}), 200
+
+    @settings_bp.route("/api/settings/stream", methods=["GET"])
+    def stream_settings():
+        """Server-Sent Events: skickar aktuella inställningar och sedan varje ändring."""
+        profile = request.args.get("profile")
+
+        def events():
+            version, settings, etag = settings_service.wait_for_change(-1, 0, profile)
+            yield f"id: {etag}\nevent: settings\ndata: {json.dumps(settings, ensure_ascii=False)}\n\n"
+            while True:
+                new_version, settings, etag = settings_service.wait_for_change(version, STREAM_HEARTBEAT_SECONDS, profile)
+                if new_version == version:
+                    # Kommentarsrad håller anslutningen vid liv genom proxyer
+                    yield ": heartbeat\n\n"
+                    continue
+                version = new_version
+                yield f"id: {etag}\nevent: settings\ndata: {json.dumps(settings, ensure_ascii=False)}\n\n"
+
+        response = Response(stream_with_context(events()), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    return settings_bp
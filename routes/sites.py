@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify, request
+from services.federation_service import FederationService
+
+sites_bp = Blueprint('sites', __name__)
+
+
+def create_site_routes(federation_service: FederationService, own_site: str):
+    @sites_bp.route("/api/sites", methods=["GET"])
+    def list_sites():
+        return jsonify({"site": own_site, "sites": federation_service.site_status()})
+
+    @sites_bp.route("/api/sites/stock", methods=["GET"])
+    def where_in_stock():
+        spare_part = request.args.get("spare_part", "").strip()
+        if not spare_part:
+            return jsonify({"error": "spare_part is required"}), 400
+        include_empty = request.args.get("include_empty", "").lower() in ("1", "true", "yes")
+        return jsonify(federation_service.where_in_stock(
+            spare_part, request.args.get("product_family"), include_empty
+        ))
+
+    @sites_bp.route("/api/sites/refresh", methods=["POST"])
+    def refresh_sites():
+        federation_service.refresh()
+        return jsonify({"site": own_site, "sites": federation_service.site_status()})
+
+    return sites_bp
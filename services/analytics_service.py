@@ -0,0 +1,155 @@
+import math
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from models.change_log import ChangeLog
+from models.inventory import InventoryModel, InventoryItem
+
+SECONDS_PER_DAY = 86400
+
+
+@dataclass
+class ConsumptionForecast:
+    item_id: int
+    quantity: int
+    consumed_short_window: int
+    consumed_long_window: int
+    daily_rate: float
+    days_until_empty: Optional[float]
+    suggested_low_status: Optional[int]
+    suggested_high_status: Optional[int]
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.item_id,
+            'quantity': self.quantity,
+            'consumed_short_window': self.consumed_short_window,
+            'consumed_long_window': self.consumed_long_window,
+            'daily_rate': round(self.daily_rate, 3),
+            'days_until_empty': round(self.days_until_empty, 1) if self.days_until_empty is not None else None,
+            'suggested_low_status': self.suggested_low_status,
+            'suggested_high_status': self.suggested_high_status
+        }
+
+
+class AnalyticsService:
+    """
+    Beräknar förbrukningstakt per artikel ur ändringsloggen.
+
+    Förbrukning (negativa delta) summeras i dagshinkar per artikel. Loggen
+    läses inkrementellt från senaste offset, så en omräkning kostar bara de
+    nya posterna plus en summering över fönstrets hinkar.
+    """
+
+    def __init__(self, inventory_model: InventoryModel, change_log: ChangeLog, logger: logging.Logger,
+                 window_days: int = 28, short_window_days: int = 7,
+                 lead_time_days: int = 7, cover_days: int = 14):
+        self.inventory_model = inventory_model
+        self.change_log = change_log
+        self.logger = logger
+        self.window_days = window_days
+        self.short_window_days = min(short_window_days, window_days)
+        self.lead_time_days = lead_time_days
+        self.cover_days = cover_days
+
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._generation = change_log.generation
+        self._buckets: Dict[int, Dict[int, int]] = {}
+        self._forecasts: Dict[int, ConsumptionForecast] = {}
+        self.computed_at: Optional[float] = None
+
+    def _ingest(self, now: float) -> int:
+        if self.change_log.generation != self._generation or self.change_log.size() < self._offset:
+            # Loggen har komprimerats - bygg om hinkarna från början
+            self._buckets = {}
+            self._offset = 0
+            self._generation = self.change_log.generation
+        entries, self._offset = self.change_log.read_from_offset(self._offset)
+
+        oldest_day = int(now // SECONDS_PER_DAY) - self.window_days
+        for entry in entries:
+            delta = entry.get('delta', 0)
+            if entry.get('op') != 'update' or delta >= 0:
+                continue
+            day = int(entry.get('ts', 0) // SECONDS_PER_DAY)
+            if day <= oldest_day:
+                continue
+            item_id = entry.get('item', {}).get('id')
+            if item_id is None:
+                continue
+            item_buckets = self._buckets.setdefault(item_id, {})
+            item_buckets[day] = item_buckets.get(day, 0) - delta
+
+        for item_id in list(self._buckets):
+            item_buckets = self._buckets[item_id]
+            for day in [d for d in item_buckets if d <= oldest_day]:
+                del item_buckets[day]
+            if not item_buckets:
+                del self._buckets[item_id]
+
+        return len(entries)
+
+    def _forecast_item(self, item: InventoryItem, today: int) -> ConsumptionForecast:
+        item_buckets = self._buckets.get(item.id, {})
+        short_start = today - self.short_window_days
+        consumed_long = sum(item_buckets.values())
+        consumed_short = sum(units for day, units in item_buckets.items() if day > short_start)
+
+        # Väg ihop kort och långt fönster så att trendbrott slår igenom snabbt
+        daily_rate = (0.5 * consumed_short / self.short_window_days +
+                      0.5 * consumed_long / self.window_days)
+
+        if daily_rate > 0:
+            days_until_empty = item.quantity / daily_rate
+            suggested_low = math.ceil(daily_rate * self.lead_time_days)
+            suggested_high = max(suggested_low + 1,
+                                 math.ceil(daily_rate * (self.lead_time_days + self.cover_days)))
+        else:
+            days_until_empty = None
+            suggested_low = None
+            suggested_high = None
+
+        return ConsumptionForecast(
+            item_id=item.id,
+            quantity=item.quantity,
+            consumed_short_window=consumed_short,
+            consumed_long_window=consumed_long,
+            daily_rate=daily_rate,
+            days_until_empty=days_until_empty,
+            suggested_low_status=suggested_low,
+            suggested_high_status=suggested_high
+        )
+
+    def recompute(self) -> int:
+        started = time.perf_counter()
+        now = time.time()
+        today = int(now // SECONDS_PER_DAY)
+
+        with self._lock:
+            new_entries = self._ingest(now)
+            forecasts = {
+                item.id: self._forecast_item(item, today)
+                for item in self.inventory_model.get_all()
+            }
+            self._forecasts = forecasts
+            self.computed_at = now
+
+        self.logger.info(
+            f"Förbrukningsanalys uppdaterad: {len(forecasts)} artiklar, "
+            f"{new_entries} nya händelser, {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return len(forecasts)
+
+    def get_forecasts(self) -> List[ConsumptionForecast]:
+        if self.computed_at is None:
+            self.recompute()
+        return list(self._forecasts.values())
+
+    def get_forecast(self, item_id: int) -> Optional[ConsumptionForecast]:
+        if self.computed_at is None:
+            self.recompute()
+        return self._forecasts.get(item_id)
@@ -1,15 +1,115 @@
 import os
+import json
+import time
 import shutil
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from models.change_log import ChangeLog, apply_entry
+from models.inventory import InventoryModel, InventorySnapshot
+from utils.content_store import ContentStore
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+@dataclass
+class BackupVerification:
+    name: str
+    ok: bool
+    rows: Optional[int]
+    error: Optional[str]
+    duration_ms: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "ok": self.ok,
+            "rows": self.rows,
+            "error": self.error,
+            "duration_ms": round(self.duration_ms, 1)
+        }
+
+
+@dataclass
+class RestorePlan:
+    target_ts: float
+    base_backup: Optional[str]
+    base_version: int
+    replayed: int
+    data_version: int
+    exact: bool
+    items: List[Dict[str, Any]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "target": datetime.fromtimestamp(self.target_ts).isoformat(),
+            "base_backup": self.base_backup,
+            "base_version": self.base_version,
+            "replayed_changes": self.replayed,
+            "data_version": self.data_version,
+            "exact": self.exact,
+            "rows": len(self.items)
+        }
 
 
 class BackupService:
-    def __init__(self, data_dir: str, backup_dir: str, logger: logging.Logger):
+    def __init__(self, data_dir: str, backup_dir: str, logger: logging.Logger,
+                 snapshot_provider: Optional[Callable[[], InventorySnapshot]] = None,
+                 change_log: Optional[ChangeLog] = None, change_log_retention_days: int = 35):
         self.data_dir = data_dir
         self.backup_dir = backup_dir
         self.logger = logger
+        self.store = ContentStore(backup_dir)
+        self.snapshot_provider = snapshot_provider
+        self.change_log = change_log
+        self.change_log_retention_days = change_log_retention_days
+        self.last_backup_at: Optional[float] = None
+        self.last_verification: Optional[Dict[str, Any]] = None
+
+    def _store_database(self) -> Optional[Dict[str, Any]]:
+        """
+        Lagrar databasen i objektlagret.
+
+        I appen tas en ögonblicksbild från modellens minnesversion så att
+        backupen aldrig ser en halvskriven fil och inga skrivare blockeras.
+        Utan snapshot_provider (t.ex. i updater-processen) läses filen.
+        """
+        if self.snapshot_provider is not None:
+            snapshot = self.snapshot_provider()
+            payload = json.dumps(snapshot.items, indent=4, ensure_ascii=False).encode('utf-8')
+            entry = self.store.put_bytes(payload)
+            entry["data_version"] = snapshot.version
+            entry["rows"] = len(snapshot.items)
+            return entry
+
+        data_file = os.path.join(self.data_dir, "inventory.json")
+        if not os.path.exists(data_file):
+            return self._store_partitions()
+        entry = self.store.put_file(data_file)
+        try:
+            entry["rows"] = len(json.loads(self.store.read_bytes(entry)))
+        except ValueError:
+            pass
+        return entry
+
+    def _store_partitions(self) -> Optional[Dict[str, Any]]:
+        """Partitionerat lager (en fil per Brand) lagras sammanslaget, i samma format som inventory.json."""
+        partitions_dir = os.path.join(self.data_dir, "partitions")
+        if not os.path.isdir(partitions_dir):
+            return None
+
+        items: List[Dict[str, Any]] = []
+        for name in sorted(os.listdir(partitions_dir)):
+            if name.endswith(".json"):
+                with open(os.path.join(partitions_dir, name), 'r', encoding='utf-8') as f:
+                    items.extend(json.load(f))
+        entry = self.store.put_bytes(json.dumps(items, indent=4, ensure_ascii=False).encode('utf-8'))
+        entry["rows"] = len(items)
+        return entry
 
     def backup_database(self, max_backups: int = 5) -> bool:
         from utils.exceptions import BackupError
@@ -23,16 +123,20 @@ class BackupService:
             if not os.path.exists(self.backup_dir):
                 os.makedirs(self.backup_dir)
 
+            self._migrate_legacy_backups()
+
             timestamp = now.strftime("%Y-%m-%d-%H%M")
-            backup_filename = f"inventory-{timestamp}.json"
-            backup_path = os.path.join(self.backup_dir, backup_filename)
+            backup_name = f"inventory-{timestamp}"
 
-            data_file = os.path.join(self.data_dir, "inventory.json")
-            if os.path.exists(data_file):
-                shutil.copy(data_file, backup_path)
-                self.logger.info(f"Skapade backup: {backup_filename}")
+            entry = self._store_database()
+            if entry is not None:
+                files = {"inventory.json": entry}
+                self._write_manifest(self.backup_dir, backup_name, "database", files)
+                self.last_backup_at = time.time()
+                self.logger.info(f"Skapade backup: {backup_name}")
 
                 self._cleanup_old_backups("inventory-", max_backups)
+                self.compact_change_log()
                 return True
             else:
                 self.logger.warning("Ingen databas att backup:a")
@@ -50,13 +154,13 @@ class BackupService:
                 os.makedirs(self.backup_dir)
 
             timestamp = datetime.now().strftime("%Y-%m-%d-%H%M")
-            backup_filename = f"inventory-update-{timestamp}.json"
-            backup_path = os.path.join(self.backup_dir, backup_filename)
+            backup_name = f"inventory-update-{timestamp}"
 
-            data_file = os.path.join(self.data_dir, "inventory.json")
-            if os.path.exists(data_file):
-                shutil.copy(data_file, backup_path)
-                self.logger.info(f"Databas backup skapad: {backup_filename}")
+            entry = self._store_database()
+            if entry is not None:
+                files = {"inventory.json": entry}
+                self._write_manifest(self.backup_dir, backup_name, "update", files)
+                self.logger.info(f"Databas backup skapad: {backup_name}")
                 return True
             else:
                 self.logger.warning("Ingen databas att backup:a")
@@ -72,40 +176,317 @@ class BackupService:
                 os.makedirs(version_backup_dir)
                 self.logger.info(f"Skapade backup-mapp: {version_backup_dir}")
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = os.path.join(version_backup_dir, f"version_{timestamp}")
-
-            os.makedirs(backup_path)
+            store = ContentStore(version_backup_dir)
+            previous = self._latest_manifest(version_backup_dir, "version_")
+            previous_files = previous["files"] if previous else {}
 
+            files: Dict[str, Dict[str, Any]] = {}
+            reused = 0
             for item in files_to_backup:
-                if os.path.exists(item):
-                    dest = os.path.join(backup_path, item)
-                    if os.path.isdir(item):
-                        shutil.copytree(item, dest)
-                        self.logger.info(f"Backupade mapp: {item}")
-                    else:
-                        if not os.path.exists(os.path.dirname(dest)):
-                            os.makedirs(os.path.dirname(dest))
-                        shutil.copy2(item, dest)
-                        self.logger.info(f"Backupade fil: {item}")
-                else:
+                if not os.path.exists(item):
                     self.logger.warning(f"Kunde inte hitta: {item}")
+                    continue
+
+                for file_path in self._walk_files(item):
+                    rel_path = os.path.normpath(file_path).replace(os.sep, "/")
+                    stat = os.stat(file_path)
+                    old_entry = previous_files.get(rel_path)
+                    if (old_entry and old_entry.get("size") == stat.st_size and
+                            old_entry.get("mtime_ns") == stat.st_mtime_ns and
+                            all(store.has(digest) for digest in old_entry["chunks"])):
+                        files[rel_path] = old_entry
+                        reused += 1
+                        continue
+
+                    entry = store.put_file(file_path)
+                    entry["mtime_ns"] = stat.st_mtime_ns
+                    files[rel_path] = entry
 
+                self.logger.info(f"Backupade: {item}")
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            manifest_path = self._write_manifest(version_backup_dir, f"version_{timestamp}", "version", files)
+
+            self._migrate_legacy_version_backups(version_backup_dir, store)
             self._cleanup_old_version_backups(version_backup_dir, max_backups=3)
 
-            self.logger.info(f"Version backup skapad: {backup_path}")
-            return backup_path
+            self.logger.info(
+                f"Version backup skapad: {manifest_path} "
+                f"({len(files)} filer, {reused} oförändrade återanvända)"
+            )
+            return manifest_path
 
         except Exception as e:
             self.logger.error(f"Fel vid skapande av version backup: {e}")
             return None
 
-    def _cleanup_old_backups(self, prefix: str, max_backups: int) -> None:
+    def latest_backup_time(self) -> Optional[float]:
+        if self.last_backup_at is None:
+            manifests = self._load_database_manifests()
+            if manifests:
+                self.last_backup_at = manifests[-1].get("created_ts")
+        return self.last_backup_at
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        backups = []
+        for manifest in self._load_database_manifests():
+            entry = manifest["files"].get("inventory.json", {})
+            backups.append({
+                "name": manifest["name"],
+                "kind": manifest.get("kind"),
+                "created": manifest.get("created"),
+                "rows": entry.get("rows"),
+                "data_version": entry.get("data_version"),
+                "size": entry.get("size")
+            })
+        return backups
+
+    def verify_backup(self, name: str) -> BackupVerification:
+        started = time.perf_counter()
+        rows = None
         try:
-            backup_files = [
+            manifest = self._load_manifest(os.path.join(self.backup_dir, f"{name}{MANIFEST_SUFFIX}"))
+            for file_name, entry in manifest["files"].items():
+                data = self.store.read_bytes(entry)
+                if len(data) != entry["size"] or hashlib.sha256(data).hexdigest() != entry["sha256"]:
+                    raise ValueError(f"checksumma stämmer inte för {file_name}")
+                if file_name.endswith(".json"):
+                    parsed = json.loads(data)
+                    if not isinstance(parsed, list):
+                        raise ValueError(f"{file_name} innehåller ingen lista")
+                    rows = len(parsed)
+                    if entry.get("rows") is not None and entry["rows"] != rows:
+                        raise ValueError(f"{file_name} har {rows} rader, manifestet anger {entry['rows']}")
+            return BackupVerification(name, True, rows, None, (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            return BackupVerification(name, False, rows, str(e), (time.perf_counter() - started) * 1000)
+
+    def verify_backups(self, max_workers: int = 4) -> List[BackupVerification]:
+        names = [manifest[:-len(MANIFEST_SUFFIX)] for manifest in self._list_manifests(self.backup_dir, "inventory-")]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self.verify_backup, names))
+
+        failed = [result for result in results if not result.ok]
+        self.last_verification = {
+            "verified_at": time.time(),
+            "ok": not failed,
+            "results": [result.to_dict() for result in results]
+        }
+        if failed:
+            for result in failed:
+                self.logger.error(f"Backup-verifiering misslyckades: {result.name} - {result.error}")
+        else:
+            self.logger.info(f"Backup-verifiering OK: {len(results)} backuper kontrollerade")
+        return results
+
+    def build_state_at(self, target_ts: float) -> RestorePlan:
+        """
+        Bygger lagrets tillstånd vid en given tidpunkt.
+
+        Utgår från senaste backup med känd dataversion före tidpunkten och
+        spelar upp ändringsloggen fram till tidpunkten. Finns ingen sådan
+        backup spelas loggen upp från början, men bara om den börjar med
+        lagrets fullständiga utgångsläge; annars används närmaste äldre backup
+        som den är (inte exakt).
+        """
+        from utils.exceptions import BackupError
+
+        candidates = [m for m in self._load_database_manifests() if m.get("created_ts", 0) <= target_ts]
+        versioned = [m for m in candidates if "data_version" in m["files"].get("inventory.json", {})]
+
+        first_seq = self.change_log.first_seq() if self.change_log else None
+        if self.change_log is not None and versioned:
+            base = versioned[-1]
+            entry = base["files"]["inventory.json"]
+            items = json.loads(self.store.read_bytes(entry))
+            base_name, base_version = base["name"], entry["data_version"]
+        elif self.change_log is not None and self._log_starts_with_baseline():
+            items, base_name, base_version = [], None, 0
+        elif candidates:
+            base = candidates[-1]
+            items = json.loads(self.store.read_bytes(base["files"]["inventory.json"]))
+            self.logger.warning(f"Ingen ändringshistorik att spela upp, återställer {base['name']} som den är")
+            return RestorePlan(target_ts, base["name"], 0, 0, 0, False, items)
+        else:
+            raise BackupError(
+                "restore", "Ingen backup före angiven tidpunkt och ändringsloggen börjar inte från ett känt tillstånd"
+            )
+
+        if first_seq is not None and first_seq > base_version + 1:
+            raise BackupError("restore", f"Ändringsloggen saknar poster mellan {base_version} och {first_seq}")
+
+        state = {item["id"]: item for item in items}
+        replayed = 0
+        data_version = base_version
+        for change in self.change_log.iter_entries(base_version):
+            if change.get("ts", 0) > target_ts:
+                break
+            apply_entry(state, change)
+            replayed += 1
+            data_version = change["seq"]
+
+        return RestorePlan(target_ts, base_name, base_version, replayed, data_version, True, list(state.values()))
+
+    def _log_starts_with_baseline(self) -> bool:
+        """Loggen börjar på seq 1 med hela lagret (restore), så uppspelning från tomt lager är exakt."""
+        for entry in self.change_log.iter_entries():
+            return entry.get('seq') == 1 and entry.get('op') == 'restore'
+        return False
+
+    def restore_to(self, target_ts: float, inventory_model: InventoryModel, dry_run: bool = False) -> RestorePlan:
+        from utils.exceptions import BackupError
+
+        plan = self.build_state_at(target_ts)
+        if dry_run:
+            return plan
+
+        try:
+            safety_entry = self._store_database()
+            if safety_entry is not None:
+                timestamp = datetime.now().strftime("%Y-%m-%d-%H%M%S")
+                self._write_manifest(self.backup_dir, f"inventory-prerestore-{timestamp}", "prerestore",
+                                     {"inventory.json": safety_entry})
+            inventory_model.replace_all(plan.items)
+        except Exception as e:
+            self.logger.error(f"Fel vid återställning: {e}")
+            raise BackupError("restore", str(e))
+
+        self.logger.info(
+            f"Lager återställt till {datetime.fromtimestamp(target_ts).isoformat()}: "
+            f"bas={plan.base_backup}, {plan.replayed} ändringar uppspelade, {len(plan.items)} objekt"
+        )
+        return plan
+
+    def compact_change_log(self) -> int:
+        """Rensar ändringsloggen från poster som varken behövs för återställning eller analys."""
+        if self.change_log is None:
+            return 0
+
+        versions = [
+            m["files"]["inventory.json"]["data_version"]
+            for m in self._load_database_manifests()
+            if "data_version" in m["files"].get("inventory.json", {})
+        ]
+        if not versions:
+            return 0
+
+        cutoff = time.time() - self.change_log_retention_days * 86400
+        removed = self.change_log.compact(min(versions), cutoff)
+        if removed:
+            self.logger.info(f"Ändringsloggen komprimerad: {removed} poster borttagna")
+        return removed
+
+    def _load_database_manifests(self) -> List[Dict[str, Any]]:
+        manifests = []
+        for name in self._list_manifests(self.backup_dir, "inventory-"):
+            try:
+                manifests.append(self._load_manifest(os.path.join(self.backup_dir, name)))
+            except (OSError, ValueError):
+                self.logger.warning(f"Kunde inte läsa backup-manifest: {name}")
+        manifests.sort(key=lambda m: m.get("created_ts", 0))
+        return manifests
+
+    def _walk_files(self, path: str) -> List[str]:
+        if not os.path.isdir(path):
+            return [path]
+
+        result = []
+        for root, dirs, filenames in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for filename in sorted(filenames):
+                result.append(os.path.join(root, filename))
+        return result
+
+    def _write_manifest(self, directory: str, name: str, kind: str, files: Dict[str, Dict[str, Any]],
+                        created: Optional[datetime] = None) -> str:
+        now = created or datetime.now()
+        manifest = {
+            "name": name,
+            "kind": kind,
+            "created": now.isoformat(),
+            "created_ts": now.timestamp(),
+            "files": files
+        }
+        manifest_path = os.path.join(directory, f"{name}{MANIFEST_SUFFIX}")
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, manifest_path)
+        return manifest_path
+
+    def _load_manifest(self, manifest_path: str) -> Dict[str, Any]:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _list_manifests(self, directory: str, prefix: str) -> List[str]:
+        if not os.path.exists(directory):
+            return []
+        return sorted(
+            f for f in os.listdir(directory)
+            if f.startswith(prefix) and f.endswith(MANIFEST_SUFFIX)
+        )
+
+    def _latest_manifest(self, directory: str, prefix: str) -> Optional[Dict[str, Any]]:
+        manifests = self._list_manifests(directory, prefix)
+        if not manifests:
+            return None
+        try:
+            return self._load_manifest(os.path.join(directory, manifests[-1]))
+        except (OSError, ValueError):
+            return None
+
+    def _referenced_chunks(self, directory: str) -> Set[str]:
+        referenced: Set[str] = set()
+        for name in self._list_manifests(directory, ""):
+            try:
+                manifest = self._load_manifest(os.path.join(directory, name))
+            except (OSError, ValueError):
+                continue
+            for entry in manifest.get("files", {}).values():
+                referenced.update(entry.get("chunks", []))
+        return referenced
+
+    def _migrate_legacy_backups(self) -> None:
+        """Flyttar äldre fullständiga json-kopior in i objektlagret."""
+        try:
+            legacy_files = [
                 f for f in os.listdir(self.backup_dir)
-                if f.startswith(prefix) and f.endswith(".json")
+                if f.startswith("inventory-") and f.endswith(".json") and not f.endswith(MANIFEST_SUFFIX)
+            ]
+            for legacy_file in legacy_files:
+                legacy_path = os.path.join(self.backup_dir, legacy_file)
+                name = legacy_file[:-len(".json")]
+                kind = "update" if name.startswith("inventory-update-") else "database"
+                files = {"inventory.json": self.store.put_file(legacy_path)}
+                created = datetime.fromtimestamp(os.path.getmtime(legacy_path))
+                self._write_manifest(self.backup_dir, name, kind, files, created)
+                os.remove(legacy_path)
+                self.logger.info(f"Komprimerade äldre backup: {legacy_file}")
+        except Exception as e:
+            self.logger.error(f"Fel vid migrering av äldre backuper: {e}")
+
+    def _migrate_legacy_version_backups(self, version_backup_dir: str, store: ContentStore) -> None:
+        """Ersätter äldre kopierade versionsmappar med manifest i objektlagret."""
+        try:
+            legacy_backups = [
+                d for d in os.listdir(version_backup_dir)
+                if d.startswith("version_") and os.path.isdir(os.path.join(version_backup_dir, d))
             ]
+            for legacy_backup in legacy_backups:
+                legacy_path = os.path.join(version_backup_dir, legacy_backup)
+                files = {}
+                for file_path in self._walk_files(legacy_path):
+                    rel_path = os.path.relpath(file_path, legacy_path).replace(os.sep, "/")
+                    files[rel_path] = store.put_file(file_path)
+                self._write_manifest(version_backup_dir, legacy_backup, "version", files)
+                shutil.rmtree(legacy_path)
+                self.logger.info(f"Komprimerade äldre version backup: {legacy_backup}")
+        except Exception as e:
+            self.logger.error(f"Fel vid migrering av äldre version backuper: {e}")
+
+    def _cleanup_old_backups(self, prefix: str, max_backups: int) -> None:
+        try:
+            backup_files = self._list_manifests(self.backup_dir, prefix)
 
             if len(backup_files) > max_backups:
                 backup_files.sort(key=lambda x: os.path.getctime(
@@ -116,22 +497,23 @@ class BackupService:
                     os.remove(old_path)
                     self.logger.info(f"Tog bort gammal backup: {old_backup}")
 
+                removed = self.store.collect_garbage(self._referenced_chunks(self.backup_dir))
+                self.logger.info(f"Rensade {removed} oanvända backup-objekt")
+
         except Exception as e:
             self.logger.error(f"Fel vid cleanup av backuper: {e}")
 
     def _cleanup_old_version_backups(self, version_backup_dir: str, max_backups: int) -> None:
         try:
-            backups = [
-                d for d in os.listdir(version_backup_dir)
-                if d.startswith("version_") and os.path.isdir(os.path.join(version_backup_dir, d))
-            ]
-
-            backups.sort()
+            backups = self._list_manifests(version_backup_dir, "version_")
             if len(backups) > max_backups:
                 for old_backup in backups[:-max_backups]:
-                    old_path = os.path.join(version_backup_dir, old_backup)
-                    shutil.rmtree(old_path)
+                    os.remove(os.path.join(version_backup_dir, old_backup))
                     self.logger.info(f"Tog bort gammal backup: {old_backup}")
 
+                store = ContentStore(version_backup_dir)
+                removed = store.collect_garbage(self._referenced_chunks(version_backup_dir))
+                self.logger.info(f"Rensade {removed} oanvända version-objekt")
+
         except Exception as e:
-            self.logger.error(f"Fel vid cleanup av version backuper: {e}")
\ No newline at end of file
+            self.logger.error(f"Fel vid cleanup av version backuper: {e}")
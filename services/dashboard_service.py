@@ -0,0 +1,102 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.inventory import InventoryModel, InventoryItem
+from services.settings_service import SettingsService
+
+
+def parse_brand_list(value: str) -> List[str]:
+    return [brand.strip() for brand in (value or "").split(',') if brand.strip()]
+
+
+def item_status(item: Dict[str, Any]) -> str:
+    if item['quantity'] <= item['low_status']:
+        return 'low'
+    if item['quantity'] >= item['high_status']:
+        return 'high'
+    return 'mid'
+
+
+class DashboardService:
+    """
+    Bygger färdiggrupperade dashboard-svar per profil.
+
+    Lagret grupperas Brand → product_family och sorteras enligt profilens
+    brandPriority på servern. Resultatet cachas per (profil, dataversion,
+    inställnings-ETag), så varje ändring grupperas en gång oavsett hur
+    många skärmar som visar profilen.
+    """
+
+    MAX_CACHED_PAYLOADS = 64
+
+    def __init__(self, inventory_model: InventoryModel, settings_service: SettingsService, logger: logging.Logger):
+        self.inventory_model = inventory_model
+        self.settings_service = settings_service
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, int, str], Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def order_brands(brand_names: List[str], priority: str) -> List[str]:
+        priority_list = [brand.lower() for brand in parse_brand_list(priority)]
+        if not priority_list:
+            return brand_names
+
+        prioritized = [name for name in brand_names if name.lower() in priority_list]
+        prioritized.sort(key=lambda name: priority_list.index(name.lower()))
+        return prioritized + [name for name in brand_names if name.lower() not in priority_list]
+
+    def _build(self, profile: str, settings: Dict[str, Any], version: int,
+               items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        brand_filter = {brand.lower() for brand in parse_brand_list(settings.get("brandFilter", ""))}
+
+        # Grupperna behåller den ordning de först förekommer i lagret, som i dashboard.js
+        brands: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for raw_item in items:
+            item = InventoryItem.from_dict(raw_item).to_dict()
+            brand = item['Brand'] or 'Okänd'
+            if brand_filter and brand.lower() not in brand_filter:
+                continue
+            families = brands.setdefault(brand, {})
+            families.setdefault(item['product_family'], []).append(dict(item, status=item_status(item)))
+
+        return {
+            "profile": profile,
+            "version": version,
+            "settings": settings,
+            "brands": [
+                {
+                    "name": brand,
+                    "families": [
+                        {"name": family, "items": family_items}
+                        for family, family_items in brands[brand].items()
+                    ]
+                }
+                for brand in self.order_brands(list(brands), settings.get("brandPriority", ""))
+            ]
+        }
+
+    def get_payload(self, profile: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Returnerar (payload, etag) för profilen, eller None om profilen saknas."""
+        settings = self.settings_service.get_profile(profile)
+        if settings is None:
+            return None
+        _, settings_etag = self.settings_service.get_settings_with_etag()
+        snapshot = self.inventory_model.snapshot()
+
+        key = (profile, snapshot.version, settings_etag)
+        etag = f"{profile}-{snapshot.version}-{settings_etag[:12]}"
+        with self._lock:
+            payload = self._cache.get(key)
+            if payload is not None:
+                self._cache.move_to_end(key)
+                return payload, etag
+
+        payload = self._build(profile, settings, snapshot.version, snapshot.items)
+        with self._lock:
+            self._cache[key] = payload
+            while len(self._cache) > self.MAX_CACHED_PAYLOADS:
+                self._cache.popitem(last=False)
+        return payload, etag
@@ -0,0 +1,235 @@
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.change_log import ChangeLog
+from models.inventory import InventoryModel
+from services.dashboard_service import item_status
+
+
+def normalize(text: str) -> str:
+    """Skiftläge, bindestreck och mellanslag ska inte avgöra om två reservdelar är samma."""
+    return re.sub(r"[\s\-_/]+", " ", (text or "").strip().lower())
+
+
+class LocalSite:
+    """Ett lager i en katalog på samma maskin (eller den egna instansens modell)."""
+
+    def __init__(self, name: str, inventory_model: InventoryModel):
+        self.name = name
+        self.location = inventory_model.data_file
+        self.inventory_model = inventory_model
+
+    @classmethod
+    def from_directory(cls, name: str, directory: str, cache_ttl: float) -> "LocalSite":
+        data_file = os.path.join(directory, "inventory.json")
+        partitioned = not os.path.exists(data_file) and os.path.isdir(os.path.join(directory, "partitions"))
+        model = InventoryModel(
+            data_file, cache_ttl, ChangeLog(os.path.join(directory, "inventory_changes.jsonl")),
+            partition_by="brand" if partitioned else "none"
+        )
+        return cls(name, model)
+
+    def fetch(self, token: Any) -> Tuple[Any, Optional[List[Dict[str, Any]]]]:
+        # Samma publicerade lista = oförändrat lager; ingen omindexering
+        items = self.inventory_model.snapshot().items
+        return items, (None if items is token else items)
+
+
+class RemoteSite:
+    """Ett lager på en annan instans, läst via dess /api/inventory med ETag."""
+
+    def __init__(self, name: str, base_url: str, timeout: float):
+        self.name = name
+        self.location = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def fetch(self, token: Any) -> Tuple[Any, Optional[List[Dict[str, Any]]]]:
+        headers = {"Accept-Encoding": "gzip"}
+        if token:
+            headers["If-None-Match"] = token
+        request = urllib.request.Request(f"{self.location}/api/inventory", headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                if response.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                return response.headers.get("ETag"), json.loads(body)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return token, None
+            raise
+
+
+@dataclass
+class SiteState:
+    token: Any = None
+    keys: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    items: int = 0
+    quantity: int = 0
+    refreshed_at: Optional[float] = None
+    refresh_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class FederationService:
+    """
+    Gemensam läsvy över flera lagers bestånd.
+
+    Alla lager läses parallellt (lokala kataloger direkt, andra instanser via
+    HTTP med ETag, så ett oförändrat lager kostar en 304). Varje lager bidrar
+    till ett gemensamt index reservdel → lager → objekt. När ett lager ändrats
+    byts bara dess bidrag ut, så en fråga är ett uppslag i indexet oavsett antal
+    lager och katalogstorlek. Ett lager som inte svarar behåller senaste data
+    och markeras med felet.
+    """
+
+    def __init__(self, sites: List[Any], logger: logging.Logger, max_workers: int = 8,
+                 max_age_seconds: float = 30.0):
+        self.sites = {site.name: site for site in sites}
+        self.logger = logger
+        self.max_age_seconds = max_age_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sites))),
+                                            thread_name_prefix="federation")
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._states: Dict[str, SiteState] = {name: SiteState() for name in self.sites}
+        self._site_locks = {name: threading.Lock() for name in self.sites}
+        # normaliserad reservdel → lager → objekt
+        self._index: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self.refreshed_at: Optional[float] = None
+
+    def _index_items(self, items: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        keys: Dict[str, List[Dict[str, Any]]] = {}
+        for item in items:
+            keys.setdefault(normalize(item.get('spare_part', '')), []).append(item)
+        return keys
+
+    def _apply(self, name: str, keys: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Byter ut ett lagers bidrag i indexet; anroparen håller låset."""
+        for key in self._states[name].keys:
+            sites = self._index.get(key)
+            if sites is not None:
+                sites.pop(name, None)
+                if not sites:
+                    del self._index[key]
+        for key, items in keys.items():
+            self._index.setdefault(key, {})[name] = items
+
+    def _refresh_site(self, name: str) -> None:
+        # Ett lager i taget per lager, så en äldre läsning aldrig skriver över en nyare
+        with self._site_locks[name]:
+            self._refresh_site_locked(name)
+
+    def _refresh_site_locked(self, name: str) -> None:
+        site, state = self.sites[name], self._states[name]
+        started = time.perf_counter()
+        try:
+            token, items = site.fetch(state.token)
+        except Exception as e:
+            with self._lock:
+                state.error = str(e)
+            self.logger.warning(f"Lager {name} ({site.location}) kunde inte läsas: {e}")
+            return
+
+        keys = self._index_items(items) if items is not None else None
+        with self._lock:
+            if keys is not None:
+                self._apply(name, keys)
+                state.keys = keys
+                state.items = len(items)
+                state.quantity = sum(int(item.get('quantity', 0)) for item in items)
+            state.token = token
+            state.error = None
+            state.refreshed_at = time.time()
+            state.refresh_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def refresh(self) -> None:
+        """Läser alla lager parallellt; en pågående uppdatering delas av samtidiga anrop."""
+        if not self._refresh_lock.acquire(blocking=False):
+            with self._refresh_lock:
+                return
+        try:
+            list(self._executor.map(self._refresh_site, list(self.sites)))
+            self.refreshed_at = time.time()
+        finally:
+            self._refresh_lock.release()
+
+    def _ensure_fresh(self) -> None:
+        if self.refreshed_at is None or time.time() - self.refreshed_at > self.max_age_seconds:
+            self.refresh()
+            return
+        # Lokala lager kostar bara en identitetsjämförelse när de är oförändrade
+        for name, site in self.sites.items():
+            if isinstance(site, LocalSite):
+                self._refresh_site(name)
+
+    def where_in_stock(self, spare_part: str, product_family: Optional[str] = None,
+                       include_empty: bool = False) -> Dict[str, Any]:
+        self._ensure_fresh()
+        family = normalize(product_family) if product_family else None
+        with self._lock:
+            sites = dict(self._index.get(normalize(spare_part), {}))
+            states = {name: (state.refreshed_at, state.error) for name, state in self._states.items()}
+
+        results = []
+        for name, items in sites.items():
+            for item in items:
+                if family is not None and normalize(item.get('product_family', '')) != family:
+                    continue
+                if not include_empty and int(item.get('quantity', 0)) <= 0:
+                    continue
+                refreshed_at, error = states[name]
+                results.append({
+                    "site": name,
+                    "item": item,
+                    "status": item_status(item),
+                    "refreshed_at": refreshed_at,
+                    "stale": error is not None
+                })
+        results.sort(key=lambda result: int(result["item"].get('quantity', 0)), reverse=True)
+        return {
+            "spare_part": spare_part,
+            "product_family": product_family,
+            "total_quantity": sum(int(result["item"].get('quantity', 0)) for result in results),
+            "sites": results
+        }
+
+    def site_status(self) -> List[Dict[str, Any]]:
+        self._ensure_fresh()
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "location": self.sites[name].location,
+                    "items": state.items,
+                    "quantity": state.quantity,
+                    "refreshed_at": state.refreshed_at,
+                    "refresh_ms": state.refresh_ms,
+                    "error": state.error
+                }
+                for name, state in sorted(self._states.items())
+            ]
+
+
+def build_sites(own_name: str, own_model: InventoryModel, configured: Dict[str, str],
+                cache_ttl: float, timeout: float) -> List[Any]:
+    """Egna lagret plus konfigurerade lager: http(s)-URL = annan instans, annars en datakatalog."""
+    sites: List[Any] = [LocalSite(own_name, own_model)]
+    for name, location in sorted(configured.items()):
+        if name == own_name:
+            continue
+        if location.startswith(("http://", "https://")):
+            sites.append(RemoteSite(name, location, timeout))
+        else:
+            sites.append(LocalSite.from_directory(name, location, cache_ttl))
+    return sites
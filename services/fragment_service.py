@@ -0,0 +1,134 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import get_template_attribute
+
+from models.inventory import InventoryModel, InventoryItem
+from services.dashboard_service import DashboardService, item_status
+from services.inventory_service import InventoryService
+from services.search_service import SearchService
+
+STATUS_CLASSES = {'low': 'table-danger', 'mid': 'table-warning', 'high': 'table-success'}
+
+
+class FragmentService:
+    """
+    Serverrenderade HTML-fragment för dashboard-brands och lagertabellens rader.
+
+    Fragmenten renderas en gång per dataversion och vy. Varje version sparas
+    som nyckel → HTML, så en klient som skickar sin senaste version bara får
+    de fragment som faktiskt ändrats sedan dess, plus aktuell ordning.
+
+    Lagertabellen renderas en sida i taget (samma ordning som
+    /api/inventory/page) eller som sökträffar. Radernas HTML sparas per
+    objekt och återanvänds så länge objektet är oförändrat, så en ny
+    dataversion bara renderar de rader som faktiskt ändrats.
+    """
+
+    TEMPLATE = "fragments/macros.html"
+    VERSIONS_PER_VIEW = 8
+    MAX_VIEWS = 32
+    MAX_CACHED_ROWS = 20000
+
+    def __init__(self, inventory_model: InventoryModel, dashboard_service: DashboardService, logger: logging.Logger,
+                 inventory_service: InventoryService, search_service: Optional[SearchService] = None):
+        self.inventory_model = inventory_model
+        self.dashboard_service = dashboard_service
+        self.logger = logger
+        self.inventory_service = inventory_service
+        self.search_service = search_service
+        self._lock = threading.Lock()
+        self._views: "OrderedDict[Tuple, OrderedDict[str, OrderedDict]]" = OrderedDict()
+        self._rows: Dict[int, Tuple[Dict[str, Any], str]] = {}
+
+    def _rendered(self, view: Tuple, token: str,
+                  build: Callable[[], List[Tuple[str, str]]]) -> "OrderedDict[str, str]":
+        with self._lock:
+            versions = self._views.setdefault(view, OrderedDict())
+            self._views.move_to_end(view)
+            while len(self._views) > self.MAX_VIEWS:
+                self._views.popitem(last=False)
+            fragments = versions.get(token)
+            if fragments is not None:
+                return fragments
+
+        # Rendering sker utanför låset; två samtidiga renderingar av samma version ger samma resultat
+        fragments = OrderedDict(build())
+        with self._lock:
+            versions[token] = fragments
+            while len(versions) > self.VERSIONS_PER_VIEW:
+                versions.popitem(last=False)
+        return fragments
+
+    def _diff(self, view: Tuple, token: str, fragments: "OrderedDict[str, str]",
+              since: Optional[str]) -> Dict[str, Any]:
+        with self._lock:
+            previous = self._views.get(view, {}).get(since) if since else None
+
+        if previous is None:
+            changed = dict(fragments)
+        else:
+            changed = {key: html for key, html in fragments.items() if previous.get(key) != html}
+
+        return {
+            "version": token,
+            "full": previous is None,
+            "order": list(fragments),
+            "fragments": changed
+        }
+
+    def dashboard_fragments(self, profile: str, since: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        result = self.dashboard_service.get_payload(profile)
+        if result is None:
+            return None
+        payload, token = result
+
+        def build() -> List[Tuple[str, str]]:
+            brand_section = get_template_attribute(self.TEMPLATE, "brand_section")
+            return [(brand["name"], str(brand_section(brand))) for brand in payload["brands"]]
+
+        view = ("dashboard", profile)
+        return self._diff(view, token, self._rendered(view, token, build), since)
+
+    def _render_rows(self, items: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """Tabellrader; ett objekt som är likadant som när det senast renderades får samma HTML."""
+        inventory_row = None
+        rows = []
+        for item in items:
+            cached = self._rows.get(item['id'])
+            if cached is not None and cached[0] == item:
+                html = cached[1]
+            else:
+                if inventory_row is None:
+                    inventory_row = get_template_attribute(self.TEMPLATE, "inventory_row")
+                html = str(inventory_row(item, STATUS_CLASSES[item_status(item)]))
+                if len(self._rows) >= self.MAX_CACHED_ROWS:
+                    self._rows.clear()
+                self._rows[item['id']] = (item, html)
+            rows.append((str(item['id']), html))
+        return rows
+
+    def inventory_fragments(self, since: Optional[str] = None, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        page = self.inventory_service.get_page(offset, limit)
+        # Sidan ingår i versionen, så att en version från en annan sida aldrig används som bas för diffen
+        token = f"{page['version']}:{page['offset']}:{limit}"
+
+        view = ("inventory", page['offset'], limit)
+        result = self._diff(view, token, self._rendered(view, token, lambda: self._render_rows(page['items'])), since)
+        result.update(total=page['total'], offset=page['offset'])
+        return result
+
+    def search_fragments(self, query: str, limit: int = 200) -> Dict[str, Any]:
+        """Sökträffarna som tabellrader i rangordning; alltid hela listan eftersom träffarna byts ut."""
+        found = self.search_service.search(query, limit)
+        rows = self._render_rows([InventoryItem.from_dict(result['item']).to_dict() for result in found['results']])
+        return {
+            "version": f"search:{found['version']}",
+            "full": True,
+            "order": [key for key, _ in rows],
+            "fragments": dict(rows),
+            "total": found['total'],
+            "offset": 0
+        }
@@ -0,0 +1,146 @@
+import hmac
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, Optional
+
+from flask import Request, Response
+
+from models.inventory import InventoryModel
+from services.health_service import HealthService
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# Sätts på anrop som den gamla processen skickar vidare; den nya väntar in take_over innan de körs
+FORWARDED_HEADER = "X-Handover-Forwarded"
+# Gäller bara en anslutning och får inte skickas vidare
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "content-length", "host"
+}
+
+
+class HandoverService:
+    """
+    Överlämning mellan gammal och ny process vid blue/green-växling.
+
+    Båda processerna delar datakatalog, så bara en av dem får skriva. Updater
+    ber den gamla processen lämna över (`hand_over`) innan trafiken växlas:
+    den väntar in pågående skrivningar, stoppar sina schemalagda jobb och
+    skickar därefter alla anrop vidare till den nya processen, med
+    `Connection: close` så att klienten ansluter om via trafikväxeln. Den nya
+    processen läser sedan om lagret (`take_over`), eftersom den gamla kan ha
+    skrivit efter att den nya startade. Vidareskickade anrop väntar tills
+    dess, så att den nya aldrig skriver utifrån ett inaktuellt lager.
+
+    Om växlingen avbryts återupptar den gamla processen (`resume`): den läser
+    om lagret och startar sina schemalagda jobb igen.
+    """
+
+    def __init__(self, inventory_model: InventoryModel, health_service: HealthService, logger: logging.Logger,
+                 token: str = "", timeout: float = 10.0):
+        self.inventory_model = inventory_model
+        self.health_service = health_service
+        self.logger = logger
+        self.token = token
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self._writes_in_flight = 0
+        self.forward_port: Optional[int] = None
+        self._taken_over = threading.Event()
+        # Sätts av app.py; startar om schemaläggaren när en överlämning ångras
+        self.restart_scheduler: Optional[Callable[[], None]] = None
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return bool(self.token) and token is not None and hmac.compare_digest(token, self.token)
+
+    def begin_request(self, method: str) -> bool:
+        """Räknar en skrivning som pågående; False om processen redan lämnat över och anropet ska vidare."""
+        with self._condition:
+            if self.forward_port is not None:
+                return False
+            if method in WRITE_METHODS:
+                self._writes_in_flight += 1
+            return True
+
+    def end_request(self, method: str) -> None:
+        if method not in WRITE_METHODS:
+            return
+        with self._condition:
+            self._writes_in_flight -= 1
+            self._condition.notify_all()
+
+    def hand_over(self, port: int) -> bool:
+        """
+        Slutar skriva och skickar vidare till `port`. Om pågående skrivningar
+        inte hinner bli klara ångras överlämningen och False returneras; den
+        här processen fortsätter då som förut.
+        """
+        started = time.perf_counter()
+        with self._condition:
+            self.forward_port = port
+            drained = self._condition.wait_for(lambda: self._writes_in_flight == 0, self.timeout)
+            if not drained:
+                self.forward_port = None
+                in_flight = self._writes_in_flight
+        if not drained:
+            self.logger.warning(
+                f"Överlämning till port {port} avbruten: {in_flight} skrivningar blev inte klara inom {self.timeout}s"
+            )
+            return False
+
+        scheduler = self.health_service.scheduler
+        if scheduler is not None:
+            scheduler.stop()
+        self.logger.info(
+            f"Överlämning till port {port}: skrivningar stoppade och schemaläggaren avslutad "
+            f"på {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return True
+
+    def resume(self) -> bool:
+        """Ångrar en överlämning när den nya processen inte kunde ta över. False om ingen överlämning gjorts."""
+        with self._condition:
+            if self.forward_port is None:
+                return False
+            port, self.forward_port = self.forward_port, None
+        # Den nya processen kan ha hunnit skriva anrop som skickades vidare
+        version = self.inventory_model.reload()
+        if self.restart_scheduler is not None:
+            self.restart_scheduler()
+        self.logger.warning(f"Överlämning till port {port} ångrad, tar tillbaka lagret vid dataversion {version}")
+        return True
+
+    def take_over(self) -> int:
+        version = self.inventory_model.reload()
+        self._taken_over.set()
+        self.logger.info(f"Tog över lagret från föregående process, dataversion {version}")
+        return version
+
+    def wait_for_takeover(self) -> bool:
+        return self._taken_over.wait(self.timeout)
+
+    def forward(self, request: Request) -> Response:
+        """Skickar anropet vidare till den nya processen och returnerar dess svar."""
+        url = f"http://127.0.0.1:{self.forward_port}{request.full_path if request.query_string else request.path}"
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS}
+        headers[FORWARDED_HEADER] = self.token
+        forwarded = urllib.request.Request(url, data=request.get_data() or None, headers=headers,
+                                           method=request.method)
+        try:
+            with urllib.request.urlopen(forwarded, timeout=self.timeout) as upstream:
+                status, upstream_headers, body = upstream.status, upstream.headers, upstream.read()
+        except urllib.error.HTTPError as e:
+            status, upstream_headers, body = e.code, e.headers, e.read()
+        except OSError as e:
+            self.logger.error(f"Kunde inte skicka {request.method} {request.path} vidare till port {self.forward_port}: {e}")
+            return Response('{"error": "Service is being updated, try again"}', status=503,
+                            mimetype="application/json", headers={"Retry-After": "1", "Connection": "close"})
+
+        response = Response(body, status=status)
+        for name, value in upstream_headers.items():
+            if name.lower() not in HOP_BY_HOP_HEADERS:
+                response.headers[name] = value
+        response.headers["Connection"] = "close"
+        return response
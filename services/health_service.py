@@ -0,0 +1,74 @@
+import os
+import time
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from models.inventory import InventoryModel
+from services.backup_service import BackupService
+from services.analytics_service import AnalyticsService
+from utils.startup_timer import StartupTimer
+
+if TYPE_CHECKING:
+    from services.replication_service import ReplicationService
+    from utils.scheduler import JobScheduler
+
+
+class HealthService:
+    """Samlar liveness- och readiness-status för /healthz och /readyz."""
+
+    def __init__(self, inventory_model: InventoryModel, backup_service: BackupService,
+                 analytics_service: AnalyticsService, logger: logging.Logger):
+        self.inventory_model = inventory_model
+        self.backup_service = backup_service
+        self.analytics_service = analytics_service
+        self.logger = logger
+        self.scheduler: Optional["JobScheduler"] = None
+        self.replication_service: Optional["ReplicationService"] = None
+        self.startup_timer: Optional[StartupTimer] = None
+        self.started_at = time.time()
+        self.store_loaded_at: Optional[float] = None
+        self.store_load_ms: Optional[float] = None
+
+    def warm_up(self) -> None:
+        started = time.perf_counter()
+        snapshot = self.inventory_model.snapshot()
+        self.store_load_ms = (time.perf_counter() - started) * 1000
+        self.store_loaded_at = time.time()
+        self.logger.info(
+            f"Lager inläst: {len(snapshot.items)} objekt, dataversion {snapshot.version}, "
+            f"{self.store_load_ms:.1f} ms"
+        )
+
+    def scheduler_alive(self) -> Optional[bool]:
+        return self.scheduler.is_alive() if self.scheduler is not None else None
+
+    def liveness(self) -> Tuple[bool, Dict[str, Any]]:
+        scheduler_alive = self.scheduler_alive()
+        alive = scheduler_alive is not False
+        return alive, {
+            "status": "ok" if alive else "degraded",
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "scheduler_alive": scheduler_alive
+        }
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        store_loaded = self.store_loaded_at is not None
+        scheduler_alive = self.scheduler_alive()
+        last_verification = self.backup_service.last_verification
+
+        ready = store_loaded and scheduler_alive is not False
+        return ready, {
+            "ready": ready,
+            "store_loaded": store_loaded,
+            "store_load_ms": round(self.store_load_ms, 1) if self.store_load_ms is not None else None,
+            "data_version": self.inventory_model.version,
+            "cache_warm": self.inventory_model.is_cache_warm(),
+            "scheduler_alive": scheduler_alive,
+            "scheduler_jobs": self.scheduler.get_stats() if self.scheduler is not None else {},
+            "last_backup_at": self.backup_service.latest_backup_time(),
+            "last_backup_verification_ok": last_verification["ok"] if last_verification else None,
+            "analytics_computed_at": self.analytics_service.computed_at,
+            "replication": self.replication_service.status() if self.replication_service is not None else None,
+            "startup": self.startup_timer.to_dict() if self.startup_timer is not None else None
+        }
@@ -0,0 +1,277 @@
+import csv
+import importlib.util
+import io
+import itertools
+import logging
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, IO, Iterator, List, Optional, Sequence, Tuple
+
+from models.inventory import DEFAULT_HIGH_STATUS, DEFAULT_LOW_STATUS, InventoryModel
+from utils.validation import BatchInventoryValidator
+
+EXPORT_COLUMNS = ("id", "Brand", "product_family", "spare_part", "quantity", "low_status", "high_status")
+IMPORT_FIELDS = EXPORT_COLUMNS[1:]
+TEXT_FIELDS = ("Brand", "product_family", "spare_part")
+INTEGER_FIELDS = ("quantity", "low_status", "high_status")
+
+# Rubriker som accepteras vid import (gemener); adminsidans svenska etiketter fungerar också
+HEADER_ALIASES = {
+    "brand": "Brand", "kund": "Brand",
+    "product_family": "product_family", "produktfamilj": "product_family",
+    "spare_part": "spare_part", "reservdel": "spare_part",
+    "quantity": "quantity", "antal": "quantity",
+    "low_status": "low_status", "låg nivå": "low_status",
+    "high_status": "high_status", "hög nivå": "high_status",
+}
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class UnsupportedFormatError(ValueError):
+    pass
+
+
+def _openpyxl():
+    """openpyxl är valfritt och tar tid att läsa in, så det laddas först när XLSX används."""
+    import openpyxl
+    return openpyxl
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    invalid: int = 0
+    committed: bool = False
+    dry_run: bool = False
+    duration_ms: float = 0.0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "added": self.added,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "invalid": self.invalid,
+            "committed": self.committed,
+            "dry_run": self.dry_run,
+            "duration_ms": round(self.duration_ms, 1),
+            "errors": self.errors
+        }
+
+
+def map_header(header: Sequence[Any]) -> List[Optional[str]]:
+    """Kolumnnamn i filen → fältnamn; okända kolumner (t.ex. id) blir None och ignoreras."""
+    return [HEADER_ALIASES.get(str(name).strip().lower()) if name is not None else None for name in header]
+
+
+def normalize_row(columns: List[Optional[str]], values: Sequence[Any]) -> Dict[str, Any]:
+    """En rad som dict med bara de fält som har ett värde, så att tomma celler inte skriver över."""
+    row: Dict[str, Any] = {}
+    for name, value in zip(columns, values):
+        if name is None or value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        elif name in TEXT_FIELDS:
+            value = str(value)
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        row[name] = value
+    return row
+
+
+class ImportExportService:
+    """
+    Import och export av hela lagret som CSV eller XLSX.
+
+    Importen läser filen strömmande i block om `chunk_rows` rader och validerar
+    blockvis. Giltiga rader upsertas på (product_family, spare_part) med en
+    enda skrivning via InventoryModel.upsert_many, så 50 000 rader blir en
+    filskrivning och en journalskrivning i stället för 50 000.
+    Exporten ger raderna allt eftersom de serialiseras.
+    """
+
+    def __init__(self, inventory_model: InventoryModel, logger: logging.Logger,
+                 chunk_rows: int = 5000, max_errors: int = 100):
+        self.inventory_model = inventory_model
+        self.logger = logger
+        self.chunk_rows = chunk_rows
+        self.max_errors = max_errors
+
+    @staticmethod
+    def supports_xlsx() -> bool:
+        # Utan openpyxl hanteras bara CSV
+        return importlib.util.find_spec("openpyxl") is not None
+
+    @staticmethod
+    def detect_format(filename: str, requested: Optional[str] = None) -> str:
+        if requested:
+            fmt = requested.lower()
+        elif "." in (filename or ""):
+            fmt = filename.rsplit(".", 1)[-1].lower()
+        else:
+            fmt = "csv"
+        if fmt not in ("csv", "xlsx"):
+            raise UnsupportedFormatError(f"Unsupported format: {fmt} (use csv or xlsx)")
+        if fmt == "xlsx" and not ImportExportService.supports_xlsx():
+            raise UnsupportedFormatError("XLSX requires the openpyxl package on the server")
+        return fmt
+
+    # Import
+
+    def _csv_rows(self, stream: IO[bytes]) -> Iterator[Sequence[Any]]:
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        first_line = text.readline()
+        # Excel med svenska inställningar sparar CSV med semikolon
+        delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+        return csv.reader(itertools.chain([first_line], text), delimiter=delimiter)
+
+    def _xlsx_rows(self, stream: IO[bytes]) -> Iterator[Sequence[Any]]:
+        if not stream.seekable():
+            # XLSX är en zip-fil och kräver slumpvis åtkomst
+            spooled = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+            for chunk in iter(lambda: stream.read(STREAM_CHUNK_BYTES), b""):
+                spooled.write(chunk)
+            spooled.seek(0)
+            stream = spooled
+        workbook = _openpyxl().load_workbook(stream, read_only=True, data_only=True)
+        return workbook.active.iter_rows(values_only=True)
+
+    def read_chunks(self, stream: IO[bytes], fmt: str) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """Ger block med (radnummer i filen, rad); rubrikraden är rad 1."""
+        rows = self._xlsx_rows(stream) if fmt == "xlsx" else self._csv_rows(stream)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = map_header(header)
+        missing = {"product_family", "spare_part", "quantity"} - set(columns)
+        if missing:
+            raise UnsupportedFormatError(f"Missing columns: {', '.join(sorted(missing))}")
+
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        for line_number, values in enumerate(rows, start=2):
+            row = normalize_row(columns, values)
+            if not row:
+                continue
+            chunk.append((line_number, row))
+            if len(chunk) >= self.chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _thresholds(self) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """(product_family, spare_part) → gällande (low_status, high_status) för befintliga objekt."""
+        return {
+            (item.get('product_family'), item.get('spare_part')):
+                (int(item.get('low_status', DEFAULT_LOW_STATUS)), int(item.get('high_status', DEFAULT_HIGH_STATUS)))
+            for item in self.inventory_model.snapshot().items
+        }
+
+    def _validate_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]], result: ImportResult,
+                        thresholds: Dict[Tuple[str, str], Tuple[int, int]]) -> List[Tuple[int, Dict[str, Any]]]:
+        columns = {name: [row.get(name) for _, row in chunk] for name in IMPORT_FIELDS}
+        # Saknade gränser tas från det befintliga objektet, annars standardvärdena för ett nytt
+        effective = [thresholds.get((row.get('product_family'), row.get('spare_part')),
+                                    (DEFAULT_LOW_STATUS, DEFAULT_HIGH_STATUS)) for _, row in chunk]
+        fallback = {"low_status": [low for low, _ in effective], "high_status": [high for _, high in effective]}
+        validation = BatchInventoryValidator.validate_columns(columns, len(chunk), fallback)
+        if validation.has_errors():
+            invalid_rows = validation.invalid_rows()
+            result.invalid += len(invalid_rows)
+            remaining = max(0, self.max_errors - len(result.errors))
+            for index, errors in validation.errors_by_row(remaining).items():
+                result.errors.append({"row": chunk[index][0], "errors": errors})
+
+        valid = []
+        values = validation.values
+        for index, ((line_number, row), ok) in enumerate(zip(chunk, validation.valid_mask())):
+            if not ok:
+                continue
+            for name in INTEGER_FIELDS:
+                if name in row:
+                    row[name] = values[name][index]
+            valid.append((line_number, row))
+        return valid
+
+    def _report_rejected(self, entries: List[Tuple[int, Dict[str, Any]]], rejected: List[int],
+                         result: ImportResult) -> None:
+        """Rader som modellen avvisat: gränserna stämmer inte ihop med befintligt objekt eller standardvärdena."""
+        result.invalid += len(rejected)
+        remaining = max(0, self.max_errors - len(result.errors))
+        for index in rejected[:remaining]:
+            result.errors.append({"row": entries[index][0],
+                                  "errors": {"high_status": "High status must be greater than low status"}})
+
+    def import_file(self, stream: IO[bytes], fmt: str, dry_run: bool = False,
+                    skip_invalid: bool = False) -> ImportResult:
+        """
+        Importerar en fil. Finns ogiltiga rader importeras ingenting, om inte
+        `skip_invalid` anges; då importeras de giltiga raderna.
+        """
+        started = time.perf_counter()
+        result = ImportResult(dry_run=dry_run)
+        entries: List[Tuple[int, Dict[str, Any]]] = []
+        thresholds = self._thresholds()
+        for chunk in self.read_chunks(stream, fmt):
+            result.rows += len(chunk)
+            entries.extend(self._validate_chunk(chunk, result, thresholds))
+
+        if not dry_run and entries and (skip_invalid or not result.invalid):
+            result.added, result.updated, result.unchanged, rejected = self.inventory_model.upsert_many(
+                [row for _, row in entries], skip_invalid=skip_invalid
+            )
+            self._report_rejected(entries, rejected, result)
+            result.committed = skip_invalid or not rejected
+        result.duration_ms = (time.perf_counter() - started) * 1000
+
+        self.logger.info(
+            f"Import ({fmt}{', provkörning' if dry_run else ''}): {result.rows} rader, "
+            f"{result.added} tillagda, {result.updated} uppdaterade, {result.unchanged} oförändrade, "
+            f"{result.invalid} ogiltiga, {'sparad' if result.committed else 'inte sparad'}, "
+            f"{result.duration_ms:.0f} ms"
+        )
+        return result
+
+    # Export
+
+    def export_csv(self, delimiter: str = ",", batch_rows: int = 1000) -> Iterator[str]:
+        """CSV i block om `batch_rows` rader; BOM först så att Excel läser UTF-8 rätt."""
+        items = self.inventory_model.snapshot().items
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\r\n")
+        buffer.write("\ufeff")
+        writer.writerow(EXPORT_COLUMNS)
+        for start in range(0, len(items), batch_rows):
+            writer.writerows([item.get(name, "") for name in EXPORT_COLUMNS] for item in items[start:start + batch_rows])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def export_xlsx(self) -> Iterator[bytes]:
+        """
+        XLSX i block. Arbetsboken skrivs rad för rad i write-only-läge till en
+        temporärfil (en zip kan inte strömmas innan den är klar) och strömmas sedan.
+        """
+        items = self.inventory_model.snapshot().items
+        workbook = _openpyxl().Workbook(write_only=True)
+        sheet = workbook.create_sheet("Lager")
+        sheet.append(list(EXPORT_COLUMNS))
+        for item in items:
+            sheet.append([item.get(name) for name in EXPORT_COLUMNS])
+
+        with tempfile.TemporaryFile() as f:
+            workbook.save(f)
+            f.seek(0)
+            for chunk in iter(lambda: f.read(STREAM_CHUNK_BYTES), b""):
+                yield chunk
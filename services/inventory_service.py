@@ -1,5 +1,8 @@
 from typing import List, Optional, Tuple, Dict, Any
+import json
+import hashlib
 import logging
+import threading
 from dataclasses import dataclass
 
 from models.inventory import InventoryModel, InventoryItem
@@ -15,6 +18,10 @@ class InventoryService:
     def __init__(self, inventory_model: InventoryModel, logger: logging.Logger):
         self.inventory_model = inventory_model
         self.logger = logger
+        self._serialized_lock = threading.Lock()
+        self._serialized: Optional[Tuple[Any, str, bytes]] = None
+        self._ordered: Optional[Tuple[Any, List[Dict[str, Any]]]] = None
+        self._options: Optional[Tuple[Any, Dict[str, Dict[str, List[Dict[str, Any]]]]]] = None
 
     def get_status_and_action(self, item: InventoryItem) -> StatusInfo:
         if item.quantity <= item.low_status:
@@ -31,6 +38,81 @@ class InventoryService:
             self._log_item_status(item, status_info)
         return items
 
+    def get_inventory_json(self) -> Tuple[str, bytes]:
+        """
+        Returnerar (etag, JSON) för hela lagret.
+
+        Svaret byggs och statusloggas en gång per publicerad lagerlista
+        istället för vid varje förfrågan; ETag är en hash av innehållet.
+        """
+        snapshot = self.inventory_model.snapshot()
+        with self._serialized_lock:
+            if self._serialized is not None and self._serialized[0] is snapshot.items:
+                return self._serialized[1], self._serialized[2]
+
+        items = [InventoryItem.from_dict(item) for item in snapshot.items]
+        for item in items:
+            self._log_item_status(item, self.get_status_and_action(item))
+        body = json.dumps([item.to_dict() for item in items], sort_keys=True, separators=(",", ":")).encode('utf-8')
+        etag = hashlib.sha1(body).hexdigest()[:20]
+
+        with self._serialized_lock:
+            self._serialized = (snapshot.items, etag, body)
+        return etag, body
+
+    def get_page(self, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        En sida av lagret sorterat på produktfamilj och reservdel, med totalt
+        antal, så att huvudsidan bläddrar istället för att hämta allt. Den
+        sorterade ordningen byggs om bara när modellen publicerat en ny lista.
+        """
+        snapshot = self.inventory_model.snapshot()
+        with self._serialized_lock:
+            cached = self._ordered
+        if cached is None or cached[0] is not snapshot.items:
+            ordered = sorted(snapshot.items, key=lambda item: (item.get('product_family', '').casefold(),
+                                                                 item.get('spare_part', '').casefold()))
+            cached = (snapshot.items, ordered)
+            with self._serialized_lock:
+                self._ordered = cached
+
+        ordered = cached[1]
+        return {
+            "version": snapshot.version,
+            "total": len(ordered),
+            "offset": offset,
+            "items": [InventoryItem.from_dict(item).to_dict() for item in ordered[offset:offset + limit]]
+        }
+
+    def get_options(self, brand: str = "", product_family: str = "") -> Dict[str, Any]:
+        """
+        Val för formulärets dropdowns: alla kunder, produktfamiljerna för vald
+        kund och artiklarna i vald produktfamilj. Sidan behöver då inte hämta
+        hela lagret för att fylla listorna. Indexet kund → produktfamilj →
+        artiklar byggs om bara när modellen publicerat en ny lista.
+        """
+        snapshot = self.inventory_model.snapshot()
+        with self._serialized_lock:
+            cached = self._options
+        if cached is None or cached[0] is not snapshot.items:
+            index: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+            for item in snapshot.items:
+                families = index.setdefault(item.get('Brand') or 'Okänd', {})
+                families.setdefault(item.get('product_family', ''), []).append(item)
+            cached = (snapshot.items, index)
+            with self._serialized_lock:
+                self._options = cached
+
+        index = cached[1]
+        options: Dict[str, Any] = {"version": snapshot.version, "brands": sorted(index)}
+        if brand:
+            families = index.get(brand, {})
+            options["product_families"] = sorted(families)
+            if product_family:
+                items = [InventoryItem.from_dict(item).to_dict() for item in families.get(product_family, [])]
+                options["items"] = sorted(items, key=lambda item: item['spare_part'])
+        return options
+
     def get_item_by_id(self, item_id: int) -> Optional[InventoryItem]:
         return self.inventory_model.get_by_id(item_id)
 
@@ -44,10 +126,9 @@ class InventoryService:
             )
 
             if existing_item:
-                old_quantity = existing_item.quantity
-                existing_item.quantity += new_item.quantity
-
-                if self.inventory_model.update(existing_item):
+                adjusted = self.inventory_model.adjust_quantity(existing_item.id, new_item.quantity)
+                if adjusted is not None:
+                    old_quantity, existing_item = adjusted
                     status_info = self.get_status_and_action(existing_item)
                     self.logger.info(
                         f"Updated quantity: ID={existing_item.id}, "
@@ -86,29 +167,25 @@ class InventoryService:
 
     def subtract_quantity(self, item_id: int, quantity_to_subtract: int = 1) -> Tuple[Optional[InventoryItem], bool, str]:
         try:
-            item = self.inventory_model.get_by_id(item_id)
-            if not item:
+            # Läs-ändra-skriv sker atomiskt i modellen; annars kan samtidiga avdrag gå förlorade
+            adjusted = self.inventory_model.adjust_quantity(item_id, -quantity_to_subtract)
+            if adjusted is None:
                 self.logger.warning(f"Försökte subtrahera från ID {item_id} som inte finns")
                 return None, False, "Item not found"
 
-            old_quantity = item.quantity
-            item.quantity = max(0, item.quantity - quantity_to_subtract)
-
-            if self.inventory_model.update(item):
-                status_info = self.get_status_and_action(item)
-                self.logger.info(
-                    f"Subtracted quantity: ID={item.id}, "
-                    f"Brand={item.Brand}, "
-                    f"ProductFamily={item.product_family}, "
-                    f"SparePart={item.spare_part}, "
-                    f"OldQuantity={old_quantity}, "
-                    f"NewQuantity={item.quantity}, "
-                    f"Status={status_info.status}, "
-                    f"Action={status_info.action}"
-                )
-                return item, True, "Quantity subtracted"
-            else:
-                return item, False, "Failed to update quantity"
+            old_quantity, item = adjusted
+            status_info = self.get_status_and_action(item)
+            self.logger.info(
+                f"Subtracted quantity: ID={item.id}, "
+                f"Brand={item.Brand}, "
+                f"ProductFamily={item.product_family}, "
+                f"SparePart={item.spare_part}, "
+                f"OldQuantity={old_quantity}, "
+                f"NewQuantity={item.quantity}, "
+                f"Status={status_info.status}, "
+                f"Action={status_info.action}"
+            )
+            return item, True, "Quantity subtracted"
 
         except Exception as e:
             self.logger.error(f"Error subtracting quantity: {e}")
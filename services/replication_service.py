@@ -0,0 +1,226 @@
+import gzip
+import json
+import logging
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from models.inventory import InventoryModel
+from utils.metrics import get_metrics
+
+_metrics = get_metrics()
+SNAPSHOTS = _metrics.counter(
+    "replication_snapshots_total", "Ögonblicksbilder som replikan hämtat för att komma ikapp"
+)
+APPLY_DELAY_SECONDS = _metrics.histogram(
+    "replication_apply_delay_seconds", "Tid från att primären skrev en post till att replikan applicerat den"
+)
+POLL_ERRORS = _metrics.counter(
+    "replication_poll_errors_total", "Misslyckade anrop från replikan till primären"
+)
+
+
+class ReplicationService:
+    """
+    Primär/replika-replikering över ändringsloggen.
+
+    Primären lämnar ut sin ändringslogg i seq-ordning (`changes_since`) och en
+    ögonblicksbild med sin version (`snapshot`). En replika (med `primary_url`)
+    är skrivskyddad och följer primären i en egen tråd: den hämtar posterna efter
+    sin egen version med long-poll och applicerar dem i ordning, med primärens
+    seq i sin egen journal. Saknas poster (journalen kompakterad, för långt
+    efter, eller primären nollställd) hämtas en ögonblicksbild i stället.
+    """
+
+    def __init__(self, inventory_model: InventoryModel, logger: logging.Logger,
+                 primary_url: str = "", batch_size: int = 1000, wait_seconds: float = 10.0,
+                 timeout: float = 5.0, retry_seconds: float = 2.0, max_catchup_entries: int = 20000):
+        self.inventory_model = inventory_model
+        self.logger = logger
+        self.primary_url = primary_url.rstrip("/")
+        self.batch_size = batch_size
+        self.wait_seconds = wait_seconds
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self.max_catchup_entries = max_catchup_entries
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.primary_seq: Optional[int] = None
+        self.last_contact_at: Optional[float] = None
+        # Tidpunkt för den äldsta ändring replikan ännu inte applicerat
+        self.behind_since: Optional[float] = None
+        self.caught_up = False
+        self.entries_applied = 0
+        self.snapshots = 0
+        self.error: Optional[str] = None
+
+        _metrics.gauge("replication_lag_entries", "Poster som replikan ligger efter primären",
+                       callback=lambda: self.status()["lag_entries"] or 0)
+        _metrics.gauge("replication_lag_seconds", "Hur gammal den äldsta ändring replikan ännu inte applicerat är",
+                       callback=lambda: self.status()["lag_seconds"] or 0)
+
+    @property
+    def is_replica(self) -> bool:
+        return bool(self.primary_url)
+
+    @property
+    def role(self) -> str:
+        return "replica" if self.is_replica else "primary"
+
+    # Primär
+
+    def changes_since(self, since_seq: int, limit: int, wait_seconds: float = 0.0) -> Dict[str, Any]:
+        """Posterna efter `since_seq`; väntar upp till `wait_seconds` på nya om replikan redan är ikapp."""
+        if wait_seconds > 0 and self.inventory_model.version == since_seq:
+            self.inventory_model.wait_for_change(since_seq, min(wait_seconds, 30.0))
+
+        last_seq = self.inventory_model.version
+        change_log = self.inventory_model.change_log
+        entries = change_log.read_after(since_seq, limit) if change_log is not None and since_seq < last_seq else []
+        if entries:
+            last_seq = max(last_seq, entries[-1]['seq'])
+
+        snapshot_required = since_seq > last_seq or (
+            since_seq < last_seq and
+            (not entries or entries[0]['seq'] != since_seq + 1 or last_seq - since_seq > self.max_catchup_entries)
+        )
+        return {
+            "role": self.role,
+            "last_seq": last_seq,
+            "snapshot_required": snapshot_required,
+            "entries": [] if snapshot_required else entries
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = self.inventory_model.snapshot()
+        return {"role": self.role, "seq": snapshot.version, "items": snapshot.items}
+
+    # Replika
+
+    def _get_json(self, path: str, params: Dict[str, Any], timeout: float) -> Any:
+        url = f"{self.primary_url}{path}?{urllib.parse.urlencode(params)}" if params else f"{self.primary_url}{path}"
+        request = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+            if response.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return json.loads(body)
+
+    def catch_up_from_snapshot(self) -> None:
+        started = time.perf_counter()
+        snapshot = self._get_json("/api/replication/snapshot", {}, self.timeout)
+        count = self.inventory_model.install_snapshot(snapshot["items"], int(snapshot["seq"]))
+        SNAPSHOTS.inc()
+        with self._lock:
+            self.snapshots += 1
+            self.primary_seq = int(snapshot["seq"])
+        self.logger.info(
+            f"Replika: ögonblicksbild från {self.primary_url} installerad, {count} objekt, "
+            f"version {snapshot['seq']}, {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
+    def apply(self, entries: List[Dict[str, Any]]) -> None:
+        self.inventory_model.apply_replicated(entries)
+        now = time.time()
+        for entry in entries:
+            APPLY_DELAY_SECONDS.observe(max(0.0, now - entry.get('ts', now)))
+        with self._lock:
+            self.entries_applied += len(entries)
+
+    def sync_once(self, wait_seconds: float = 0.0) -> int:
+        """En omgång: hämtar och applicerar nästa batch. Returnerar antal applicerade poster."""
+        since_seq = self.inventory_model.version
+        response = self._get_json(
+            "/api/replication/changes",
+            {"since": since_seq, "limit": self.batch_size, "wait": wait_seconds},
+            self.timeout + wait_seconds
+        )
+        now = time.time()
+        with self._lock:
+            self.primary_seq = int(response["last_seq"])
+            self.last_contact_at = now
+            self.error = None
+            if self.primary_seq != since_seq and self.behind_since is None:
+                entries = response["entries"]
+                self.behind_since = min(now, entries[0].get('ts', now)) if entries else now
+
+        if response["snapshot_required"]:
+            self.logger.info(
+                f"Replika: version {since_seq} kan inte följas upp med poster från primären "
+                f"(version {response['last_seq']}), hämtar ögonblicksbild"
+            )
+            self.catch_up_from_snapshot()
+            applied = 0
+        else:
+            entries = response["entries"]
+            if entries:
+                self.apply(entries)
+            applied = len(entries)
+
+        with self._lock:
+            self.caught_up = self.inventory_model.version == self.primary_seq
+            if self.caught_up:
+                self.behind_since = None
+        return applied
+
+    def _run(self) -> None:
+        self.logger.info(f"Replika: följer primären {self.primary_url} från version {self.inventory_model.version}")
+        first = True
+        while not self._stop.is_set():
+            try:
+                if first:
+                    # Omstart: lokala data kan komma från en annan primär, så börja från en ögonblicksbild
+                    self.catch_up_from_snapshot()
+                    first = False
+                # Ikapp: long-poll, så nya ändringar kommer direkt utan tät pollning
+                self.sync_once(self.wait_seconds if self.caught_up else 0.0)
+            except Exception as e:
+                POLL_ERRORS.inc()
+                with self._lock:
+                    changed = self.error != str(e)
+                    self.error = str(e)
+                if changed:
+                    self.logger.warning(f"Replika: kunde inte läsa från primären {self.primary_url}: {e}")
+                self._stop.wait(self.retry_seconds)
+
+    def start(self) -> None:
+        if not self.is_replica or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replication", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _lag_seconds(self, now: float) -> Optional[float]:
+        # Utan kontakt vet replikan bara att den var aktuell vid senaste svaret
+        if self.error is not None:
+            return round(now - self.last_contact_at, 3) if self.last_contact_at is not None else None
+        if self.behind_since is not None:
+            return round(now - self.behind_since, 3)
+        return 0.0 if self.last_contact_at is not None else None
+
+    def status(self) -> Dict[str, Any]:
+        version = self.inventory_model.version
+        with self._lock:
+            if not self.is_replica:
+                return {"role": self.role, "applied_seq": version, "lag_entries": None, "lag_seconds": None}
+            lag_entries = max(0, self.primary_seq - version) if self.primary_seq is not None else None
+            now = time.time()
+            return {
+                "role": self.role,
+                "primary_url": self.primary_url,
+                "applied_seq": version,
+                "primary_seq": self.primary_seq,
+                "lag_entries": lag_entries,
+                "lag_seconds": self._lag_seconds(now),
+                "last_contact_seconds_ago": round(now - self.last_contact_at, 1) if self.last_contact_at else None,
+                "entries_applied": self.entries_applied,
+                "snapshots": self.snapshots,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "error": self.error
+            }
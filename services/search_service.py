@@ -0,0 +1,194 @@
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from models.inventory import InventoryModel
+from services.dashboard_service import item_status
+from utils.metrics import get_metrics
+
+_metrics = get_metrics()
+SEARCH_SECONDS = _metrics.histogram(
+    "search_query_seconds", "Tid för en sökning i trigramindexet"
+)
+INDEX_UPDATES = _metrics.counter(
+    "search_index_updates_total", "Uppdateringar av sökindexet per sätt (incremental, rebuild)", ["kind"]
+)
+
+SEARCH_FIELDS = ("Brand", "product_family", "spare_part")
+
+
+def normalize(text: str) -> str:
+    """Gemener, och skiljetecken som mellanslag, så att "LCD-modul" och "lcd modul" blir samma text."""
+    return " ".join(re.sub(r"[\W_]+", " ", (text or "").lower()).split())
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Trigram per ord med utfyllnad som i pg_trgm, så att även korta sökningar och ordbörjan matchar."""
+    grams: Set[str] = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class SearchService:
+    """
+    Feltolerant sökning över Brand, product_family och spare_part.
+
+    Ett trigramindex i minnet (trigram → objekt-id) hålls aktuellt
+    inkrementellt genom att läsa ändringsloggen från indexets version, så en
+    mutation kostar bara omindexering av det ändrade objektet. Vid
+    återställning, luckor i loggen eller utan logg byggs indexet om från en
+    ögonblicksbild.
+
+    En sökning hämtar kandidater bara från de ovanligaste trigrammen: för att
+    nå kravet på `min_similarity` måste ett objekt innehålla minst ett av dem.
+    Kandidaterna rangordnas på andelen av sökningens trigram som finns i
+    objektet, med tillägg för exakt delsträng.
+    """
+
+    # Fler ändringar än så sedan indexets version: snabbare att bygga om än att spela upp
+    MAX_INCREMENTAL_ENTRIES = 10000
+
+    def __init__(self, inventory_model: InventoryModel, logger: logging.Logger, min_similarity: float = 0.5):
+        self.inventory_model = inventory_model
+        self.logger = logger
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Set[int]] = {}
+        self._texts: Dict[int, str] = {}
+        self._sizes: Dict[int, int] = {}
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self.version: Optional[int] = None
+
+    @staticmethod
+    def _document(item: Dict[str, Any]) -> str:
+        return normalize(" ".join(str(item.get(field, "")) for field in SEARCH_FIELDS))
+
+    def _add(self, item: Dict[str, Any]) -> None:
+        item_id = int(item.get('id', 0))
+        if item_id in self._texts:
+            self._remove(item_id)
+        text = self._document(item)
+        grams = trigrams(text)
+        self._texts[item_id] = text
+        self._sizes[item_id] = len(grams)
+        self._items[item_id] = item
+        postings = self._postings
+        for gram in grams:
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = ids = set()
+            ids.add(item_id)
+
+    def _remove(self, item_id: int) -> None:
+        text = self._texts.pop(item_id, None)
+        self._sizes.pop(item_id, None)
+        self._items.pop(item_id, None)
+        if text is None:
+            return
+        for gram in trigrams(text):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def _rebuild(self) -> None:
+        started = time.perf_counter()
+        snapshot = self.inventory_model.snapshot()
+        self._postings, self._texts, self._sizes, self._items = {}, {}, {}, {}
+        for item in snapshot.items:
+            self._add(item)
+        self.version = snapshot.version
+        INDEX_UPDATES.inc(kind="rebuild")
+        self.logger.info(
+            f"Sökindex byggt: {len(self._items)} objekt, {len(self._postings)} trigram, "
+            f"version {self.version}, {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
+    def _catch_up(self) -> None:
+        """Anroparen håller låset."""
+        current = self.inventory_model.version
+        if self.version == current:
+            return
+        change_log = self.inventory_model.change_log
+        if (self.version is None or change_log is None or current < self.version or
+                current - self.version > self.MAX_INCREMENTAL_ENTRIES):
+            self._rebuild()
+            return
+
+        entries = change_log.read_after(self.version, current - self.version)
+        if not entries or entries[0]['seq'] != self.version + 1 or any(entry.get('op') == 'restore' for entry in entries):
+            self._rebuild()
+            return
+        for entry in entries:
+            item = entry.get('item', {})
+            if entry.get('op') == 'delete':
+                self._remove(int(item.get('id', 0)))
+            else:
+                self._add(item)
+        self.version = entries[-1]['seq']
+        INDEX_UPDATES.inc(kind="incremental")
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._catch_up()
+
+    def search(self, query: str, limit: int = 20) -> Dict[str, Any]:
+        started = time.perf_counter()
+        text = normalize(query)
+        query_grams = trigrams(text)
+        with self._lock:
+            self._catch_up()
+            version = self.version
+            total, results = self._rank(text, query_grams, limit) if query_grams else (0, [])
+        took = time.perf_counter() - started
+        SEARCH_SECONDS.observe(took)
+        return {
+            "query": query,
+            "version": version,
+            "took_ms": round(took * 1000, 2),
+            "total": total,
+            "results": results
+        }
+
+    def _rank(self, text: str, query_grams: FrozenSet[str], limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """Returnerar (antal träffar, de `limit` bästa); anroparen håller låset."""
+        need = max(1, math.ceil(self.min_similarity * len(query_grams)))
+        rarest = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+        candidates: Set[int] = set()
+        for gram in rarest[:len(query_grams) - need + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        # Gemensamma trigram per kandidat, räknat över postlistorna (mängdsnitt och Counter i C)
+        shared_counts: Counter = Counter()
+        for gram in query_grams:
+            ids = self._postings.get(gram)
+            if ids:
+                shared_counts.update(candidates & ids)
+
+        scored = []
+        for item_id, shared in shared_counts.items():
+            if shared < need:
+                continue
+            score = shared / len(query_grams)
+            if text in self._texts[item_id]:
+                score += 0.5
+            # Vid lika täckning vinner det objekt där sökningen utgör störst del
+            score += 0.1 * shared / self._sizes[item_id]
+            scored.append((score, item_id))
+
+        return len(scored), [
+            {"item": self._items[item_id], "status": item_status(self._items[item_id]), "score": round(score, 3)}
+            for score, item_id in heapq.nlargest(limit, scored)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"version": self.version, "items": len(self._items), "trigrams": len(self._postings)}
@@ -1,8 +1,12 @@
 import json
 import os
+import re
+import hashlib
 import logging
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 from utils.exceptions import FileOperationError, ValidationError
+from utils.file_handler import get_file_handler
 
 
 class SettingsService:
@@ -15,20 +19,33 @@ class SettingsService:
         "compact": False,
         "horizontal": False,
         "brandsPerRow": 3,
-        "sparePartsPerRow": 5
+        "sparePartsPerRow": 5,
+        "brandFilter": ""
     }
 
+    DEFAULT_PROFILE = "default"
+    PROFILE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,40}$")
+
     def __init__(self, settings_file: str, logger: logging.Logger):
         self.settings_file = settings_file
         self.logger = logger
+        self.file_handler = get_file_handler()
 
-    def get_settings(self) -> Dict[str, Any]:
-        """
-        Läser inställningar från fil eller returnerar standardinställningar.
+        # Cache som invalideras vid sparning eller när filens mtime/storlek ändras
+        self._condition = threading.Condition()
+        self._document: Optional[Dict[str, Any]] = None
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._etag: Optional[str] = None
+        self.version = 0
 
-        Returns:
-            Dict med inställningar
-        """
+    def _stat_file(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.settings_file)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _load_file(self) -> Dict[str, Any]:
         try:
             if os.path.exists(self.settings_file):
                 with open(self.settings_file, "r", encoding='utf-8') as f:
@@ -45,6 +62,112 @@ class SettingsService:
             self.logger.error(f"Fel vid läsning av {self.settings_file}: {e}")
             raise FileOperationError("read", self.settings_file, e)
 
+    def _set_cache(self, document: Dict[str, Any], file_stamp: Optional[Tuple[int, int]]) -> None:
+        # Anropas med self._condition hållen
+        encoded = json.dumps(document, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        etag = hashlib.sha1(encoded).hexdigest()
+        self._document = document
+        self._file_stamp = file_stamp
+        if etag != self._etag:
+            self._etag = etag
+            self.version += 1
+            self._condition.notify_all()
+
+    def _get_document(self) -> Tuple[Dict[str, Any], str]:
+        """Hela settings-filen: grundinställningar plus namngivna profiler under 'profiles'."""
+        file_stamp = self._stat_file()
+        with self._condition:
+            if self._document is None or file_stamp != self._file_stamp:
+                self._set_cache(self._load_file(), file_stamp)
+            return self._document, self._etag
+
+    def _write_document(self, document: Dict[str, Any]) -> None:
+        try:
+            with self._condition:
+                self.file_handler.write_json(self.settings_file, document)
+                self._set_cache(document, self._stat_file())
+        except Exception as e:
+            self.logger.error(f"Fel vid skrivning till {self.settings_file}: {e}")
+            raise FileOperationError("write", self.settings_file, e)
+
+    def get_settings_with_etag(self) -> Tuple[Dict[str, Any], str]:
+        document, etag = self._get_document()
+        settings = {key: value for key, value in document.items() if key != "profiles"}
+        return settings, etag
+
+    def get_settings(self) -> Dict[str, Any]:
+        """
+        Läser inställningar från cache, fil eller returnerar standardinställningar.
+
+        Returns:
+            Dict med inställningar
+        """
+        settings, _ = self.get_settings_with_etag()
+        return settings
+
+    def _validate_profile_name(self, name: str) -> None:
+        if not self.PROFILE_NAME_PATTERN.match(name or ""):
+            raise ValidationError("profile", "Profile name must be 1-40 characters of letters, digits, '-' or '_'")
+
+    def list_profiles(self) -> List[str]:
+        document, _ = self._get_document()
+        return [self.DEFAULT_PROFILE] + sorted(document.get("profiles", {}))
+
+    def get_profile(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returnerar profilens inställningar, eller None om profilen saknas.
+
+        Profilen 'default' är grundinställningarna i settings-filen.
+        """
+        document, _ = self._get_document()
+        settings = {key: value for key, value in document.items() if key != "profiles"}
+        if name == self.DEFAULT_PROFILE:
+            return settings
+        profile = document.get("profiles", {}).get(name)
+        if profile is None:
+            return None
+        return dict(self.DEFAULT_SETTINGS, **profile)
+
+    def save_profile(self, name: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+        if name == self.DEFAULT_PROFILE:
+            return self.save_settings(settings)
+        self._validate_profile_name(name)
+        validated_settings = self._validate_and_sanitize(settings)
+
+        with self._condition:
+            document, _ = self._get_document()
+            profiles = dict(document.get("profiles", {}))
+            profiles[name] = validated_settings
+            self._write_document(dict(document, profiles=profiles))
+        self.logger.info(f"Dashboard-profil '{name}' sparad: {validated_settings}")
+        return dict(validated_settings)
+
+    def delete_profile(self, name: str) -> bool:
+        with self._condition:
+            document, _ = self._get_document()
+            profiles = dict(document.get("profiles", {}))
+            if name not in profiles:
+                return False
+            del profiles[name]
+            self._write_document(dict(document, profiles=profiles))
+        self.logger.info(f"Dashboard-profil '{name}' borttagen")
+        return True
+
+    def wait_for_change(self, known_version: int, timeout: float,
+                        profile: Optional[str] = None) -> Tuple[int, Optional[Dict[str, Any]], str]:
+        """
+        Väntar tills inställningarna ändrats sedan known_version eller timeout löpt ut.
+
+        Filen kontrolleras även vid timeout så att ändringar gjorda direkt i
+        filen också når öppna dashboards.
+        """
+        with self._condition:
+            if self.version == known_version:
+                self._condition.wait(timeout=timeout)
+            _, etag = self._get_document()
+            settings = self.get_profile(profile or self.DEFAULT_PROFILE)
+            return self.version, settings, etag
+
     def save_settings(self, settings: Dict[str, Any]) -> Dict[str, Any]:
         """
         Validerar och sparar inställningar till fil.
@@ -61,15 +184,15 @@ class SettingsService:
         """
         validated_settings = self._validate_and_sanitize(settings)
 
-        try:
-            os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
-            with open(self.settings_file, "w", encoding='utf-8') as f:
-                json.dump(validated_settings, f, indent=4, ensure_ascii=False)
-            self.logger.info(f"Dashboard-inställningar sparade: {validated_settings}")
-            return validated_settings
-        except Exception as e:
-            self.logger.error(f"Fel vid skrivning till {self.settings_file}: {e}")
-            raise FileOperationError("write", self.settings_file, e)
+        with self._condition:
+            document, _ = self._get_document()
+            if document.get("profiles"):
+                # Profilerna ligger i samma fil och får inte försvinna när grundinställningarna sparas
+                self._write_document(dict(validated_settings, profiles=document["profiles"]))
+            else:
+                self._write_document(validated_settings)
+        self.logger.info(f"Dashboard-inställningar sparade: {validated_settings}")
+        return dict(validated_settings)
 
     def _validate_and_sanitize(self, settings: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -159,4 +282,13 @@ class SettingsService:
         else:
             validated["sparePartsPerRow"] = self.DEFAULT_SETTINGS["sparePartsPerRow"]
 
+        # Validera brandFilter
+        if "brandFilter" in settings:
+            if isinstance(settings["brandFilter"], str):
+                validated["brandFilter"] = settings["brandFilter"].strip()
+            else:
+                raise ValidationError("brandFilter", "BrandFilter must be a string")
+        else:
+            validated["brandFilter"] = self.DEFAULT_SETTINGS["brandFilter"]
+
         return validated
\ No newline at end of file
@@ -0,0 +1,160 @@
+import socket
+import logging
+import threading
+import time
+from typing import Dict, Optional, Set
+
+
+class TrafficSwitch:
+    """
+    Minimal TCP-proxy framför app.py för blue/green-uppdateringar.
+
+    Proxyn lyssnar på den publika porten och vidarebefordrar varje ny
+    anslutning till aktiv backend-port. Ett byte påverkar bara nya
+    anslutningar; pågående anslutningar får köra klart mot den gamla
+    processen, som därefter kan dräneras och stoppas. Vilande keep-alive-
+    anslutningar mot den gamla processen stängs med `close_idle`.
+    """
+
+    BUFFER_SIZE = 65536
+    # En anslutning räknas som vilande keep-alive när svaret är skickat och det varit tyst så här länge
+    IDLE_SECONDS = 1.0
+
+    def __init__(self, listen_host: str, listen_port: int, logger: logging.Logger, backend_host: str = "127.0.0.1"):
+        self.listen_host = listen_host
+        self.listen_port = listen_port
+        self.backend_host = backend_host
+        self.logger = logger
+        self._backend_port: Optional[int] = None
+        self._active: Dict[int, int] = {}
+        self._connections: Set["_Connection"] = set()
+        self._lock = threading.Lock()
+        self._server_socket: Optional[socket.socket] = None
+        self._running = False
+
+    @property
+    def backend_port(self) -> Optional[int]:
+        return self._backend_port
+
+    def start(self) -> None:
+        self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server_socket.bind((self.listen_host, self.listen_port))
+        self._server_socket.listen(128)
+        self._running = True
+        threading.Thread(target=self._accept_loop, name="traffic-switch", daemon=True).start()
+        self.logger.info(f"Trafikväxel lyssnar på {self.listen_host}:{self.listen_port}")
+
+    def stop(self) -> None:
+        self._running = False
+        if self._server_socket is not None:
+            self._server_socket.close()
+
+    def switch_to(self, port: int) -> Optional[int]:
+        with self._lock:
+            previous = self._backend_port
+            self._backend_port = port
+        self.logger.info(f"Trafik växlad från port {previous} till port {port}")
+        return previous
+
+    def active_connections(self, port: int) -> int:
+        with self._lock:
+            return self._active.get(port, 0)
+
+    def close_idle(self, port: int) -> int:
+        """Stänger vilande anslutningar mot `port`, så klienterna ansluter om till aktiv backend."""
+        now = time.monotonic()
+        with self._lock:
+            idle = [connection for connection in self._connections
+                    if connection.port == port and connection.is_idle(now, self.IDLE_SECONDS)]
+        for connection in idle:
+            connection.close()
+        return len(idle)
+
+    def wait_for_drain(self, port: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.active_connections(port) == 0:
+                return True
+            time.sleep(0.1)
+        return self.active_connections(port) == 0
+
+    def _accept_loop(self) -> None:
+        while self._running:
+            try:
+                client, _ = self._server_socket.accept()
+            except OSError:
+                break
+            with self._lock:
+                port = self._backend_port
+            if port is None:
+                client.close()
+                continue
+            threading.Thread(target=self._handle, args=(client, port), daemon=True).start()
+
+    def _handle(self, client: socket.socket, port: int) -> None:
+        try:
+            backend = socket.create_connection((self.backend_host, port), timeout=5)
+            backend.settimeout(None)
+        except OSError as e:
+            self.logger.error(f"Kunde inte ansluta till backend på port {port}: {e}")
+            client.close()
+            return
+
+        connection = _Connection(port, client, backend)
+        with self._lock:
+            self._active[port] = self._active.get(port, 0) + 1
+            self._connections.add(connection)
+        try:
+            upstream = threading.Thread(target=self._pump, args=(client, backend, connection, True), daemon=True)
+            upstream.start()
+            self._pump(backend, client, connection, False)
+            upstream.join()
+        finally:
+            with self._lock:
+                self._active[port] -= 1
+                self._connections.discard(connection)
+            client.close()
+            backend.close()
+
+    def _pump(self, source: socket.socket, destination: socket.socket, connection: "_Connection",
+              from_client: bool) -> None:
+        try:
+            while True:
+                data = source.recv(self.BUFFER_SIZE)
+                if not data:
+                    break
+                connection.activity(from_client)
+                destination.sendall(data)
+        except OSError:
+            pass
+        finally:
+            try:
+                destination.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+
+class _Connection:
+    """En proxad anslutning; håller reda på om ett svar är utskickat och inget nytt anrop kommit."""
+
+    def __init__(self, port: int, client: socket.socket, backend: socket.socket):
+        self.port = port
+        self.client = client
+        self.backend = backend
+        self.awaiting_response = True
+        self.last_activity = time.monotonic()
+
+    def activity(self, from_client: bool) -> None:
+        self.awaiting_response = from_client
+        self.last_activity = time.monotonic()
+
+    def is_idle(self, now: float, idle_seconds: float) -> bool:
+        return not self.awaiting_response and now - self.last_activity >= idle_seconds
+
+    def close(self) -> None:
+        for sock in (self.client, self.backend):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
@@ -1,27 +1,69 @@
 import os
 import sys
+import json
+import secrets
 import time
 import signal
-import psutil
+import shutil
 import logging
-import schedule
 import subprocess
 import threading
+import urllib.request
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 from services.backup_service import BackupService
+from services.traffic_switch import TrafficSwitch
+from utils.pid_file import read_pid_file
+from utils.scheduler import JobScheduler, WeeklyTrigger
 
 
 class UpdaterService:
-    def __init__(self, app_script: str, lock_file: str, backup_service: BackupService, logger: logging.Logger):
+    def __init__(self, app_script: str, lock_file: str, backup_service: BackupService, logger: logging.Logger,
+                 update_day: str = "monday", update_time: str = "02:00",
+                 deploy_mode: str = "restart", listen_host: str = "0.0.0.0", listen_port: int = 5000,
+                 blue_green_ports: Sequence[int] = (5001, 5002),
+                 readiness_timeout: float = 60.0, drain_timeout: float = 30.0, control_token: str = "",
+                 pid_file: str = "app.pid", supervise: bool = True,
+                 backoff_initial: float = 1.0, backoff_max: float = 60.0, stable_seconds: float = 60.0,
+                 staging_dir: str = ".update_staging"):
         self.app_script = app_script
         self.lock_file = lock_file
         self.backup_service = backup_service
         self.logger = logger
+        self.update_day = update_day
+        self.update_time = update_time
+        self.deploy_mode = deploy_mode
+        self.listen_host = listen_host
+        self.listen_port = listen_port
+        self.blue_green_ports = tuple(blue_green_ports)
+        self.readiness_timeout = readiness_timeout
+        self.drain_timeout = drain_timeout
+        # Ges till app-processerna som startas, så bara updater kan be dem lämna över. Ska vara
+        # samma mellan omstarter av updater (se utils.control_token); en slumpad token gäller bara denna körning
+        self.control_token = control_token or secrets.token_hex(16)
         self.app_process = None
+        self.active_port: Optional[int] = None
+        self.traffic_switch: Optional[TrafficSwitch] = None
+        self.scheduler: Optional[JobScheduler] = None
+        self.pid_file = pid_file
+        self.supervise = supervise
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+        self._update_in_progress = threading.Event()
+        self._adopted_pid: Optional[int] = None
+        self._app_started_at: Optional[float] = None
+        self._restart_backoff = backoff_initial
+        self._next_restart_at: Optional[float] = None
+        self.staging_dir = staging_dir
+        self.stage_timings: List[Tuple[str, float]] = []
+        self.last_time_to_ready_ms: Optional[float] = None
 
     def create_lock(self) -> bool:
+        import psutil
+
         try:
             if os.path.exists(self.lock_file):
                 self.logger.warning(f"Lock file {self.lock_file} existerar redan. Kontrollerar om process körs...")
@@ -51,20 +93,37 @@ class UpdaterService:
             self.logger.error(f"Fel vid borttagning av lock file: {e}")
 
     def find_app_process(self) -> Optional[int]:
+        """
+        Hittar app.py via PID-filen som appen skriver vid start.
+
+        Kontrollerar bara den enskilda processen i filen istället för att
+        söka igenom hela processtabellen.
+        """
+        import psutil
+
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                if proc.info['cmdline'] and len(proc.info['cmdline']) > 1:
-                    if ('python' in proc.info['name'].lower() and
-                        self.app_script in ' '.join(proc.info['cmdline'])):
-                        self.logger.info(f"Hittade app.py process: PID {proc.info['pid']}")
-                        return proc.info['pid']
-            self.logger.info("Ingen app.py process hittad")
+            info = read_pid_file(self.pid_file)
+            if info is None:
+                self.logger.info("Ingen app.py process hittad (PID-fil saknas)")
+                return None
+
+            pid = int(info["pid"])
+            try:
+                process = psutil.Process(pid)
+                if self.app_script in ' '.join(process.cmdline()):
+                    self.logger.info(f"Hittade app.py process: PID {pid}")
+                    return pid
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+
+            self.logger.info(f"PID-filen pekar på process {pid} som inte längre är app.py")
             return None
         except Exception as e:
             self.logger.error(f"Fel vid sökning efter app.py process: {e}")
             return None
 
     def stop_app_gracefully(self, pid: int, timeout: int = 30) -> bool:
+        import psutil
         from utils.exceptions import ProcessManagementError
 
         try:
@@ -137,7 +196,7 @@ class UpdaterService:
             self.logger.error(f"Oväntat fel vid versionsvalidering: {str(e)}")
             raise GitOperationError("version check", str(e))
 
-    def perform_git_update(self) -> bool:
+    def perform_git_update(self, target: Optional[str] = None) -> bool:
         from utils.exceptions import GitOperationError
 
         try:
@@ -160,9 +219,16 @@ class UpdaterService:
                 )
                 self.logger.info("Lokala ändringar stashade")
 
-            self.logger.info("Kör 'git pull origin main'...")
+            if target is not None:
+                # Commiten är redan hämtad av fetch, så bara en lokal fast-forward återstår
+                self.logger.info(f"Kör 'git merge --ff-only {target}'...")
+                command = ["git", "merge", "--ff-only", target]
+            else:
+                self.logger.info("Kör 'git pull origin main'...")
+                command = ["git", "pull", "origin", "main"]
+
             result = subprocess.run(
-                ["git", "pull", "origin", "main"],
+                command,
                 capture_output=True,
                 text=True,
                 cwd=os.getcwd()
@@ -186,30 +252,298 @@ class UpdaterService:
             self.logger.error(f"Oväntat fel vid git update: {str(e)}")
             raise GitOperationError("update", str(e))
 
+    def _spawn_app(self, port: Optional[int] = None) -> subprocess.Popen:
+        command = [sys.executable, self.app_script]
+        if port is not None:
+            command += ["--host", "127.0.0.1", "--port", str(port)]
+
+        return subprocess.Popen(
+            command,
+            cwd=os.getcwd(),
+            env=dict(os.environ, APP_CONTROL_TOKEN=self.control_token),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
     def start_app(self) -> bool:
         try:
             self.logger.info(f"Startar {self.app_script}...")
 
-            process = subprocess.Popen(
-                [sys.executable, self.app_script],
-                cwd=os.getcwd(),
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-
-            time.sleep(2)
+            process = self._spawn_app()
 
-            if process.poll() is None:
+            if self.wait_until_ready(self.listen_port, process):
+                self.app_process = process
+                self._adopted_pid = None
+                self._app_started_at = time.monotonic()
                 self.logger.info(f"App.py startad med PID {process.pid}")
                 return True
             else:
-                self.logger.error(f"App.py kunde inte startas (exit code: {process.returncode})")
+                self.logger.error(f"App.py kunde inte startas (exit code: {process.poll()})")
                 return False
 
         except Exception as e:
             self.logger.error(f"Fel vid start av app.py: {e}")
             return False
 
+    def wait_until_ready(self, port: int, process: Optional[subprocess.Popen] = None,
+                         timeout: Optional[float] = None) -> bool:
+        timeout = self.readiness_timeout if timeout is None else timeout
+        url = f"http://127.0.0.1:{port}/readyz"
+        started = time.monotonic()
+        deadline = started + timeout
+        poll_interval = 0.02
+
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                self.logger.error(f"App.py avslutades under uppstart (exit code: {process.returncode})")
+                return False
+            try:
+                with urllib.request.urlopen(url, timeout=2) as response:
+                    status = json.load(response)
+                    if response.status == 200 and status.get("ready"):
+                        self.last_time_to_ready_ms = (time.monotonic() - started) * 1000
+                        self.logger.info(
+                            f"App.py på port {port} rapporterar redo "
+                            f"(dataversion {status.get('data_version')}, "
+                            f"inläsning {status.get('store_load_ms')} ms)"
+                        )
+                        self.logger.info(f"Tid till första svar efter start: {self.last_time_to_ready_ms:.0f} ms")
+                        self._log_app_startup(status.get("startup"))
+                        return True
+            except (OSError, ValueError):
+                pass
+            # Täta försök i början där appen normalt blir redo, glesare därefter
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, 0.25)
+
+        self.logger.error(f"App.py på port {port} blev inte redo inom {timeout}s")
+        return False
+
+    def _log_app_startup(self, startup: Optional[dict]) -> None:
+        if not startup:
+            return
+        phases = ", ".join(f"{phase['name']}={phase['ms']:.0f}ms" for phase in startup.get("phases", []))
+        self.logger.info(f"App.py uppstartsfaser: {phases}")
+
+    def start_blue_green(self) -> bool:
+        """Startar trafikväxeln och första app-instansen bakom den."""
+        try:
+            self.traffic_switch = TrafficSwitch(self.listen_host, self.listen_port, self.logger)
+            self.traffic_switch.start()
+        except OSError as e:
+            self.logger.error(f"Kunde inte starta trafikväxel på port {self.listen_port}: {e}")
+            self.traffic_switch = None
+            return False
+
+        port = self.blue_green_ports[0]
+        self.logger.info(f"Startar {self.app_script} på port {port}...")
+        process = self._spawn_app(port)
+        if not self.wait_until_ready(port, process):
+            process.kill()
+            return False
+
+        self.traffic_switch.switch_to(port)
+        self.app_process = process
+        self.active_port = port
+        self._app_started_at = time.monotonic()
+        return True
+
+    def _control(self, port: int, action: str, payload: Optional[dict] = None) -> Optional[dict]:
+        """Styranrop till en app-process; None om den inte svarar (t.ex. en äldre version utan stöd)."""
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/api/control/{action}",
+            data=json.dumps(payload or {}).encode("utf-8"),
+            headers={"Content-Type": "application/json", "X-Control-Token": self.control_token},
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return json.load(response)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Styranrop {action} till port {port} misslyckades: {e}")
+            return None
+
+    def blue_green_switch(self) -> bool:
+        """
+        Startar ny version på ledig port, väntar på readiness, växlar trafik
+        och dränerar sedan den gamla processen.
+
+        Processerna delar datakatalog, så den gamla lämnar över innan trafiken
+        växlas: den slutar skriva, stoppar sina jobb och skickar resten av sina
+        anrop vidare till den nya, som läser om lagret innan den tar emot trafik.
+        Växlingen avbryts om den gamla inte bekräftar överlämningen, eller om
+        den nya inte kan ta över; då återupptar den gamla och den nya stoppas.
+        """
+        idle_port = next(port for port in self.blue_green_ports if port != self.active_port)
+
+        self.logger.info(f"Startar ny version på port {idle_port}...")
+        new_process = self._spawn_app(idle_port)
+        if not self.wait_until_ready(idle_port, new_process):
+            self.logger.error("Ny version blev aldrig redo. Gammal version fortsätter att serva.")
+            if new_process.poll() is None:
+                self.stop_app_gracefully(new_process.pid)
+            return False
+
+        old_port, old_process = self.active_port, self.app_process
+        if old_process is not None:
+            # Utan bekräftad överlämning skulle båda processerna skriva till samma filer
+            handover = self._control(old_port, "handover", {"port": idle_port})
+            if not handover or not handover.get("drained"):
+                self.logger.error(
+                    f"Gammal version på port {old_port} lämnade inte över "
+                    f"({'inget giltigt svar' if not handover else 'skrivningar pågick fortfarande'}). "
+                    f"Ny version stoppas, gammal version fortsätter att serva."
+                )
+                # Svaret kan ha uteblivit efter att överlämningen ändå gjorts; resume är ofarligt annars
+                self._control(old_port, "resume")
+                self.stop_app_gracefully(new_process.pid)
+                return False
+        if self._control(idle_port, "takeover") is None:
+            self.logger.error("Ny version kunde inte ta över lagret. Den stoppas och gammal version återupptas.")
+            if old_process is not None and self._control(old_port, "resume") is None:
+                self.logger.error(f"Gammal version på port {old_port} kunde inte återupptas")
+            self.stop_app_gracefully(new_process.pid)
+            return False
+        self.traffic_switch.switch_to(idle_port)
+        self.active_port = idle_port
+        self.app_process = new_process
+        self._app_started_at = time.monotonic()
+
+        if old_process is not None:
+            # Vilande keep-alive-anslutningar skulle annars hålla kvar klienter mot den gamla processen
+            closed = self.traffic_switch.close_idle(old_port)
+            self.logger.info(
+                f"Dränerar gammal version på port {old_port} (max {self.drain_timeout}s, "
+                f"{closed} vilande anslutningar stängda)"
+            )
+            if not self.traffic_switch.wait_for_drain(old_port, self.drain_timeout):
+                self.logger.warning(
+                    f"{self.traffic_switch.active_connections(old_port)} anslutningar kvar efter dränering"
+                )
+            self.stop_app_gracefully(old_process.pid)
+        return True
+
+    def rollback_git(self, commit: str) -> None:
+        from utils.exceptions import GitOperationError
+
+        self.logger.info(f"Återställer koden till {commit}")
+        result = subprocess.run(
+            ["git", "reset", "--hard", commit],
+            capture_output=True,
+            text=True,
+            cwd=os.getcwd()
+        )
+        if result.returncode != 0:
+            raise GitOperationError("reset", result.stderr)
+
+    @contextmanager
+    def _stage(self, name: str):
+        self.logger.info(f"Steg: {name}...")
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.stage_timings.append((name, elapsed_ms))
+            self.logger.info(f"Steg: {name} klart på {elapsed_ms:.0f} ms")
+
+    def _log_stage_timings(self) -> None:
+        if not self.stage_timings:
+            return
+        total_ms = sum(elapsed for _, elapsed in self.stage_timings)
+        summary = ", ".join(f"{name}={elapsed:.0f}ms" for name, elapsed in self.stage_timings)
+        self.logger.info(f"Uppdateringstider: {summary} (totalt {total_ms:.0f} ms)")
+
+    def prepare_staging(self, commit: str) -> str:
+        """Checkar ut nya versionen i en separat worktree medan appen fortsätter serva."""
+        from utils.exceptions import GitOperationError
+
+        self.cleanup_staging()
+        result = subprocess.run(
+            ["git", "worktree", "add", "--force", "--detach", self.staging_dir, commit],
+            capture_output=True,
+            text=True,
+            cwd=os.getcwd()
+        )
+        if result.returncode != 0:
+            raise GitOperationError("worktree add", result.stderr)
+        return self.staging_dir
+
+    def install_dependencies(self, staging_dir: str) -> bool:
+        staged_requirements = os.path.join(staging_dir, "requirements.txt")
+        if not os.path.exists(staged_requirements):
+            return True
+
+        if os.path.exists("requirements.txt"):
+            with open("requirements.txt", 'rb') as current, open(staged_requirements, 'rb') as staged:
+                if current.read() == staged.read():
+                    self.logger.info("requirements.txt oförändrad, hoppar över installation")
+                    return True
+
+        self.logger.info("requirements.txt har ändrats, installerar beroenden...")
+        result = subprocess.run(
+            [sys.executable, "-m", "pip", "install", "-q", "-r", staged_requirements],
+            capture_output=True,
+            text=True,
+            cwd=os.getcwd()
+        )
+        if result.returncode != 0:
+            self.logger.error(f"Installation av beroenden misslyckades: {result.stderr}")
+            return False
+        return True
+
+    def precompile(self, staging_dir: str) -> bool:
+        """
+        Kompilerar bytekod och provimporterar nya versionen i staging.
+
+        Hash-baserade .pyc-filer är giltiga oberoende av filernas mtime och
+        kan därför flyttas till huvudkatalogen efter växlingen.
+        """
+        result = subprocess.run(
+            [sys.executable, "-m", "compileall", "-q", "--invalidation-mode", "checked-hash", "."],
+            capture_output=True,
+            text=True,
+            cwd=staging_dir
+        )
+        if result.returncode != 0:
+            self.logger.error(f"Kompilering av ny version misslyckades: {result.stdout}{result.stderr}")
+            return False
+
+        module_name = os.path.splitext(os.path.basename(self.app_script))[0]
+        result = subprocess.run(
+            [sys.executable, "-c", f"import {module_name}"],
+            capture_output=True,
+            text=True,
+            cwd=staging_dir
+        )
+        if result.returncode != 0:
+            self.logger.error(f"Provimport av ny version misslyckades: {result.stderr}")
+            return False
+        return True
+
+    def promote_bytecode(self, staging_dir: str) -> None:
+        for root, dirs, _ in os.walk(staging_dir):
+            dirs[:] = [d for d in dirs if d != ".git"]
+            if os.path.basename(root) != "__pycache__":
+                continue
+            target_dir = os.path.join(os.getcwd(), os.path.relpath(root, staging_dir))
+            if not os.path.isdir(os.path.dirname(target_dir)):
+                continue
+            os.makedirs(target_dir, exist_ok=True)
+            for filename in os.listdir(root):
+                shutil.copy2(os.path.join(root, filename), os.path.join(target_dir, filename))
+
+    def cleanup_staging(self) -> None:
+        if os.path.exists(self.staging_dir):
+            subprocess.run(
+                ["git", "worktree", "remove", "--force", self.staging_dir],
+                capture_output=True,
+                cwd=os.getcwd()
+            )
+            if os.path.exists(self.staging_dir):
+                shutil.rmtree(self.staging_dir, ignore_errors=True)
+        subprocess.run(["git", "worktree", "prune"], capture_output=True, cwd=os.getcwd())
+
     def run_update_check(self) -> None:
         from utils.exceptions import GitOperationError, ProcessManagementError, BackupError
 
@@ -220,45 +554,81 @@ class UpdaterService:
         if not self.create_lock():
             return
 
+        self._update_in_progress.set()
+        self.stage_timings = []
         try:
-            has_update, local_hash, remote_hash = self.check_git_version()
+            with self._stage("versionskontroll (rev-parse + fetch)"):
+                has_update, local_hash, remote_hash = self.check_git_version()
 
             if not has_update:
                 self.logger.info("Ingen uppdatering behövs")
                 return
 
-            self.logger.info("Påbörjar uppdateringsprocess...")
+            self.logger.info("Påbörjar uppdateringsprocess (app.py servar under förberedelserna)...")
 
-            self.logger.info("Steg 1: Skapar backuper...")
-            version_backup = self.backup_service.create_version_backup(
-                "version_backup",
-                [self.app_script, "requirements.txt", "static", "templates", "data"]
-            )
-            if not version_backup:
-                self.logger.error("Kunde inte skapa version backup. Avbryter uppdatering.")
-                return
+            with self._stage("backuper"):
+                version_backup = self.backup_service.create_version_backup(
+                    "version_backup",
+                    [self.app_script, "requirements.txt", "static", "templates", "data"]
+                )
+                if not version_backup:
+                    self.logger.error("Kunde inte skapa version backup. Avbryter uppdatering.")
+                    return
 
-            if not self.backup_service.backup_for_update():
-                self.logger.error("Kunde inte skapa databas backup. Avbryter uppdatering.")
-                return
+                if not self.backup_service.backup_for_update():
+                    self.logger.error("Kunde inte skapa databas backup. Avbryter uppdatering.")
+                    return
 
-            self.logger.info("Steg 2: Stoppar app.py...")
-            app_pid = self.find_app_process()
-            if app_pid:
-                if not self.stop_app_gracefully(app_pid):
-                    self.logger.error("Kunde inte stoppa app.py. Avbryter uppdatering.")
+            with self._stage("staging worktree"):
+                staging_dir = self.prepare_staging(remote_hash)
+
+            with self._stage("beroenden"):
+                if not self.install_dependencies(staging_dir):
+                    self.logger.error("Avbryter uppdatering, app.py servar fortfarande gammal version.")
                     return
-            else:
-                self.logger.info("App.py körs inte, fortsätter med uppdatering")
 
-            self.logger.info("Steg 3: Uppdaterar kod från GitHub...")
-            if not self.perform_git_update():
-                self.logger.error("Git uppdatering misslyckades. Försöker starta app.py igen...")
-                self.start_app()
-                return
+            with self._stage("bytekod och provimport"):
+                if not self.precompile(staging_dir):
+                    self.logger.error("Avbryter uppdatering, app.py servar fortfarande gammal version.")
+                    return
+
+            if self.deploy_mode == "blue_green":
+                if self.traffic_switch is None:
+                    self.logger.warning("Blue/green kräver daemon-läge med trafikväxel. Använder omstart.")
+                else:
+                    with self._stage("checkout (gammal version servar)"):
+                        if not self.perform_git_update(remote_hash):
+                            return
+                        self.promote_bytecode(staging_dir)
+
+                    with self._stage("blue/green-växling"):
+                        switched = self.blue_green_switch()
+
+                    if switched:
+                        self.logger.info("Uppdateringsprocess slutförd framgångsrikt!")
+                        self.logger.info(f"Uppdaterad från {local_hash} till {remote_hash}")
+                    else:
+                        self.rollback_git(local_hash)
+                    return
+
+            with self._stage("växling (nertid)"):
+                app_pid = self.find_app_process()
+                if app_pid:
+                    if not self.stop_app_gracefully(app_pid):
+                        self.logger.error("Kunde inte stoppa app.py. Avbryter uppdatering.")
+                        return
+                else:
+                    self.logger.info("App.py körs inte, fortsätter med uppdatering")
+
+                if not self.perform_git_update(remote_hash):
+                    self.logger.error("Git uppdatering misslyckades. Försöker starta app.py igen...")
+                    self.start_app()
+                    return
+                self.promote_bytecode(staging_dir)
 
-            self.logger.info("Steg 4: Startar app.py...")
-            if self.start_app():
+                started = self.start_app()
+
+            if started:
                 self.logger.info("Uppdateringsprocess slutförd framgångsrikt!")
                 self.logger.info(f"Uppdaterad från {local_hash} till {remote_hash}")
             else:
@@ -273,25 +643,73 @@ class UpdaterService:
         except Exception as e:
             self.logger.error(f"Oväntat fel under uppdateringsprocess: {e}")
         finally:
+            self.cleanup_staging()
+            self._log_stage_timings()
+            self._update_in_progress.clear()
             self.remove_lock()
             self.logger.info("=" * 50)
             self.logger.info("Uppdateringskontroll slutförd")
             self.logger.info("=" * 50)
 
-    def schedule_weekly_updates(self) -> None:
-        self.logger.info("Schemaläggning: Varje måndag kl 02:00")
-        schedule.every().monday.at("02:00").do(self.run_update_check)
+    def _app_alive(self) -> bool:
+        if self.app_process is not None:
+            return self.app_process.poll() is None
+        if self._adopted_pid is not None:
+            import psutil
+            return psutil.pid_exists(self._adopted_pid)
+        return False
+
+    def _restart_crashed_app(self) -> bool:
+        if self.traffic_switch is not None and self.active_port is not None:
+            process = self._spawn_app(self.active_port)
+            if not self.wait_until_ready(self.active_port, process):
+                return False
+            self.app_process = process
+            self._app_started_at = time.monotonic()
+            return True
+        return self.start_app()
 
-        while True:
-            try:
-                schedule.run_pending()
-                time.sleep(60)
-            except KeyboardInterrupt:
-                self.logger.info("Updater service stoppas av användare")
-                break
-            except Exception as e:
-                self.logger.error(f"Fel i schemaläggare: {e}")
-                time.sleep(60)
+    def supervise_app(self) -> None:
+        """
+        Kontrollerar att app.py lever och startar om den vid krasch.
+
+        Omstarter sker med exponentiell backoff; backoff nollställs när
+        appen har varit uppe längre än stable_seconds.
+        """
+        if self._update_in_progress.is_set():
+            return
+
+        now = time.monotonic()
+        if self._app_alive():
+            if self._app_started_at is not None and now - self._app_started_at >= self.stable_seconds:
+                self._restart_backoff = self.backoff_initial
+            return
+
+        if self._next_restart_at is None:
+            exit_code = self.app_process.poll() if self.app_process is not None else None
+            self.logger.error(
+                f"App.py har avslutats oväntat (exit code: {exit_code}). "
+                f"Startar om om {self._restart_backoff:g}s"
+            )
+            self._next_restart_at = now + self._restart_backoff
+            return
+
+        if now < self._next_restart_at:
+            return
+
+        self._next_restart_at = None
+        if self._restart_crashed_app():
+            self.logger.info("App.py omstartad av övervakaren")
+        else:
+            self._restart_backoff = min(self._restart_backoff * 2, self.backoff_max)
+            self._next_restart_at = time.monotonic() + self._restart_backoff
+            self.logger.error(f"Omstart misslyckades, nytt försök om {self._restart_backoff:g}s")
+
+    def schedule_weekly_updates(self) -> JobScheduler:
+        scheduler = JobScheduler(self.logger, max_workers=1)
+        scheduler.add_job("update_check", self.run_update_check, WeeklyTrigger(self.update_day, self.update_time))
+        scheduler.start()
+        return scheduler
 
     def run_daemon(self) -> None:
         self.logger.info("Startar UpdaterService som daemon")
@@ -299,18 +717,38 @@ class UpdaterService:
         def signal_handler(signum, frame):
             self.logger.info(f"Mottagen signal {signum}. Stänger av gracefully...")
             self.remove_lock()
+            if self.traffic_switch is not None:
+                self.traffic_switch.stop()
+                if self.app_process is not None and self.app_process.poll() is None:
+                    self.stop_app_gracefully(self.app_process.pid)
             sys.exit(0)
 
         signal.signal(signal.SIGTERM, signal_handler)
         signal.signal(signal.SIGINT, signal_handler)
 
-        scheduler_thread = threading.Thread(target=self.schedule_weekly_updates, daemon=True)
-        scheduler_thread.start()
+        if self.deploy_mode == "blue_green":
+            if self.start_blue_green():
+                self.logger.info(f"Blue/green-läge aktivt: app.py servar via port {self.listen_port}")
+            else:
+                self.logger.error("Kunde inte starta blue/green-läge, uppdateringar görs med omstart")
+
+        if self.supervise and self.traffic_switch is None:
+            existing_pid = self.find_app_process()
+            if existing_pid is not None:
+                self._adopted_pid = existing_pid
+                self._app_started_at = time.monotonic()
+                self.logger.info(f"Övervakar befintlig app.py process {existing_pid}")
+            elif not self.start_app():
+                self.logger.error("Kunde inte starta app.py, övervakaren försöker igen")
+
+        self.scheduler = self.schedule_weekly_updates()
 
         self.logger.info("UpdaterService daemon startad")
 
         try:
             while True:
+                if self.supervise:
+                    self.supervise_app()
                 time.sleep(1)
         except KeyboardInterrupt:
             self.logger.info("Daemon stoppas")
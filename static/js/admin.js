@@ -114,6 +114,34 @@ document.getElementById('addForm').addEventListener('submit', function(e) {
     .finally(hideSpinner);
 });
 
+// Importera CSV/XLSX
+document.getElementById('importForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const file = document.getElementById('importFile').files[0];
+    if (!file) return;
+    const skipInvalid = document.getElementById('importSkipInvalid').checked;
+    const formData = new FormData();
+    formData.append('file', file);
+
+    showSpinner();
+    fetch(`/api/inventory/import${skipInvalid ? '?skip_invalid=1' : ''}`, { method: 'POST', body: formData })
+        .then(response => response.json().then(data => ({ ok: response.ok, data })))
+        .then(({ ok, data }) => {
+            if (!data.import) throw new Error(data.error || "Importen misslyckades");
+            const result = data.import;
+            if (!ok) {
+                const first = result.errors[0];
+                showToast(`${result.invalid} ogiltiga rader, inget importerat (första felet på rad ${first.row}: ${Object.values(first.errors).join(', ')})`, "warning");
+                return;
+            }
+            showToast(`Import klar: ${result.added} tillagda, ${result.updated} uppdaterade, ${result.unchanged} oförändrade, ${result.invalid} ogiltiga`, "success");
+            this.reset();
+            loadInventory();
+        })
+        .catch(error => showToast(error.message || "Fel vid import", "danger"))
+        .finally(hideSpinner);
+});
+
 // Event delegation för ändringar i tabellen
 document.getElementById('inventoryTable').addEventListener('change', function(e) {
     const target = e.target;
@@ -10,10 +10,18 @@ document.addEventListener('DOMContentLoaded', function() {
     setInterval(loadDashboard, 3000);
 });
 
+// Skärmens profil väljs med ?profile=namn i URL:en, annars används standardprofilen
+const dashboardProfile = new URLSearchParams(window.location.search).get('profile') || 'default';
+
 // Funktion för att ladda och rendera dashboarden
 function loadDashboard() {
-    // Hämta lagerdata från API:et
-    fetch('/api/inventory')
+    if (useServerFragments()) {
+        loadDashboardFragments();
+        return;
+    }
+
+    // Hämta färdiggrupperad och sorterad lagerdata för profilen
+    fetch(`/api/dashboard/${encodeURIComponent(dashboardProfile)}/inventory`)
         .then(response => {
             // Kontrollera HTTP-status
             if (!response.ok) {
@@ -27,113 +35,79 @@ function loadDashboard() {
             }
             return response.json(); // Konvertera svaret till JSON
         })
-        .then(data => {
-            // Skapa ett objekt för att gruppera data efter "Brand" och "product_family"
-            const brands = {};
-            data.forEach(item => {
-                const brand = item.Brand || 'Okänd'; // Använd "Okänd" om "Brand" saknas
-                if (!brands[brand]) {
-                    brands[brand] = {}; // Skapa en ny grupp för detta "Brand" om den inte redan finns
-                }
-                if (!brands[brand][item.product_family]) {
-                    brands[brand][item.product_family] = []; // Skapa en ny grupp för produktfamiljen om den inte redan finns
-                }
-                brands[brand][item.product_family].push(item); // Lägg till produkten i rätt grupp
-            });
-
-            // Rendera alla brands dynamiskt
-            let brandKeys = Object.keys(brands);
-
-            // Sortera brands baserat på prioritering
-            if (currentSettings.brandPriority && currentSettings.brandPriority.trim() !== '') {
-                const priorityList = currentSettings.brandPriority
-                    .split(',')
-                    .map(b => b.trim())
-                    .filter(b => b !== '');
-
-                // Separera prioriterade och icke-prioriterade brands
-                const prioritizedBrands = [];
-                const otherBrands = [];
-
-                brandKeys.forEach(brand => {
-                    const priorityIndex = priorityList.findIndex(
-                        p => p.toLowerCase() === brand.toLowerCase()
-                    );
-                    if (priorityIndex !== -1) {
-                        prioritizedBrands.push({ name: brand, index: priorityIndex });
-                    } else {
-                        otherBrands.push(brand);
-                    }
-                });
-
-                // Sortera prioriterade brands enligt ordningen i listan
-                prioritizedBrands.sort((a, b) => a.index - b.index);
-
-                // Kombinera: prioriterade först, sedan övriga
-                brandKeys = [...prioritizedBrands.map(b => b.name), ...otherBrands];
-            }
-
+        .then(payload => {
             const container = document.getElementById('brandsContainer');
             container.innerHTML = ''; // Rensa befintligt innehåll
 
-            // Skapa en sektion för varje brand
-            brandKeys.forEach(brandName => {
+            // Servern har redan grupperat Brand → product_family och sorterat enligt profilens prioritering
+            payload.brands.forEach(brand => {
                 const brandSection = document.createElement('div');
                 brandSection.className = 'brand-section';
                 brandSection.innerHTML = `
-                    <h2>${brandName}</h2>
-                    <div class="brand-content" id="brand-${brandName.replace(/\s+/g, '-')}"></div>
+                    <h2>${brand.name}</h2>
+                    <div class="brand-content" id="brand-${brand.name.replace(/\s+/g, '-')}"></div>
                 `;
                 container.appendChild(brandSection);
 
                 // Rendera brand-sektionen
-                renderBrandSection(`brand-${brandName.replace(/\s+/g, '-')}`, brands[brandName]);
+                renderBrandSection(`brand-${brand.name.replace(/\s+/g, '-')}`, brand.families);
             });
         })
         .catch(error => {
             // Hantera fel vid hämtning av data
             console.error('Fel vid laddning av dashboard:', error);
+            document.getElementById('brandsContainer').innerHTML = `<p class="text-danger">${dashboardErrorMessage(error)}</p>`;
+        });
+}
 
-            let userMessage = 'Kunde inte ladda dashboard. ';
-
-            // Bestäm användarvänligt felmeddelande baserat på feltyp
-            if (error.message === 'NOTFOUND') {
-                userMessage += 'Kan inte hitta lagerfilen (inventory.json).';
-            } else if (error.message === 'SERVERERROR') {
-                userMessage += 'Serverfel uppstod. Kontakta administratör.';
-            } else if (error.message.startsWith('HTTP')) {
-                userMessage += `Serverfel (${error.message.replace('HTTP', 'Error ')}).`;
-            } else if (error.message.includes('JSON')) {
-                userMessage += 'Lagerfilen innehåller ogiltiga data.';
-            } else if (error instanceof TypeError && error.message.includes('fetch')) {
-                userMessage += 'Kan inte nå servern. Kontrollera nätverksanslutningen.';
-            } else if (error.name === 'NetworkError' || !navigator.onLine) {
-                userMessage += 'Ingen nätverksanslutning.';
-            } else {
-                userMessage += 'Ett oväntat fel uppstod. Försök igen senare.';
-            }
-
-            document.getElementById('brandsContainer').innerHTML = `<p class="text-danger">${userMessage}</p>`;
+// Serverrenderat läge: byt bara ut de brand-sektioner som ändrats
+function loadDashboardFragments() {
+    const container = document.getElementById('brandsContainer');
+    refreshFragments(container, `/api/dashboard/${encodeURIComponent(dashboardProfile)}/fragments`)
+        .catch(error => {
+            console.error('Fel vid laddning av dashboard:', error);
+            delete container.dataset.fragmentVersion; // Hämta alla fragment igen vid nästa uppdatering
+            container.innerHTML = `<p class="text-danger">${dashboardErrorMessage(error)}</p>`;
         });
 }
 
+// Bestäm användarvänligt felmeddelande baserat på feltyp
+function dashboardErrorMessage(error) {
+    let userMessage = 'Kunde inte ladda dashboard. ';
+
+    if (error.message === 'NOTFOUND' || error.message === 'HTTP404') {
+        userMessage += 'Kan inte hitta lagerfilen (inventory.json).';
+    } else if (error.message === 'SERVERERROR' || error.message === 'HTTP500') {
+        userMessage += 'Serverfel uppstod. Kontakta administratör.';
+    } else if (error.message.startsWith('HTTP')) {
+        userMessage += `Serverfel (${error.message.replace('HTTP', 'Error ')}).`;
+    } else if (error.message.includes('JSON')) {
+        userMessage += 'Lagerfilen innehåller ogiltiga data.';
+    } else if (error instanceof TypeError && error.message.includes('fetch')) {
+        userMessage += 'Kan inte nå servern. Kontrollera nätverksanslutningen.';
+    } else if (error.name === 'NetworkError' || !navigator.onLine) {
+        userMessage += 'Ingen nätverksanslutning.';
+    } else {
+        userMessage += 'Ett oväntat fel uppstod. Försök igen senare.';
+    }
+    return userMessage;
+}
+
 // Funktion för att rendera en brand-sektion med tre kolumner
-function renderBrandSection(sectionId, brandData) {
+function renderBrandSection(sectionId, families) {
     const section = document.getElementById(sectionId);
     section.innerHTML = ''; // Rensa innehållet i sektionen
 
-    // Hämta alla produktfamiljer för detta brand
-    const familyKeys = Object.keys(brandData);
-
     // Loopa genom produktfamiljerna i grupper om 3
-    for (let i = 0; i < familyKeys.length; i += 3) {
-        const rowGroup = familyKeys.slice(i, i + 3); // Skapa en grupp med upp till 3 produktfamiljer
+    for (let i = 0; i < families.length; i += 3) {
+        const rowGroup = families.slice(i, i + 3); // Skapa en grupp med upp till 3 produktfamiljer
         const rowDiv = document.createElement('div');
         rowDiv.className = 'row mb-3'; // Bootstrap-klass för att skapa en rad
 
         // Loopa genom varje produktfamilj i gruppen
-        rowGroup.forEach(family => {
-            const items = brandData[family]; // Hämta alla reservdelar för denna produktfamilj
+        rowGroup.forEach(familyGroup => {
+            const family = familyGroup.name;
+            const items = familyGroup.items; // Alla reservdelar för denna produktfamilj
             const colDiv = document.createElement('div');
             colDiv.className = 'col-md-4'; // Bootstrap-klass för att skapa en kolumn (3 kolumner per rad)
 
@@ -147,9 +121,8 @@ function renderBrandSection(sectionId, brandData) {
 
             // Loopa genom alla reservdelar i produktfamiljen
             items.forEach(item => {
-                // Bestäm status baserat på kvantitet (låg, normal, hög)
-                const status = item.quantity <= item.low_status ? 'low' :
-                               item.quantity >= item.high_status ? 'high' : 'mid';
+                // Status (låg, normal, hög) är beräknad på servern
+                const status = item.status;
 
                 // Skapa ett element för reservdelen
                 const spareDiv = document.createElement('div');
@@ -187,8 +160,8 @@ function initializeSettings() {
     const sparePartsGroup = document.getElementById('sparePartsGroup');
     const resetSettings = document.getElementById('resetSettings');
 
-    // Ladda sparade inställningar
-    loadSettings();
+    // Ladda sparade inställningar och följ ändringar från andra skärmar
+    subscribeSettings();
 
     // Toggle settings panel
     settingsBtn.addEventListener('click', function(e) {
@@ -305,10 +278,15 @@ function saveSettings() {
         compact: document.getElementById('compactMode').checked,
         horizontal: document.getElementById('horizontalMode').checked,
         brandsPerRow: parseInt(document.getElementById('brandsPerRowSlider').value),
-        sparePartsPerRow: parseInt(document.getElementById('sparePartsSlider').value)
+        sparePartsPerRow: parseInt(document.getElementById('sparePartsSlider').value),
+        brandFilter: currentSettings.brandFilter || ''
     };
     
-    fetch('/api/settings', {
+    const settingsUrl = dashboardProfile === 'default'
+        ? '/api/settings'
+        : `/api/settings/profiles/${encodeURIComponent(dashboardProfile)}`;
+
+    fetch(settingsUrl, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -317,7 +295,7 @@ function saveSettings() {
     })
     .then(response => response.json())
     .then(data => {
-        if (data.message === 'Settings saved') {
+        if (data.message === 'Settings saved' || data.message === 'Profile saved') {
             console.log('Inställningar sparade på servern');
         } else {
             console.error('Fel vid sparning av inställningar:', data);
@@ -330,38 +308,10 @@ function saveSettings() {
 
 // Ladda inställningar från servern
 function loadSettings() {
-    fetch('/api/settings')
+    fetch(`/api/settings/profiles/${encodeURIComponent(dashboardProfile)}`)
         .then(response => response.json())
         .then(settings => {
-            // Uppdatera UI-kontroller
-            document.getElementById('scaleSlider').value = settings.scale || 100;
-            document.getElementById('columnsSlider').value = settings.columns || 3;
-            document.getElementById('brandPriority').value = settings.brandPriority || '';
-            document.getElementById('compactMode').checked = settings.compact || false;
-            document.getElementById('horizontalMode').checked = settings.horizontal || false;
-            document.getElementById('brandsPerRowSlider').value = settings.brandsPerRow || 3;
-            document.getElementById('sparePartsSlider').value = settings.sparePartsPerRow || 5;
-
-            // Uppdatera värde-display
-            document.getElementById('scaleValue').textContent = (settings.scale || 100) + '%';
-            document.getElementById('columnsValue').textContent = settings.columns || 3;
-            document.getElementById('brandsPerRowValue').textContent = settings.brandsPerRow || 3;
-            document.getElementById('sparePartsValue').textContent = settings.sparePartsPerRow || 5;
-
-            // Visa/dölj horisontella inställningar baserat på horizontal-läge
-            const brandsPerRowGroup = document.getElementById('brandsPerRowGroup');
-            const sparePartsGroup = document.getElementById('sparePartsGroup');
-            if (settings.horizontal) {
-                brandsPerRowGroup.style.display = 'block';
-                sparePartsGroup.style.display = 'block';
-            } else {
-                brandsPerRowGroup.style.display = 'none';
-                sparePartsGroup.style.display = 'none';
-            }
-
-            // Tillämpa inställningarna
-            applySettings(settings);
-
+            renderSettings(settings);
             console.log('Inställningar laddade från servern');
         })
         .catch(error => {
@@ -379,6 +329,60 @@ function loadSettings() {
         });
 }
 
+// Prenumerera på inställningsändringar istället för att hämta om dem
+function subscribeSettings() {
+    if (typeof EventSource === 'undefined') {
+        loadSettings();
+        return;
+    }
+
+    // Första händelsen innehåller aktuella inställningar; EventSource återansluter själv vid avbrott
+    const source = new EventSource(`/api/settings/stream?profile=${encodeURIComponent(dashboardProfile)}`);
+    source.addEventListener('settings', function(event) {
+        const settings = JSON.parse(event.data);
+        if (!settings) {
+            return; // Profilen finns inte (längre)
+        }
+        renderSettings(settings);
+        loadDashboard();
+    });
+    source.onerror = function() {
+        console.warn('Inställningsströmmen avbröts, återansluter...');
+    };
+}
+
+// Uppdatera kontroller och layout från inställningar
+function renderSettings(settings) {
+    // Uppdatera UI-kontroller
+    document.getElementById('scaleSlider').value = settings.scale || 100;
+    document.getElementById('columnsSlider').value = settings.columns || 3;
+    document.getElementById('brandPriority').value = settings.brandPriority || '';
+    document.getElementById('compactMode').checked = settings.compact || false;
+    document.getElementById('horizontalMode').checked = settings.horizontal || false;
+    document.getElementById('brandsPerRowSlider').value = settings.brandsPerRow || 3;
+    document.getElementById('sparePartsSlider').value = settings.sparePartsPerRow || 5;
+
+    // Uppdatera värde-display
+    document.getElementById('scaleValue').textContent = (settings.scale || 100) + '%';
+    document.getElementById('columnsValue').textContent = settings.columns || 3;
+    document.getElementById('brandsPerRowValue').textContent = settings.brandsPerRow || 3;
+    document.getElementById('sparePartsValue').textContent = settings.sparePartsPerRow || 5;
+
+    // Visa/dölj horisontella inställningar baserat på horizontal-läge
+    const brandsPerRowGroup = document.getElementById('brandsPerRowGroup');
+    const sparePartsGroup = document.getElementById('sparePartsGroup');
+    if (settings.horizontal) {
+        brandsPerRowGroup.style.display = 'block';
+        sparePartsGroup.style.display = 'block';
+    } else {
+        brandsPerRowGroup.style.display = 'none';
+        sparePartsGroup.style.display = 'none';
+    }
+
+    // Tillämpa inställningarna
+    applySettings(settings);
+}
+
 // Tillämpa inställningar på UI
 function applySettings(settings) {
     // Spara inställningar globalt för användning i loadDashboard
@@ -0,0 +1,77 @@
+// Serverrenderade fragment: byter bara ut de grupper som ändrats sedan förra versionen
+
+// Sant när sidan renderades med render_mode = 'server'
+function useServerFragments() {
+    return document.body.dataset.renderMode === 'server';
+}
+
+// Hämta fragment för en vy och applicera dem i container; isCurrent kan stoppa ett svar som hunnit bli inaktuellt
+function refreshFragments(container, url, isCurrent = () => true) {
+    const since = container.dataset.fragmentVersion;
+    const requestUrl = since ? `${url}${url.includes('?') ? '&' : '?'}since=${encodeURIComponent(since)}` : url;
+
+    return fetch(requestUrl)
+        .then(response => {
+            if (response.status === 204) {
+                return null; // Inget har ändrats
+            }
+            if (!response.ok) {
+                throw new Error(`HTTP${response.status}`);
+            }
+            return response.json();
+        })
+        .then(payload => {
+            if (!isCurrent()) {
+                return null;
+            }
+            if (payload) {
+                applyFragments(container, payload);
+            }
+            return payload;
+        });
+}
+
+// Lägg in ändrade fragment på plats och ordna elementen enligt payload.order
+function applyFragments(container, payload) {
+    if (payload.full) {
+        container.innerHTML = '';
+    }
+
+    const existing = new Map();
+    Array.from(container.children).forEach(element => {
+        if (element.dataset.fragmentKey !== undefined) {
+            existing.set(element.dataset.fragmentKey, element);
+        } else {
+            element.remove();
+        }
+    });
+
+    let previous = null;
+    payload.order.forEach(key => {
+        let element = existing.get(key);
+        existing.delete(key);
+
+        if (key in payload.fragments) {
+            const template = document.createElement('template');
+            template.innerHTML = payload.fragments[key].trim();
+            const fresh = template.content.firstElementChild;
+            if (element) {
+                element.replaceWith(fresh);
+            }
+            element = fresh;
+        }
+        if (!element) {
+            return;
+        }
+
+        const expected = previous ? previous.nextElementSibling : container.firstElementChild;
+        if (element !== expected) {
+            container.insertBefore(element, expected);
+        }
+        previous = element;
+    });
+
+    // Grupper som inte längre finns
+    existing.forEach(element => element.remove());
+    container.dataset.fragmentVersion = payload.version;
+}
@@ -1,29 +1,85 @@
-let inventoryData = [];
+const PAGE_SIZE = 100; // Rader per sida när ingen sökning är aktiv
+const SEARCH_LIMIT = 200; // Fler träffar än så visas inte; användaren får förfina sökningen
+let tableOffset = 0;
+let formItems = []; // Artiklarna i vald kund och produktfamilj
 let deleteId = null;
+let searchRequestId = 0;
+let searchTimer = null;
 const deleteToast = new bootstrap.Toast(document.getElementById('deleteToast'));
 
 // Ladda inventariet när sidan laddas
 function loadInventory() {
-    fetch('/api/inventory')
+    updateBrandDropdown(); // Uppdatera dropdown för kunder
+    // Tabellen visar en sida i taget eller sökträffarna - aldrig hela lagret
+    performSearch();
+}
+
+// Hämta en sida av lagret, sorterad på produktfamilj och reservdel
+function loadPage(offset, requestId) {
+    fetch(`/api/inventory/page?offset=${offset}&limit=${PAGE_SIZE}`)
         .then(response => response.json())
         .then(data => {
-            inventoryData = data.sort((a, b) => a.product_family.localeCompare(b.product_family) || a.spare_part.localeCompare(b.spare_part));
-            updateTable();
-            updateBrandDropdown(); // Uppdatera dropdown för kunder
+            if (requestId !== searchRequestId || reloadIfPageGone(data)) return;
+            updateTable(data.items);
+            reportRows('', data.offset, data.items.length, data.total);
         })
         .catch(error => console.error('Fel vid laddning av inventarie:', error));
 }
 
-// Uppdatera tabellen med filtrerad data
-function updateTable(filter = '') {
+// Serverrenderat läge: sidan eller sökträffarna som färdiga rader; bara ändrade rader byts ut
+function loadTableFragments(query, requestId) {
+    const tableBody = document.getElementById('inventoryTable');
+    const url = query
+        ? `/api/inventory/fragments?q=${encodeURIComponent(query)}&limit=${SEARCH_LIMIT}`
+        : `/api/inventory/fragments?offset=${tableOffset}&limit=${PAGE_SIZE}`;
+    refreshFragments(tableBody, url, () => requestId === searchRequestId)
+        .then(payload => {
+            if (!payload || reloadIfPageGone(payload)) return;
+            reportRows(query, payload.offset, payload.order.length, payload.total);
+        })
+        .catch(error => {
+            console.error('Fel vid laddning av tabellrader:', error);
+            delete tableBody.dataset.fragmentVersion;
+        });
+}
+
+// Sidan kan ha försvunnit om objekt raderats; gå då till sista sidan
+function reloadIfPageGone(page) {
+    if (page.offset === 0 || page.offset < page.total) return false;
+    tableOffset = Math.max(0, Math.floor((page.total - 1) / PAGE_SIZE) * PAGE_SIZE);
+    performSearch();
+    return true;
+}
+
+// Bläddra en sida framåt (1) eller bakåt (-1)
+function changePage(direction) {
+    tableOffset = Math.max(0, tableOffset + direction * PAGE_SIZE);
+    performSearch();
+}
+
+// Visa vad tabellen innehåller och om det finns fler rader än de som visas
+function reportRows(query, offset, shown, total) {
+    if (query) {
+        updateTableStatus(total > shown
+            ? `Visar de ${shown} bästa av ${total} träffar - förfina sökningen för att se fler`
+            : (total === 0 ? 'Inga träffar' : `${total} träffar`));
+        return;
+    }
+    updateTableStatus(total === 0 ? 'Lagret är tomt' : `Visar ${offset + 1}–${offset + shown} av ${total} reservdelar`,
+        offset > 0, offset + shown < total);
+}
+
+function updateTableStatus(text, hasPrevious = false, hasNext = false) {
+    document.getElementById('tableStatusText').textContent = text;
+    document.getElementById('previousPage').hidden = !hasPrevious;
+    document.getElementById('nextPage').hidden = !hasNext;
+}
+
+// Uppdatera tabellen med raderna att visa (klientrenderat läge)
+function updateTable(items) {
     const tableBody = document.getElementById('inventoryTable');
     tableBody.innerHTML = '';
-    const filteredData = filter 
-        ? inventoryData.filter(item => 
-            item.product_family.toLowerCase().includes(filter.toLowerCase()) || 
-            item.spare_part.toLowerCase().includes(filter.toLowerCase()))
-        : inventoryData;
-    filteredData.forEach(item => {
+    items.forEach(item => {
         const row = `<tr class="${getStatusClass(item)}">
             <td>${item.id}</td>
             <td>${item.product_family}</td>
@@ -37,34 +93,38 @@ function updateTable(filter = '') {
     });
 }
 
+// Hämta val för formuläret; servern skickar bara det som dropdownerna behöver
+function fetchOptions(params = {}) {
+    const query = new URLSearchParams(params).toString();
+    return fetch(`/api/inventory/options${query ? '?' + query : ''}`).then(response => response.json());
+}
+
+// Fyll en dropdown och behåll valet om det fortfarande finns
+function fillDropdown(dropdown, placeholder, values) {
+    const selected = dropdown.value;
+    dropdown.innerHTML = `<option value="" disabled selected>${placeholder}</option>`;
+    values.forEach(value => {
+        const option = document.createElement('option');
+        option.value = value;
+        option.textContent = value;
+        dropdown.appendChild(option);
+    });
+    if (selected && values.includes(selected)) {
+        dropdown.value = selected;
+    }
+}
+
 // Uppdatera dropdown för kunder
 function updateBrandDropdown() {
     const brandDropdown = document.getElementById('brand');
     if (!brandDropdown) return; // Om dropdown inte finns, avbryt
 
-    // Hämta unika kunder från inventariet
-    const brands = [...new Set(inventoryData.map(item => item.Brand || 'Okänd'))];
-    brandDropdown.innerHTML = '<option value="" disabled selected>Välj kund</option>';
-
-    // Lägg till varje kund i dropdown
-    brands.forEach(brand => {
-        const option = document.createElement('option');
-        option.value = brand;
-        option.textContent = brand;
-        brandDropdown.appendChild(option);
-    });
-
-    // Uppdatera produktfamilj och reservdel när kund ändras
-    brandDropdown.addEventListener('change', () => {
-        updateProductFamilyDropdown();
-        updateSparePartDropdown();
-        
-        // Visuell feedback när kund väljs
-        brandDropdown.classList.add('is-valid');
-        
-        // Visa tom lagerstatus tills komplett val gjorts
-        updateStockStatusInForm();
-    });
+    fetchOptions()
+        .then(data => {
+            fillDropdown(brandDropdown, 'Välj kund', data.brands);
+            updateProductFamilyDropdown();
+        })
+        .catch(error => console.error('Fel vid laddning av kunder:', error));
 }
 
 // Uppdatera dropdown för produktfamiljer baserat på vald kund
@@ -73,31 +133,17 @@ function updateProductFamilyDropdown() {
     if (!productFamilyDropdown) return; // Om dropdown inte finns, avbryt
 
     const selectedBrand = document.getElementById('brand').value;
-    const productFamilies = [...new Set(
-        inventoryData
-            .filter(item => item.Brand === selectedBrand)
-            .map(item => item.product_family)
-    )];
-    productFamilyDropdown.innerHTML = '<option value="" disabled selected>Välj produktfamilj</option>';
-
-    // Lägg till varje produktfamilj i dropdown
-    productFamilies.forEach(family => {
-        const option = document.createElement('option');
-        option.value = family;
-        option.textContent = family;
-        productFamilyDropdown.appendChild(option);
-    });
-
-    // Uppdatera reservdel när produktfamilj ändras
-    productFamilyDropdown.addEventListener('change', () => {
+    if (!selectedBrand) {
+        fillDropdown(productFamilyDropdown, 'Välj produktfamilj', []);
         updateSparePartDropdown();
-        
-        // Visuell feedback när produktfamilj väljs
-        productFamilyDropdown.classList.add('is-valid');
-        
-        // Visa tom lagerstatus tills komplett val gjorts
-        updateStockStatusInForm();
-    });
+        return;
+    }
+    fetchOptions({ brand: selectedBrand })
+        .then(data => {
+            fillDropdown(productFamilyDropdown, 'Välj produktfamilj', data.product_families);
+            updateSparePartDropdown();
+        })
+        .catch(error => console.error('Fel vid laddning av produktfamiljer:', error));
 }
 
 // Uppdatera dropdown för reservdelar baserat på vald produktfamilj
@@ -105,30 +151,27 @@ function updateSparePartDropdown() {
     const sparePartDropdown = document.getElementById('spare_part');
     if (!sparePartDropdown) return; // Om dropdown inte finns, avbryt
 
+    const selectedBrand = document.getElementById('brand').value;
     const selectedProductFamily = document.getElementById('product_family').value;
-    const spareParts = [...new Set(
-        inventoryData
-            .filter(item => item.product_family === selectedProductFamily)
-            .map(item => item.spare_part)
-    )];
-    sparePartDropdown.innerHTML = '<option value="" disabled selected>Välj reservdel</option>';
-
-    // Lägg till varje reservdel i dropdown
-    spareParts.forEach(part => {
-        const option = document.createElement('option');
-        option.value = part;
-        option.textContent = part;
-        sparePartDropdown.appendChild(option);
-    });
-    
-    // Lägg till händelseavlyssnare för att visa lagerstatus när reservdel väljs
-    sparePartDropdown.addEventListener('change', () => {
-        // Visuell feedback när reservdel väljs
-        sparePartDropdown.classList.add('is-valid');
-        
-        // Visa aktuell lagerstatus för vald artikel
+    if (!selectedBrand || !selectedProductFamily) {
+        formItems = [];
+        fillDropdown(sparePartDropdown, 'Välj reservdel', []);
         updateStockStatusInForm();
-    });
+        return;
+    }
+    fetchOptions({ brand: selectedBrand, product_family: selectedProductFamily })
+        .then(data => {
+            formItems = data.items;
+            fillDropdown(sparePartDropdown, 'Välj reservdel', formItems.map(item => item.spare_part));
+            updateStockStatusInForm();
+        })
+        .catch(error => console.error('Fel vid laddning av reservdelar:', error));
+}
+
+// Artikeln som motsvarar valen i formuläret
+function selectedFormItem() {
+    const sparePart = document.getElementById('spare_part').value;
+    return formItems.find(item => item.spare_part === sparePart);
 }
 
 // Ny funktion: Visa aktuell lagerstatus i formuläret
@@ -140,12 +183,8 @@ function updateStockStatusInForm() {
     
     // Endast visa lagerstatus om alla val är gjorda
     if (brand && productFamily && sparePart) {
-        // Hitta artikeln i inventariedata
-        const selectedItem = inventoryData.find(item => 
-            item.Brand === brand && 
-            item.product_family === productFamily && 
-            item.spare_part === sparePart
-        );
+        // Hitta artikeln bland valen för produktfamiljen
+        const selectedItem = selectedFormItem();
         
         if (selectedItem) {
             // Bestäm statusnivå och CSS-klass
@@ -192,15 +231,14 @@ function subtractItem(id) {
         body: JSON.stringify({ quantity: 1 }) 
     })
     .then(response => {
-        if (response.ok) {
-            loadInventory();
-            const item = inventoryData.find(item => item.id === id);
-            if (item) {
-                showToast(`Tagit: ${item.product_family} - ${item.spare_part} - 1`, 'error'); 
-            }
-        } else {
+        if (!response.ok) {
             console.error('Fel vid minskning av reservdel');
+            return;
         }
+        return response.json().then(data => {
+            loadInventory();
+            showToast(`Tagit: ${data.item.product_family} - ${data.item.spare_part} - 1`, 'error');
+        });
     })
     .catch(error => console.error('Fel vid minskning av reservdel:', error));
 }
@@ -217,11 +255,7 @@ function subtractFromForm() {
     }
     
     // Hitta artikel i lager
-    const item = inventoryData.find(item => 
-        item.Brand === brand && 
-        item.product_family === product_family && 
-        item.spare_part === spare_part
-    );
+    const item = selectedFormItem();
     
     if (item) {
         subtractItem(item.id);
@@ -290,15 +324,52 @@ function showToast(message, type = 'info') {
 // Funktion för att rensa sökfältet
 function clearSearch() {
     document.getElementById('searchInput').value = '';
-    updateTable(); // Uppdatera tabellen
+    performSearch();
 }
 
-// Funktion för att utföra sökning
+// Funktion för att utföra sökning; servern söker feltolerant och rangordnar träffarna
 function performSearch() {
-    const searchValue = document.getElementById('searchInput').value;
-    updateTable(searchValue); // Uppdatera tabellen med sökterm
+    const query = document.getElementById('searchInput').value.trim();
+    const requestId = ++searchRequestId;
+    if (useServerFragments()) {
+        loadTableFragments(query, requestId);
+        return;
+    }
+    if (!query) {
+        loadPage(tableOffset, requestId);
+        return;
+    }
+    fetch(`/api/search?q=${encodeURIComponent(query)}&limit=${SEARCH_LIMIT}`)
+        .then(response => response.json())
+        .then(data => {
+            // Ett långsammare svar på en äldre sökning får inte skriva över en nyare
+            if (requestId !== searchRequestId) return;
+            updateTable(data.results.map(result => result.item));
+            reportRows(query, 0, data.results.length, data.total);
+        })
+        .catch(error => console.error('Fel vid sökning:', error));
 }
 
+// Dropdownerna hänger ihop: kund → produktfamilj → reservdel
+document.getElementById('brand').addEventListener('change', event => {
+    event.target.classList.add('is-valid'); // Visuell feedback när kund väljs
+    updateProductFamilyDropdown();
+});
+document.getElementById('product_family').addEventListener('change', event => {
+    event.target.classList.add('is-valid'); // Visuell feedback när produktfamilj väljs
+    updateSparePartDropdown();
+});
+document.getElementById('spare_part').addEventListener('change', event => {
+    event.target.classList.add('is-valid'); // Visuell feedback när reservdel väljs
+    updateStockStatusInForm(); // Visa aktuell lagerstatus för vald artikel
+});
+
+// Sök medan användaren skriver, men inte vid varje tangenttryckning
+document.getElementById('searchInput').addEventListener('input', () => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(performSearch, 150);
+});
+
 // Funktion för att sortera tabellen
 function sortTable(columnIndex) {
     const table = document.getElementById('inventoryTable');
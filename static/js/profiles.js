@@ -0,0 +1,98 @@
+// Profilerna hämtas med token i headern; den hamnar aldrig i URL:er, åtkomstloggar eller Referer
+const TOKEN_KEY = 'profileToken';
+const CATEGORIES = ['lock_wait', 'json_parse', 'json_encode', 'logging', 'file_io', 'template', 'other'];
+
+function authHeaders() {
+    const token = sessionStorage.getItem(TOKEN_KEY);
+    return token ? { [TOKEN_HEADER]: token } : {};
+}
+
+function escapeHtml(text) {
+    const element = document.createElement('span');
+    element.textContent = text;
+    return element.innerHTML;
+}
+
+function renderStatus(status) {
+    let text = `Urval: ${(status.sample_rate * 100).toFixed(2)} % av förfrågningarna, ` +
+        `sampling var ${status.interval_ms.toFixed(1)} ms. `;
+    if (status.header_enabled) {
+        text += `Enskilda förfrågningar kan profileras med headern <code>${TOKEN_HEADER}</code>. `;
+    }
+    text += `Profilerna sparas i <code>${escapeHtml(status.profile_dir)}/</code> (max ${status.max_files} filer).`;
+    document.getElementById('profileStatus').innerHTML = text;
+}
+
+function renderProfiles(profiles) {
+    const tableBody = document.getElementById('profileTable');
+    if (profiles.length === 0) {
+        tableBody.innerHTML = '<tr><td colspan="7" class="text-center text-muted">Inga profilerade förfrågningar ännu</td></tr>';
+        return;
+    }
+    tableBody.innerHTML = profiles.map(profile => {
+        const breakdown = CATEGORIES
+            .filter(category => profile.breakdown_ms[category] !== undefined)
+            .map(category => [category, profile.breakdown_ms[category]]);
+        const bars = breakdown.map(([category, ms]) => {
+            const width = profile.duration_ms ? 100 * ms / profile.duration_ms : 0;
+            return `<span class="cat-${category}" style="width: ${width}%" title="${category}: ${ms} ms"></span>`;
+        }).join('');
+        const legend = breakdown.map(([category, ms]) => `${category} ${ms} ms`).join(', ');
+        const stacks = profile.samples
+            ? `<a href="#" data-collapsed="/api/profiles/${profile.id}.collapsed">stackar</a>`
+            : '';
+        return `<tr>
+            <td>${profile.started_at.replace('T', ' ')}</td>
+            <td><code>${escapeHtml(profile.method + ' ' + profile.path)}</code></td>
+            <td>${profile.status}</td>
+            <td class="text-end">${profile.duration_ms.toFixed(1)}</td>
+            <td class="text-end">${profile.samples}</td>
+            <td><div class="breakdown">${bars}</div><small class="text-muted">${legend}</small></td>
+            <td>${stacks}</td>
+        </tr>`;
+    }).join('');
+}
+
+function loadProfiles() {
+    const limit = new URLSearchParams(window.location.search).get('limit') || 50;
+    fetch(`/api/profiles?limit=${encodeURIComponent(limit)}`, { headers: authHeaders() })
+        .then(response => {
+            if (response.status === 403) {
+                sessionStorage.removeItem(TOKEN_KEY);
+                document.getElementById('tokenForm').hidden = false;
+                throw new Error('Fel eller saknad token');
+            }
+            return response.json();
+        })
+        .then(data => {
+            document.getElementById('tokenForm').hidden = true;
+            renderStatus(data.status);
+            renderProfiles(data.slowest);
+        })
+        .catch(error => {
+            document.getElementById('profileStatus').textContent = error.message;
+        });
+}
+
+// Collapsed-stackarna hämtas också med headern och öppnas som text i en ny flik
+document.addEventListener('click', event => {
+    const link = event.target.closest('[data-collapsed]');
+    if (!link) return;
+    event.preventDefault();
+    fetch(link.dataset.collapsed, { headers: authHeaders() })
+        .then(response => response.blob())
+        .then(blob => window.open(URL.createObjectURL(blob), '_blank'))
+        .catch(error => console.error('Kunde inte hämta stackar:', error));
+});
+
+document.getElementById('tokenForm').addEventListener('submit', event => {
+    event.preventDefault();
+    sessionStorage.setItem(TOKEN_KEY, document.getElementById('profileToken').value);
+    loadProfiles();
+});
+
+if (!TOKEN_REQUIRED || sessionStorage.getItem(TOKEN_KEY)) {
+    loadProfiles();
+} else {
+    document.getElementById('profileStatus').textContent = 'Ange token för att visa profilerna.';
+}
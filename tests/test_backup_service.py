@@ -0,0 +1,84 @@
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.change_log import ChangeLog
+from models.inventory import InventoryItem, InventoryModel
+from services.backup_service import BackupService
+from utils.exceptions import BackupError
+
+LEGACY_ITEMS = [
+    {"id": 1, "Brand": "HP", "product_family": "EliteBook 840", "spare_part": "LCD", "quantity": 5,
+     "low_status": 5, "high_status": 15},
+    {"id": 2, "Brand": "HP", "product_family": "EliteBook 840", "spare_part": "Batteri", "quantity": 8,
+     "low_status": 5, "high_status": 15},
+    {"id": 3, "Brand": "Dell", "product_family": "Latitude 5420", "spare_part": "Fläkt", "quantity": 2,
+     "low_status": 5, "high_status": 15},
+]
+
+
+def make_store(tmp_path, items):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    with open(data_dir / "inventory.json", "w", encoding="utf-8") as f:
+        json.dump(items, f)
+    change_log = ChangeLog(str(data_dir / "inventory_changes.jsonl"))
+    model = InventoryModel(str(data_dir / "inventory.json"), 0, change_log)
+    service = BackupService(str(data_dir), str(tmp_path / "backups"), logging.getLogger("test"),
+                            change_log=change_log)
+    return model, service
+
+
+def write_legacy_backup(service, created):
+    """Backup från före ändringsloggen: läst från filen, utan dataversion."""
+    entry = service._store_database()
+    assert "data_version" not in entry
+    service._write_manifest(service.backup_dir, "inventory-legacy", "scheduled", {"inventory.json": entry},
+                            created=created)
+
+
+def subtract_one(model, item_id):
+    item = model.get_by_id(item_id)
+    item.quantity -= 1
+    model.update(item)
+
+
+def test_restore_without_versioned_backup_keeps_items_from_before_the_change_log(tmp_path):
+    model, service = make_store(tmp_path, LEGACY_ITEMS)
+    write_legacy_backup(service, datetime.now() - timedelta(minutes=1))
+    subtract_one(model, 1)
+    assert service.change_log.first_seq() == 1
+
+    plan = service.build_state_at(time.time() + 1)
+
+    assert not plan.exact
+    assert plan.base_backup == "inventory-legacy"
+    assert sorted(item["id"] for item in plan.items) == [1, 2, 3]
+
+
+def test_restore_refuses_when_log_does_not_start_from_a_known_state(tmp_path):
+    model, service = make_store(tmp_path, LEGACY_ITEMS)
+    subtract_one(model, 1)
+
+    with pytest.raises(BackupError):
+        service.build_state_at(time.time() + 1)
+
+
+def test_restore_replays_exactly_from_recorded_baseline(tmp_path):
+    model, service = make_store(tmp_path, LEGACY_ITEMS)
+    assert model.record_baseline()
+    assert not model.record_baseline()
+    subtract_one(model, 1)
+    model.add(InventoryItem(id=0, Brand="Lenovo", product_family="ThinkPad T14", spare_part="Tangentbord",
+                            quantity=4, low_status=5, high_status=15))
+
+    plan = service.build_state_at(time.time() + 1)
+
+    assert plan.exact
+    assert plan.base_backup is None
+    assert plan.replayed == 3
+    quantities = {item["id"]: item["quantity"] for item in plan.items}
+    assert quantities == {1: 4, 2: 8, 3: 2, 4: 4}
@@ -0,0 +1,70 @@
+import os
+import time
+
+from utils.content_store import ContentStore
+
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_garbage_collection_spares_recent_objects_and_temp_files(tmp_path):
+    store = ContentStore(str(tmp_path))
+    old = store.put_bytes(b"gammal backup\n")["chunks"][0]
+    fresh = store.put_bytes(b"backup utan manifest \xe4nnu\n")["chunks"][0]
+    temp_path = store._object_path("f" * 64) + ".tmp"
+    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+    open(temp_path, "wb").close()
+    age(store._object_path(old), store.GC_GRACE_SECONDS + 60)
+
+    assert store.collect_garbage(set()) == 1
+
+    assert not store.has(old)
+    assert store.has(fresh)
+    assert os.path.exists(temp_path)
+
+
+def test_reused_object_is_not_collected_before_its_manifest_is_written(tmp_path):
+    store = ContentStore(str(tmp_path))
+    digest = store.put_bytes(b"of\xf6r\xe4ndrad fil\n")["chunks"][0]
+    age(store._object_path(digest), store.GC_GRACE_SECONDS + 60)
+
+    # En annan process hoppar över objektet som redan finns, och har inte skrivit sitt manifest
+    assert store.has(digest)
+
+    assert store.collect_garbage(set()) == 0
+    assert store.has(digest)
+
+
+def test_concurrent_writers_of_the_same_chunk_both_succeed(tmp_path, monkeypatch):
+    store = ContentStore(str(tmp_path))
+    data = b"samma chunk fr\xe5n tv\xe5 processer\n"
+    real_replace = os.replace
+
+    def replace_after_other_writer(source, target):
+        # Den andra processen hinner lägga in chunken först; här kan målet inte ersättas
+        real_replace(source, target)
+        raise PermissionError(target)
+
+    monkeypatch.setattr(os, "replace", replace_after_other_writer)
+    entry = store.put_bytes(data)
+    monkeypatch.setattr(os, "replace", real_replace)
+
+    assert store.read_bytes(entry) == data
+    assert not [name for name in os.listdir(os.path.dirname(store._object_path(entry["chunks"][0])))
+                if name.endswith(".tmp")]
+
+
+def test_restore_leaves_no_temp_files(tmp_path):
+    store = ContentStore(str(tmp_path / "store"))
+    entry = store.put_bytes(b"inventarie\n")
+    dest = tmp_path / "restored" / "inventory.json"
+    dest.parent.mkdir()
+    (dest.parent / "inventory.json.tmp").write_bytes(b"annan process")
+
+    store.restore_file(entry, str(dest))
+
+    assert dest.read_bytes() == b"inventarie\n"
+    assert (dest.parent / "inventory.json.tmp").read_bytes() == b"annan process"
+    assert sorted(path.name for path in dest.parent.iterdir()) == ["inventory.json", "inventory.json.tmp"]
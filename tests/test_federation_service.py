@@ -0,0 +1,87 @@
+import logging
+
+from models.change_log import ChangeLog
+from models.inventory import InventoryItem, InventoryModel
+from services.federation_service import FederationService, LocalSite, RemoteSite, build_sites
+
+
+def make_model(directory, *parts):
+    directory.mkdir()
+    model = InventoryModel(str(directory / "inventory.json"), 0, ChangeLog(str(directory / "inventory_changes.jsonl")))
+    for product_family, spare_part, quantity in parts:
+        model.add(InventoryItem(id=0, Brand="HP", product_family=product_family, spare_part=spare_part,
+                                quantity=quantity, low_status=5, high_status=15))
+    return model
+
+
+class FlakySite:
+    """Ett annat lager som svarar en gång och sedan slutar svara."""
+
+    def __init__(self, name, items):
+        self.name = name
+        self.location = "http://flaky"
+        self.items = items
+        self.calls = 0
+
+    def fetch(self, token):
+        self.calls += 1
+        if self.calls > 1:
+            raise OSError("connection refused")
+        return "v1", self.items
+
+
+def test_stock_is_found_across_sites_by_normalized_spare_part(tmp_path):
+    stockholm = make_model(tmp_path / "sthlm", ("EliteBook 840", "LCD-panel", 2), ("EliteBook 840", "Batteri", 4))
+    goteborg = make_model(tmp_path / "gbg", ("EliteBook 840", "lcd panel", 7), ("ProBook 450", "LCD panel", 0))
+    federation = FederationService([LocalSite("sthlm", stockholm), LocalSite("gbg", goteborg)],
+                                   logging.getLogger("test"))
+
+    result = federation.where_in_stock("LCD Panel")
+
+    assert [(entry["site"], entry["item"]["quantity"]) for entry in result["sites"]] == [("gbg", 7), ("sthlm", 2)]
+    assert result["total_quantity"] == 9
+    assert len(federation.where_in_stock("lcd panel", include_empty=True)["sites"]) == 3
+    assert [entry["site"] for entry in federation.where_in_stock("lcd panel", "probook 450",
+                                                                 include_empty=True)["sites"]] == ["gbg"]
+
+
+def test_a_changed_site_only_replaces_its_own_contribution(tmp_path):
+    stockholm = make_model(tmp_path / "sthlm", ("EliteBook 840", "LCD", 2))
+    goteborg = make_model(tmp_path / "gbg", ("EliteBook 840", "LCD", 7))
+    federation = FederationService([LocalSite("sthlm", stockholm), LocalSite("gbg", goteborg)],
+                                   logging.getLogger("test"))
+    assert federation.where_in_stock("LCD")["total_quantity"] == 9
+
+    stockholm.delete(1)
+    goteborg.adjust_quantity(1, -2)
+
+    result = federation.where_in_stock("LCD")
+    assert [(entry["site"], entry["item"]["quantity"]) for entry in result["sites"]] == [("gbg", 5)]
+    assert federation.where_in_stock("Batteri")["sites"] == []
+
+
+def test_a_site_that_stops_answering_keeps_its_last_stock_marked_stale(tmp_path):
+    own = make_model(tmp_path / "own", ("EliteBook 840", "LCD", 1))
+    flaky = FlakySite("malmo", [{"id": 1, "Brand": "HP", "product_family": "EliteBook 840", "spare_part": "LCD",
+                                 "quantity": 3, "low_status": 5, "high_status": 15}])
+    federation = FederationService([LocalSite("own", own), flaky], logging.getLogger("test"))
+    federation.refresh()
+
+    federation.refresh()
+
+    stale = {entry["site"]: entry["stale"] for entry in federation.where_in_stock("LCD")["sites"]}
+    assert stale == {"malmo": True, "own": False}
+    assert {site["name"]: site["error"] for site in federation.site_status()}["malmo"] == "connection refused"
+
+
+def test_build_sites_skips_its_own_name_and_picks_the_site_type(tmp_path):
+    own = make_model(tmp_path / "own")
+    (tmp_path / "lund").mkdir()
+
+    sites = build_sites("own", own, {"own": "http://ignored", "lund": str(tmp_path / "lund"),
+                                     "kiruna": "https://kiruna.example:5000/"}, 1.0, 2.0)
+
+    assert [(site.name, type(site)) for site in sites] == [
+        ("own", LocalSite), ("kiruna", RemoteSite), ("lund", LocalSite)
+    ]
+    assert sites[1].location == "https://kiruna.example:5000"
@@ -0,0 +1,65 @@
+import logging
+import os
+
+import pytest
+from flask import Flask
+
+from models.inventory import InventoryItem, InventoryModel
+from services import fragment_service as module
+from services.fragment_service import FragmentService
+from services.inventory_service import InventoryService
+
+TEMPLATES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+
+@pytest.fixture
+def service(tmp_path):
+    model = InventoryModel(str(tmp_path / "inventory.json"), 0)
+    for number in range(5):
+        model.add(InventoryItem(id=0, Brand="HP", product_family="EliteBook 840", spare_part=f"Del {number}",
+                                quantity=10, low_status=5, high_status=15))
+    logger = logging.getLogger("test")
+    fragments = FragmentService(model, None, logger, InventoryService(model, logger))
+    with Flask(__name__, template_folder=TEMPLATES).app_context():
+        yield model, fragments
+
+
+def test_only_the_requested_page_is_rendered(service):
+    _, fragments = service
+
+    page = fragments.inventory_fragments(offset=2, limit=2)
+
+    assert page["total"] == 5 and page["offset"] == 2
+    assert page["order"] == ["3", "4"]
+    assert set(page["fragments"]) == {"3", "4"}
+    assert page["version"].endswith(":2:2")
+
+
+def test_version_from_another_page_gives_a_full_page(service):
+    _, fragments = service
+    first = fragments.inventory_fragments(offset=0, limit=2)
+
+    second = fragments.inventory_fragments(since=first["version"], offset=2, limit=2)
+
+    assert second["full"] is True
+    assert set(second["fragments"]) == {"3", "4"}
+
+
+def test_unchanged_rows_reuse_their_html(service, monkeypatch):
+    model, fragments = service
+    first = fragments.inventory_fragments(limit=5)
+
+    rendered = []
+    real_attribute = module.get_template_attribute
+
+    def counting_attribute(template, name):
+        macro = real_attribute(template, name)
+        return lambda *args: rendered.append(args[0]['id']) or macro(*args)
+
+    monkeypatch.setattr(module, "get_template_attribute", counting_attribute)
+    model.adjust_quantity(2, -1)
+    second = fragments.inventory_fragments(since=first["version"], limit=5)
+
+    assert rendered == [2]
+    assert second["full"] is False
+    assert list(second["fragments"]) == ["2"]
@@ -0,0 +1,119 @@
+import logging
+import types
+
+from models.inventory import InventoryModel
+from services.handover_service import HandoverService
+from services.updater_service import UpdaterService
+from utils.control_token import load_control_token
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+def make_handover(tmp_path, timeout=0.05):
+    model = InventoryModel(str(tmp_path / "inventory.json"), 0)
+    health_service = types.SimpleNamespace(scheduler=FakeScheduler())
+    return HandoverService(model, health_service, logging.getLogger("test"), token="hemlig", timeout=timeout)
+
+
+def test_handover_is_undone_when_writes_do_not_finish(tmp_path):
+    handover = make_handover(tmp_path)
+    assert handover.begin_request("POST")
+
+    assert handover.hand_over(5002) is False
+
+    assert handover.forward_port is None
+    assert handover.health_service.scheduler.stopped is False
+    assert handover.begin_request("GET")
+
+
+def test_resume_restarts_the_scheduler_after_a_handover(tmp_path):
+    handover = make_handover(tmp_path)
+    restarted = []
+    handover.restart_scheduler = lambda: restarted.append(True)
+
+    assert handover.hand_over(5002) is True
+    assert handover.health_service.scheduler.stopped is True
+    assert handover.resume() is True
+
+    assert handover.forward_port is None
+    assert restarted == [True]
+    assert handover.resume() is False
+
+
+def test_authorized_requires_the_exact_token(tmp_path):
+    handover = make_handover(tmp_path)
+
+    assert handover.authorized("hemlig")
+    assert not handover.authorized("hemli")
+    assert not handover.authorized(None)
+
+
+class FakeSwitch:
+    def __init__(self):
+        self.switched_to = None
+
+    def switch_to(self, port):
+        self.switched_to = port
+
+
+def make_updater(tmp_path, responses):
+    updater = UpdaterService("app.py", str(tmp_path / "updater.lock"), None, logging.getLogger("test"),
+                             deploy_mode="blue_green", control_token="hemlig")
+    updater.traffic_switch = FakeSwitch()
+    updater.active_port = 5001
+    updater.app_process = types.SimpleNamespace(pid=100)
+    new_process = types.SimpleNamespace(pid=200, poll=lambda: None)
+    calls, stopped = [], []
+    updater._spawn_app = lambda port: new_process
+    updater.wait_until_ready = lambda port, process: True
+    updater.stop_app_gracefully = stopped.append
+
+    def control(port, action, payload=None):
+        calls.append((port, action))
+        return responses.get(action)
+
+    updater._control = control
+    return updater, calls, stopped
+
+
+def test_switch_is_aborted_when_the_old_process_refuses_the_handover(tmp_path):
+    # Ett 403 (fel token) ger inget svar från _control
+    updater, calls, stopped = make_updater(tmp_path, {"takeover": {"data_version": 1}})
+
+    assert updater.blue_green_switch() is False
+
+    assert updater.traffic_switch.switched_to is None
+    assert updater.active_port == 5001
+    assert stopped == [200]
+    assert (5002, "takeover") not in calls
+
+
+def test_switch_is_aborted_when_writes_are_still_in_flight(tmp_path):
+    updater, calls, stopped = make_updater(tmp_path, {"handover": {"forward_port": 5002, "drained": False}})
+
+    assert updater.blue_green_switch() is False
+
+    assert updater.traffic_switch.switched_to is None
+    assert stopped == [200]
+
+
+def test_old_process_resumes_when_the_new_one_cannot_take_over(tmp_path):
+    updater, calls, stopped = make_updater(tmp_path, {"handover": {"forward_port": 5002, "drained": True},
+                                                      "resume": {"resumed": True}})
+
+    assert updater.blue_green_switch() is False
+
+    assert calls == [(5001, "handover"), (5002, "takeover"), (5001, "resume")]
+    assert stopped == [200]
+
+
+def test_control_token_is_kept_between_updater_restarts(tmp_path):
+    token_file = str(tmp_path / "control.token")
+
+    assert load_control_token(token_file) == load_control_token(token_file)
@@ -0,0 +1,36 @@
+import io
+import logging
+
+from models.inventory import InventoryModel
+from services.import_export_service import ImportExportService
+
+
+def make_service(tmp_path):
+    model = InventoryModel(str(tmp_path / "inventory.json"), 0)
+    return model, ImportExportService(model, logging.getLogger("test"))
+
+
+def import_csv(service, text, **options):
+    return service.import_file(io.BytesIO(text.encode("utf-8")), "csv", **options)
+
+
+def test_rows_that_break_low_below_high_after_merging_are_invalid(tmp_path):
+    model, service = make_service(tmp_path)
+    import_csv(service, "product_family,spare_part,quantity\nF,P,1\n")
+
+    result = import_csv(service, "product_family,spare_part,quantity,high_status\nF,P,3,2\nG,Q,1,3\n")
+
+    assert result.invalid == 2
+    assert not result.committed
+    assert [error["row"] for error in result.errors] == [2, 3]
+    assert [(item.product_family, item.low_status, item.high_status) for item in model.get_all()] == [("F", 5, 15)]
+
+
+def test_dry_run_reports_thresholds_that_conflict_with_the_existing_item(tmp_path):
+    model, service = make_service(tmp_path)
+    import_csv(service, "product_family,spare_part,quantity\nF,P,1\n")
+
+    result = import_csv(service, "product_family,spare_part,quantity,high_status\nF,P,3,2\nG,Q,1,30\n", dry_run=True)
+
+    assert result.invalid == 1
+    assert result.errors == [{"row": 2, "errors": {"high_status": "High status must be greater than low status"}}]
@@ -0,0 +1,128 @@
+import threading
+
+import pytest
+
+from models.change_log import ChangeLog
+from models.inventory import InventoryModel, InventoryPartition
+from utils.exceptions import ConfigurationError
+
+
+def make_partitioned_model(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    return InventoryModel(str(data_dir / "inventory.json"), 0, ChangeLog(str(data_dir / "inventory_changes.jsonl")),
+                          partition_by="brand", partitions_dir=str(data_dir / "partitions"))
+
+
+def test_upsert_without_brand_keeps_item_in_its_partition(tmp_path):
+    model = make_partitioned_model(tmp_path)
+    model.upsert_many([{"Brand": "HP", "product_family": "X", "spare_part": "LCD", "quantity": 3}])
+
+    assert model.upsert_many([{"product_family": "X", "spare_part": "LCD", "quantity": 9}]) == (0, 1, 0, [])
+
+    partitions = tmp_path / "data" / "partitions"
+    assert sorted(path.name for path in partitions.glob("*.json")) == ["hp.json"]
+    item = model.get_by_id(1)
+    assert (item.Brand, item.quantity) == ("HP", 9)
+
+
+def test_unpartitioned_start_merges_existing_partitions(tmp_path):
+    model = make_partitioned_model(tmp_path)
+    model.upsert_many([
+        {"Brand": "HP", "product_family": "X", "spare_part": "LCD", "quantity": 3},
+        {"Brand": "Dell", "product_family": "Y", "spare_part": "Fläkt", "quantity": 2},
+    ])
+
+    data_dir = tmp_path / "data"
+    model = InventoryModel(str(data_dir / "inventory.json"), 0, ChangeLog(str(data_dir / "inventory_changes.jsonl")))
+
+    assert sorted(item.spare_part for item in model.get_all()) == ["Fläkt", "LCD"]
+    assert not (data_dir / "partitions").exists()
+
+
+def test_unknown_partition_mode_is_rejected(tmp_path):
+    with pytest.raises(ConfigurationError):
+        InventoryModel(str(tmp_path / "inventory.json"), 0, partition_by="Brand")
+
+
+def test_move_between_brands_writes_target_before_source(tmp_path, monkeypatch):
+    model = make_partitioned_model(tmp_path)
+    model.upsert_many([{"Brand": "HP", "product_family": "X", "spare_part": "LCD", "quantity": 3}])
+    item = model.get_by_id(1)
+    item.Brand = "Dell"
+
+    writes = []
+    original = InventoryPartition._write_file
+    monkeypatch.setattr(InventoryPartition, "_write_file",
+                        lambda partition, data: (writes.append(partition.key), original(partition, data)))
+
+    assert model.update(item)
+    assert writes == ["dell", "hp"]
+    assert model.get_by_id(1).Brand == "Dell"
+    assert [entry['op'] for entry in model.change_log.iter_entries()][-1] == "update"
+
+
+def test_upsert_many_rejects_rows_whose_merged_thresholds_are_inconsistent(tmp_path):
+    model = InventoryModel(str(tmp_path / "inventory.json"), 0)
+    model.upsert_many([{"product_family": "F", "spare_part": "P", "quantity": 1}])
+    rows = [{"product_family": "F", "spare_part": "P", "quantity": 3, "high_status": 2},
+            {"product_family": "G", "spare_part": "Q", "quantity": 1, "high_status": 3},
+            {"product_family": "H", "spare_part": "R", "quantity": 1}]
+
+    assert model.upsert_many(rows) == (0, 0, 0, [0, 1])
+    assert [(item.product_family, item.quantity) for item in model.get_all()] == [("F", 1)]
+
+    assert model.upsert_many(rows, skip_invalid=True) == (1, 0, 0, [0, 1])
+    assert sorted(item.product_family for item in model.get_all()) == ["F", "H"]
+
+
+def test_snapshot_does_not_wait_for_a_writer(tmp_path):
+    model = make_partitioned_model(tmp_path)
+    model.upsert_many([{"Brand": "HP", "product_family": "X", "spare_part": "LCD", "quantity": 3}])
+    partition = model._partition("hp")
+    holding, release = threading.Event(), threading.Event()
+
+    def writer():
+        with partition.lock.hold("adjust_quantity"):
+            holding.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    holding.wait(5)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(model.snapshot()))
+    reader.start()
+    reader.join(1)
+    release.set()
+    thread.join()
+
+    assert result and [item['quantity'] for item in result[0].items] == [3]
+
+
+def test_snapshot_version_matches_content_under_concurrent_writes(tmp_path):
+    model = make_partitioned_model(tmp_path)
+    model.upsert_many([{"Brand": brand, "product_family": "X", "spare_part": brand, "quantity": 10 ** 6}
+                       for brand in ("HP", "Dell", "Lenovo")])
+    base = model.snapshot()
+    stop = threading.Event()
+
+    def writer(item_id):
+        while not stop.is_set():
+            model.adjust_quantity(item_id, -1)
+
+    writers = [threading.Thread(target=writer, args=(item_id,)) for item_id in (1, 2, 3)]
+    for thread in writers:
+        thread.start()
+    try:
+        seen = {}
+        for _ in range(300):
+            snapshot = model.snapshot()
+            total = sum(item['quantity'] for item in snapshot.items)
+            # Varje avdrag är en version, så innehållet följer av versionen
+            assert total == 3 * 10 ** 6 - (snapshot.version - base.version)
+            assert seen.setdefault(snapshot.version, total) == total
+    finally:
+        stop.set()
+        for thread in writers:
+            thread.join()
@@ -0,0 +1,60 @@
+import logging
+
+from models.inventory import InventoryItem, InventoryModel
+from services.inventory_service import InventoryService
+
+
+def make_service(tmp_path):
+    model = InventoryModel(str(tmp_path / "inventory.json"), 0)
+    model.add(InventoryItem(id=0, Brand="HP", product_family="EliteBook 840", spare_part="LCD", quantity=3,
+                            low_status=5, high_status=15))
+    return model, InventoryService(model, logging.getLogger("test"))
+
+
+def test_inventory_json_is_reused_when_the_cache_expires_unchanged(tmp_path, monkeypatch):
+    model, service = make_service(tmp_path)
+    etag, body = service.get_inventory_json()
+
+    serialized = []
+    monkeypatch.setattr(service, "_log_item_status", lambda item, status: serialized.append(item.id))
+    # Med TTL 0 har modellens cache gått ut vid varje läsning; oförändrad fil ger samma lista
+    assert not model.is_cache_warm()
+
+    assert service.get_inventory_json() == (etag, body)
+    assert serialized == []
+
+
+def test_inventory_json_changes_with_content(tmp_path):
+    model, service = make_service(tmp_path)
+    etag, _ = service.get_inventory_json()
+
+    model.adjust_quantity(1, -1)
+
+    assert service.get_inventory_json()[0] != etag
+
+
+def test_options_narrow_by_brand_and_product_family(tmp_path):
+    model, service = make_service(tmp_path)
+    model.add(InventoryItem(id=0, Brand="Dell", product_family="Latitude 5440", spare_part="Batteri", quantity=8,
+                            low_status=5, high_status=15))
+
+    assert service.get_options() == {"version": model.version, "brands": ["Dell", "HP"]}
+    assert service.get_options("HP")["product_families"] == ["EliteBook 840"]
+    items = service.get_options("HP", "EliteBook 840")["items"]
+    assert [(item["spare_part"], item["quantity"]) for item in items] == [("LCD", 3)]
+
+    model.adjust_quantity(1, 2)
+
+    assert service.get_options("HP", "EliteBook 840")["items"][0]["quantity"] == 5
+
+
+def test_page_is_sorted_and_reports_total(tmp_path):
+    model, service = make_service(tmp_path)
+    for part in ("Tangentbord", "Batteri"):
+        model.add(InventoryItem(id=0, Brand="HP", product_family="EliteBook 840", spare_part=part, quantity=1,
+                                low_status=5, high_status=15))
+
+    page = service.get_page(offset=1, limit=1)
+
+    assert page["total"] == 3
+    assert [item["spare_part"] for item in page["items"]] == ["LCD"]
@@ -0,0 +1,115 @@
+import logging
+import time
+
+from flask import Flask, jsonify
+
+from models.change_log import ChangeLog
+from models.inventory import InventoryItem, InventoryModel
+from routes.replication import create_replication_routes
+from services.replication_service import ReplicationService
+
+
+def make_model(directory):
+    directory.mkdir()
+    return InventoryModel(str(directory / "inventory.json"), 0, ChangeLog(str(directory / "inventory_changes.jsonl")))
+
+
+def add_items(model, count):
+    for number in range(count):
+        model.add(InventoryItem(id=0, Brand="HP", product_family="EliteBook 840", spare_part=f"Del {number}",
+                                quantity=10, low_status=5, high_status=15))
+
+
+def connect(replica, primary):
+    """Replikan läser direkt från primärens tjänst i stället för över HTTP."""
+    def get_json(path, params, timeout):
+        if path == "/api/replication/snapshot":
+            return primary.snapshot()
+        return primary.changes_since(int(params["since"]), int(params["limit"]))
+    replica._get_json = get_json
+
+
+def test_changes_since_returns_the_entries_after_since_in_order(tmp_path):
+    model = make_model(tmp_path / "primary")
+    add_items(model, 3)
+    primary = ReplicationService(model, logging.getLogger("test"))
+
+    response = primary.changes_since(1, 10)
+
+    assert response["snapshot_required"] is False
+    assert [entry['seq'] for entry in response["entries"]] == [2, 3]
+    assert response["last_seq"] == 3
+
+
+def test_changes_since_requires_a_snapshot_when_entries_are_missing(tmp_path):
+    model = make_model(tmp_path / "primary")
+    add_items(model, 3)
+    model.change_log.compact(keep_after_seq=2, keep_after_ts=time.time() + 60)
+    primary = ReplicationService(model, logging.getLogger("test"))
+
+    assert primary.changes_since(0, 10) == {"role": "primary", "last_seq": 3, "snapshot_required": True,
+                                            "entries": []}
+    # Efter luckan går det fortfarande att följa upp med poster
+    assert [entry['seq'] for entry in primary.changes_since(2, 10)["entries"]] == [3]
+
+
+def test_changes_since_requires_a_snapshot_when_the_replica_is_ahead_or_too_far_behind(tmp_path):
+    model = make_model(tmp_path / "primary")
+    add_items(model, 3)
+    primary = ReplicationService(model, logging.getLogger("test"), max_catchup_entries=2)
+
+    assert primary.changes_since(5, 10)["snapshot_required"] is True
+    assert primary.changes_since(0, 10)["snapshot_required"] is True
+    assert primary.changes_since(1, 10)["snapshot_required"] is False
+
+
+def test_replica_falls_back_to_a_snapshot_when_entries_are_missing(tmp_path):
+    primary_model = make_model(tmp_path / "primary")
+    add_items(primary_model, 3)
+    primary_model.change_log.compact(keep_after_seq=2, keep_after_ts=time.time() + 60)
+    replica_model = make_model(tmp_path / "replica")
+    replica = ReplicationService(replica_model, logging.getLogger("test"), primary_url="http://primary")
+    connect(replica, ReplicationService(primary_model, logging.getLogger("test")))
+
+    assert replica.sync_once() == 0
+
+    assert replica.snapshots == 1
+    assert replica_model.version == 3
+    assert replica_model.snapshot().items == primary_model.snapshot().items
+    assert replica.status()["lag_entries"] == 0
+
+
+def test_replica_applies_entries_in_order_with_the_primary_seq(tmp_path):
+    primary_model = make_model(tmp_path / "primary")
+    replica_model = make_model(tmp_path / "replica")
+    primary = ReplicationService(primary_model, logging.getLogger("test"))
+    replica = ReplicationService(replica_model, logging.getLogger("test"), primary_url="http://primary")
+    connect(replica, primary)
+
+    add_items(primary_model, 1)
+    primary_model.adjust_quantity(1, -4)
+    primary_model.adjust_quantity(1, -3)
+    primary_model.delete(1)
+    add_items(primary_model, 1)
+
+    assert replica.sync_once() == 5
+
+    assert [item['quantity'] for item in replica_model.snapshot().items] == [10]
+    assert replica_model.snapshot().items == primary_model.snapshot().items
+    assert [entry['seq'] for entry in replica_model.change_log.iter_entries()] == [1, 2, 3, 4, 5]
+    assert replica_model.version == primary_model.version == 5
+
+
+def test_replica_rejects_writes_but_serves_reads(tmp_path):
+    replica = ReplicationService(make_model(tmp_path / "replica"), logging.getLogger("test"),
+                                 primary_url="http://primary:5000")
+    app = Flask(__name__)
+    app.register_blueprint(create_replication_routes(replica))
+    app.add_url_rule("/api/inventory", "inventory", lambda: jsonify([]), methods=["GET", "POST"])
+    client = app.test_client()
+
+    response = client.post("/api/inventory", json={})
+    assert response.status_code == 403
+    assert response.get_json()["primary"] == "http://primary:5000"
+    assert client.get("/api/inventory").status_code == 200
+    assert client.get("/api/replication/status").get_json()["role"] == "replica"
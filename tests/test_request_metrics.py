@@ -0,0 +1,24 @@
+import pytest
+from flask import Flask
+
+from utils.request_metrics import REQUESTS_IN_PROGRESS, instrument_app
+
+
+def in_progress() -> float:
+    return REQUESTS_IN_PROGRESS._values.get((), 0.0)
+
+
+def test_in_progress_gauge_returns_to_zero_when_exception_propagates():
+    # Med PROPAGATE_EXCEPTIONS (debug/testning) körs inga after_request-hooks
+    app = Flask(__name__)
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    instrument_app(app)
+
+    @app.route("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    before = in_progress()
+    with pytest.raises(RuntimeError):
+        app.test_client().get("/boom")
+    assert in_progress() == before
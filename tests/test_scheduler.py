@@ -0,0 +1,70 @@
+import logging
+import threading
+from datetime import datetime
+
+from utils.scheduler import DailyTrigger, IntervalTrigger, JobScheduler
+
+
+def make_scheduler():
+    scheduler = JobScheduler(logging.getLogger("test"), max_workers=2)
+    scheduler.start()
+    return scheduler
+
+
+def test_jobs_run_in_deadline_order():
+    scheduler = make_scheduler()
+    order = []
+    both_ran = threading.Event()
+
+    def record(name):
+        if name not in order:
+            order.append(name)
+        if len(order) == 2:
+            both_ran.set()
+
+    try:
+        scheduler.add_job("sen", lambda: record("sen"), IntervalTrigger(0.3))
+        scheduler.add_job("tidig", lambda: record("tidig"), IntervalTrigger(0.1))
+        assert both_ran.wait(2)
+    finally:
+        scheduler.stop()
+
+    assert order == ["tidig", "sen"]
+
+
+def test_job_still_running_is_skipped_instead_of_overlapping():
+    scheduler = make_scheduler()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+
+    try:
+        job = scheduler.add_job("långsam", slow, IntervalTrigger(0.02), run_immediately=True)
+        assert started.wait(2)
+        threading.Event().wait(0.2)
+        assert len(calls) == 1
+        assert job.stats.skipped_overlaps > 0
+    finally:
+        release.set()
+        scheduler.stop(wait=True)
+
+    assert job.stats.runs == 1
+
+
+def test_daily_trigger_runs_at_the_time_of_day():
+    trigger = DailyTrigger("02:00")
+
+    assert trigger.next_run(datetime(2026, 3, 1, 1, 59)) == datetime(2026, 3, 1, 2, 0)
+    assert trigger.next_run(datetime(2026, 3, 1, 2, 0)) == datetime(2026, 3, 2, 2, 0)
+
+
+def test_daily_trigger_following_run_keeps_the_day_interval():
+    trigger = DailyTrigger("02:00", every_days=3)
+
+    # Räknat från föregående planerade körning, inte från när den faktiskt blev klar
+    assert trigger.following_run(datetime(2026, 3, 30, 2, 0)) == datetime(2026, 4, 2, 2, 0)
+    assert trigger.describe() == "var 3:e dag kl 02:00"
@@ -0,0 +1,81 @@
+import logging
+import time
+
+import pytest
+
+from models.change_log import ChangeLog
+from models.inventory import InventoryItem, InventoryModel
+from services.search_service import SearchService
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = InventoryModel(str(tmp_path / "inventory.json"), 0, ChangeLog(str(tmp_path / "inventory_changes.jsonl")))
+    for spare_part in ("Batteri", "LCD-panel", "Tangentbord"):
+        model.add(InventoryItem(id=0, Brand="HP", product_family="EliteBook 840", spare_part=spare_part,
+                                quantity=5, low_status=5, high_status=15))
+    return model
+
+
+def make_service(model, monkeypatch):
+    service = SearchService(model, logging.getLogger("test"))
+    rebuilds = []
+    original = service._rebuild
+    monkeypatch.setattr(service, "_rebuild", lambda: (rebuilds.append(model.version), original()))
+    return service, rebuilds
+
+
+def spare_parts(result):
+    return [entry["item"]["spare_part"] for entry in result["results"]]
+
+
+def test_misspelled_query_finds_the_spare_part(model, monkeypatch):
+    service, _ = make_service(model, monkeypatch)
+
+    assert spare_parts(service.search("bateri"))[0] == "Batteri"
+    assert spare_parts(service.search("lcd panel"))[0] == "LCD-panel"
+
+
+def test_index_catches_up_incrementally_from_the_change_log(model, monkeypatch):
+    service, rebuilds = make_service(model, monkeypatch)
+    service.search("batteri")
+    assert rebuilds == [3]
+
+    model.add(InventoryItem(id=0, Brand="Dell", product_family="Latitude 5440", spare_part="Fläkt",
+                            quantity=2, low_status=5, high_status=15))
+    keyboard = model.get_by_id(3)
+    keyboard.spare_part = "Pekplatta"
+    model.update(keyboard)
+    model.delete(1)
+
+    assert spare_parts(service.search("fläkt")) == ["Fläkt"]
+    assert spare_parts(service.search("pekplatta")) == ["Pekplatta"]
+    assert "Tangentbord" not in spare_parts(service.search("tangentbord"))
+    assert "Batteri" not in spare_parts(service.search("batteri"))
+    assert rebuilds == [3]
+    assert service.version == model.version == 6
+
+
+def test_index_is_rebuilt_after_a_restore(model, monkeypatch):
+    service, rebuilds = make_service(model, monkeypatch)
+    service.search("batteri")
+
+    model.replace_all([{"id": 1, "Brand": "HP", "product_family": "ProBook 450", "spare_part": "Laddare",
+                        "quantity": 1, "low_status": 5, "high_status": 15}])
+
+    assert spare_parts(service.search("laddare")) == ["Laddare"]
+    assert spare_parts(service.search("batteri")) == []
+    assert rebuilds == [3, 4]
+
+
+def test_index_is_rebuilt_when_the_change_log_has_a_gap(model, monkeypatch):
+    service, rebuilds = make_service(model, monkeypatch)
+    service.search("batteri")
+    model.adjust_quantity(1, -1)
+    model.adjust_quantity(2, -1)
+    model.change_log.compact(keep_after_seq=4, keep_after_ts=time.time() + 60)
+
+    result = service.search("batteri")
+
+    assert result["results"][0]["item"]["quantity"] == 4
+    assert rebuilds == [3, 5]
@@ -0,0 +1,54 @@
+import itertools
+
+from utils.validation import BatchInventoryValidator, InventoryItemValidator
+
+QUANTITIES = [3, -1, "x", None]
+LOWS = [None, 2, "7", -1, "a"]
+HIGHS = [None, 4, 2, "9", -3, "b"]
+# Gällande gränser: ett befintligt objekt (1/3) eller standardvärdena för ett nytt (5/15)
+FALLBACKS = [(5, 15), (1, 3)]
+
+
+def grid():
+    for quantity, low, high, fallback in itertools.product(QUANTITIES, LOWS, HIGHS, FALLBACKS):
+        row = {"Brand": "HP", "product_family": "F", "spare_part": "P", "quantity": quantity,
+               "low_status": low, "high_status": high}
+        yield {name: value for name, value in row.items() if value is not None}, fallback
+
+
+def validate_batch(rows, fallbacks=None):
+    fields = ("Brand", "product_family", "spare_part", "quantity", "low_status", "high_status")
+    columns = {name: [row.get(name) for row in rows] for name in fields}
+    fallback = None
+    if fallbacks is not None:
+        fallback = {"low_status": [low for low, _ in fallbacks], "high_status": [high for _, high in fallbacks]}
+    return BatchInventoryValidator.validate_columns(columns, len(rows), fallback)
+
+
+def test_batch_matches_single_item_validator_on_the_merged_item():
+    rows, fallbacks = zip(*grid())
+    result = validate_batch(list(rows), list(fallbacks))
+
+    for index, (row, (low, high)) in enumerate(zip(rows, fallbacks)):
+        merged = dict({"low_status": low, "high_status": high}, **row)
+        expected = InventoryItemValidator.validate_add_item(merged).get_error_messages()
+        assert result.row_errors(index) == expected, (row, (low, high))
+
+
+def test_batch_matches_single_item_validator_without_fallback():
+    rows = [row for row, _ in grid()]
+    result = validate_batch(rows)
+
+    for index, row in enumerate(rows):
+        assert result.row_errors(index) == InventoryItemValidator.validate_add_item(row).get_error_messages(), row
+
+
+def test_missing_threshold_is_checked_against_the_fallback():
+    rows = [{"product_family": "F", "spare_part": "P", "quantity": 1, "high_status": 2},
+            {"product_family": "G", "spare_part": "Q", "quantity": 1, "low_status": 20},
+            {"product_family": "H", "spare_part": "R", "quantity": 1, "high_status": 2}]
+
+    result = validate_batch(rows, [(5, 15), (5, 15), (1, 3)])
+
+    assert result.invalid_rows() == [0, 1]
+    assert result.values["high_status"] == [2, None, 2]
@@ -2,6 +2,7 @@
 import sys
 from config import get_config
 from utils.logger import get_updater_logger
+from utils.control_token import load_control_token
 from services.backup_service import BackupService
 from services.updater_service import UpdaterService
 
@@ -15,7 +16,22 @@ def main():
         config.APP_SCRIPT,
         config.LOCK_FILE,
         backup_service,
-        logger
+        logger,
+        update_day=config.UPDATE_SCHEDULE_DAY,
+        update_time=config.UPDATE_SCHEDULE_TIME,
+        deploy_mode=config.DEPLOY_MODE,
+        listen_host=config.HOST,
+        listen_port=config.PORT,
+        blue_green_ports=config.BLUE_GREEN_PORTS,
+        readiness_timeout=config.READINESS_TIMEOUT_SECONDS,
+        drain_timeout=config.DRAIN_TIMEOUT_SECONDS,
+        control_token=config.CONTROL_TOKEN or load_control_token(config.CONTROL_TOKEN_FILE),
+        pid_file=config.APP_PID_FILE,
+        supervise=config.SUPERVISOR_ENABLED,
+        backoff_initial=config.SUPERVISOR_BACKOFF_INITIAL_SECONDS,
+        backoff_max=config.SUPERVISOR_BACKOFF_MAX_SECONDS,
+        stable_seconds=config.SUPERVISOR_STABLE_SECONDS,
+        staging_dir=config.UPDATE_STAGING_DIR
     )
 
     if len(sys.argv) > 1:
@@ -0,0 +1,110 @@
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli är valfritt; utan det används gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/html",
+    "text/css",
+    "text/plain",
+    "image/svg+xml",
+}
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(available: Tuple[str, ...] = None) -> Optional[str]:
+    """Väljer bästa kodning som klienten accepterar, brotli före gzip."""
+    accepted = request.accept_encodings
+    for encoding in available or supported_encodings():
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, level: int = 6) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class ResponseCompressor:
+    """
+    Komprimerar JSON- och HTML-svar enligt Accept-Encoding.
+
+    Svar med ETag komprimeras en gång per (ETag, kodning) och återanvänds,
+    så ett oförändrat lager inte komprimeras om för varje skärm. ETag
+    görs svag eftersom den komprimerade representationen skiljer sig
+    byte för byte från den okomprimerade.
+    """
+
+    MAX_CACHED_BODIES = 32
+
+    def __init__(self, min_size: int = 500, level: int = 6):
+        self.min_size = min_size
+        self.level = level
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+
+    def init_app(self, app: Flask) -> None:
+        app.after_request(self.after_request)
+
+    def _should_compress(self, response: Response) -> bool:
+        return (
+            response.status_code == 200
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and "Content-Encoding" not in response.headers
+            and (response.content_length or 0) >= self.min_size
+        )
+
+    def _compressed_body(self, response: Response, encoding: str) -> bytes:
+        etag, weak = response.get_etag()
+        if etag is None:
+            return compress(response.get_data(), encoding, self.level)
+
+        key = (request.path, etag, encoding)
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+
+        body = compress(response.get_data(), encoding, self.level)
+        with self._lock:
+            self._cache[key] = body
+            while len(self._cache) > self.MAX_CACHED_BODIES:
+                self._cache.popitem(last=False)
+        return body
+
+    def after_request(self, response: Response) -> Response:
+        if response.mimetype in COMPRESSIBLE_MIMETYPES:
+            response.vary.add("Accept-Encoding")
+        if not self._should_compress(response):
+            return response
+
+        encoding = choose_encoding()
+        if encoding is None:
+            return response
+
+        body = self._compressed_body(response, encoding)
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+
+        etag, weak = response.get_etag()
+        if etag is not None and not weak:
+            response.set_etag(etag, weak=True)
+        return response
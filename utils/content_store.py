@@ -0,0 +1,140 @@
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Set
+
+
+class ContentStore:
+    """
+    Innehållsadresserat objektlager för backuper.
+
+    Filer delas upp i chunks på radgränser där gränserna bestäms av
+    innehållet (CRC32 av raden), så att en ändring i en del av filen bara
+    ger nya chunks lokalt. Varje chunk lagras en gång, gzip-komprimerad,
+    under sin SHA-256.
+
+    Skräpsamlingen rör inte objekt som skrivits eller återanvänts inom
+    `GC_GRACE_SECONDS`: en backup i en annan process kan ha lagt in eller
+    hoppat över ett objekt som ännu inte finns i något manifest.
+    """
+
+    MIN_CHUNK_SIZE = 2 * 1024
+    MAX_CHUNK_SIZE = 64 * 1024
+    BOUNDARY_MASK = 0x1F
+    # Längre än det tar att lägga in en fil och skriva dess manifest
+    GC_GRACE_SECONDS = 3600
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.objects_dir = os.path.join(root_dir, "objects")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.gz")
+
+    def _split_chunks(self, data: bytes) -> Iterable[bytes]:
+        chunk: List[bytes] = []
+        chunk_size = 0
+        for line in data.splitlines(keepends=True):
+            for start in range(0, len(line), self.MAX_CHUNK_SIZE):
+                piece = line[start:start + self.MAX_CHUNK_SIZE]
+                chunk.append(piece)
+                chunk_size += len(piece)
+                at_boundary = (zlib.crc32(piece) & self.BOUNDARY_MASK) == 0
+                if chunk_size >= self.MAX_CHUNK_SIZE or (chunk_size >= self.MIN_CHUNK_SIZE and at_boundary):
+                    yield b"".join(chunk)
+                    chunk = []
+                    chunk_size = 0
+        if chunk:
+            yield b"".join(chunk)
+
+    def has(self, digest: str) -> bool:
+        """Finns objektet? Förnyar också dess mtime, eftersom anroparen tänker återanvända det."""
+        try:
+            os.utime(self._object_path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _put_chunk(self, chunk: bytes) -> str:
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self._object_path(digest)
+        if self.has(digest):
+            return digest
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Egen temporärfil per skrivning: två processer kan lägga in samma chunk samtidigt
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f"{digest}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(chunk, compresslevel=6))
+            try:
+                os.replace(temp_path, path)
+            except OSError:
+                # Samma digest betyder samma innehåll; har någon annan hunnit först är chunken lagrad
+                if not os.path.exists(path):
+                    raise
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return digest
+
+    def put_bytes(self, data: bytes) -> Dict[str, Any]:
+        return {
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'size': len(data),
+            'chunks': [self._put_chunk(chunk) for chunk in self._split_chunks(data)]
+        }
+
+    def put_file(self, file_path: str) -> Dict[str, Any]:
+        with open(file_path, 'rb') as f:
+            return self.put_bytes(f.read())
+
+    def read_bytes(self, entry: Dict[str, Any]) -> bytes:
+        parts = []
+        for digest in entry['chunks']:
+            with open(self._object_path(digest), 'rb') as f:
+                parts.append(gzip.decompress(f.read()))
+        return b"".join(parts)
+
+    def restore_file(self, entry: Dict[str, Any], dest_path: str) -> None:
+        data = self.read_bytes(entry)
+        directory = os.path.dirname(dest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory or ".", prefix=f"{os.path.basename(dest_path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, dest_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def collect_garbage(self, referenced: Set[str]) -> int:
+        removed = 0
+        if not os.path.exists(self.objects_dir):
+            return removed
+
+        cutoff = time.time() - self.GC_GRACE_SECONDS
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                path = os.path.join(prefix_dir, name)
+                digest = name.split('.', 1)[0]
+                # .tmp är en pågående skrivning, eller en rest från en krasch när den blivit gammal
+                if digest in referenced and not name.endswith(".tmp"):
+                    continue
+                try:
+                    if os.path.getmtime(path) > cutoff:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        return removed
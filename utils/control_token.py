@@ -0,0 +1,31 @@
+import os
+import secrets
+from typing import Optional
+
+
+def read_control_token(token_file: str) -> Optional[str]:
+    try:
+        with open(token_file, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def load_control_token(token_file: str) -> str:
+    """
+    Hämtar updaterns styrtoken, och skapar den första gången.
+
+    Token ligger kvar mellan omstarter av updater, så att en app som startats
+    av en tidigare updater-process fortfarande godkänner överlämningen.
+    """
+    token = read_control_token(token_file)
+    if token is not None:
+        return token
+
+    token = secrets.token_hex(16)
+    temp_file = f"{token_file}.tmp"
+    fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    os.replace(temp_file, token_file)
+    return token
@@ -3,19 +3,25 @@ import os
 import threading
 from typing import Any, Dict, List
 
+from utils.locks import InstrumentedLock
+
 
 class FileHandler:
     def __init__(self):
-        self._locks = {}
-
-    def _get_lock(self, file_path: str) -> threading.RLock:
-        if file_path not in self._locks:
-            self._locks[file_path] = threading.RLock()
-        return self._locks[file_path]
+        self._locks: Dict[str, InstrumentedLock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _get_lock(self, file_path: str) -> InstrumentedLock:
+        # Kontroll och skapande under samma lås; annars kan två trådar få olika lås för samma fil
+        key = os.path.abspath(file_path)
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = InstrumentedLock(f"file:{os.path.basename(file_path)}")
+            return lock
 
     def read_json(self, file_path: str, default: Any = None) -> Any:
-        lock = self._get_lock(file_path)
-        with lock:
+        with self._get_lock(file_path).hold("read_json"):
             try:
                 if not os.path.exists(file_path):
                     return default if default is not None else {}
@@ -26,24 +32,21 @@ class FileHandler:
                 return default if default is not None else {}
 
     def write_json(self, file_path: str, data: Any) -> None:
-        lock = self._get_lock(file_path)
-        with lock:
+        with self._get_lock(file_path).hold("write_json"):
             temp_file = f"{file_path}.tmp"
             try:
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                directory = os.path.dirname(file_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
 
                 with open(temp_file, 'w', encoding='utf-8') as f:
                     json.dump(data, f, indent=4, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
 
-                if os.path.exists(file_path):
-                    backup_file = f"{file_path}.backup"
-                    os.replace(file_path, backup_file)
-
+                # os.replace är atomisk: läsare ser antingen gamla eller nya filen, aldrig ingen
                 os.replace(temp_file, file_path)
 
-                if os.path.exists(f"{file_path}.backup"):
-                    os.remove(f"{file_path}.backup")
-
             except Exception as e:
                 if os.path.exists(temp_file):
                     os.remove(temp_file)
@@ -0,0 +1,98 @@
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Optional
+
+from utils.metrics import get_metrics
+
+_metrics = get_metrics()
+LOCK_WAIT_SECONDS = _metrics.histogram(
+    "lock_wait_seconds", "Väntetid för att få ett lås, per lås och operation", ["lock", "operation"]
+)
+LOCK_HOLD_SECONDS = _metrics.histogram(
+    "lock_hold_seconds", "Tid som ett lås hålls, per lås och operation", ["lock", "operation"]
+)
+LOCK_SLOW_TOTAL = _metrics.counter(
+    "lock_slow_total", "Lås som hållits eller väntats på längre än tröskeln", ["lock", "operation", "kind"]
+)
+
+STACK_LIMIT = 12
+
+
+def format_frame_stack(frame) -> str:
+    return "".join(traceback.format_stack(frame, limit=STACK_LIMIT)).rstrip()
+
+
+class InstrumentedLock:
+    """
+    Lås som mäter väntetid och hålltid per operation.
+
+    Väntar en tråd längre än `slow_seconds` loggas en varning med den
+    nuvarande innehavarens stack, hämtad medan låset fortfarande hålls.
+    Hålls låset längre än tröskeln loggas innehavarens stack vid släpp.
+    Vid reentrant användning mäts bara det yttersta förvärvet.
+    """
+
+    def __init__(self, name: str, slow_seconds: float = 0.25, reentrant: bool = True,
+                 logger: Optional[logging.Logger] = None):
+        self.name = name
+        self.slow_seconds = slow_seconds
+        self.reentrant = reentrant
+        self.logger = logger or logging.getLogger("app")
+        self._lock = threading.RLock() if reentrant else threading.Lock()
+        self._owner: Optional[int] = None
+        self._owner_operation: Optional[str] = None
+
+    @property
+    def owner_operation(self) -> Optional[str]:
+        return self._owner_operation
+
+    def _acquire(self, operation: str) -> None:
+        if self._lock.acquire(blocking=False):
+            return
+        if self.slow_seconds > 0 and not self._lock.acquire(timeout=self.slow_seconds):
+            self._report_blocked(operation)
+            self._lock.acquire()
+        elif self.slow_seconds <= 0:
+            self._lock.acquire()
+
+    def _report_blocked(self, operation: str) -> None:
+        LOCK_SLOW_TOTAL.inc(lock=self.name, operation=operation, kind="wait")
+        owner, owner_operation = self._owner, self._owner_operation
+        frame = sys._current_frames().get(owner) if owner is not None else None
+        stack = format_frame_stack(frame) if frame is not None else "(innehavaren släppte låset under tiden)"
+        self.logger.warning(
+            f"Lås {self.name}: {operation} har väntat över {self.slow_seconds:.2f} s, "
+            f"hålls av {owner_operation}:\n{stack}"
+        )
+
+    @contextmanager
+    def hold(self, operation: str):
+        if self.reentrant and self._owner == threading.get_ident():
+            with self._lock:
+                yield
+            return
+
+        started = time.perf_counter()
+        self._acquire(operation)
+        acquired = time.perf_counter()
+        self._owner, self._owner_operation = threading.get_ident(), operation
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - acquired
+            slow_stack = format_frame_stack(sys._getframe(2)) if held > self.slow_seconds > 0 else None
+            self._owner, self._owner_operation = None, None
+            self._lock.release()
+
+            LOCK_WAIT_SECONDS.observe(acquired - started, lock=self.name, operation=operation)
+            LOCK_HOLD_SECONDS.observe(held, lock=self.name, operation=operation)
+            if slow_stack is not None:
+                LOCK_SLOW_TOTAL.inc(lock=self.name, operation=operation, kind="hold")
+                self.logger.warning(
+                    f"Lås {self.name}: {operation} höll låset i {held * 1000:.0f} ms "
+                    f"(tröskel {self.slow_seconds * 1000:.0f} ms):\n{slow_stack}"
+                )
@@ -1,7 +1,23 @@
 import logging
 import os
+import time
 from typing import Optional
 
+from utils.metrics import get_metrics
+
+LOG_WRITE_SECONDS = get_metrics().histogram(
+    "log_write_seconds", "Tid för att skriva en loggrad till fil", ["logger"]
+)
+
+
+class TimedFileHandler(logging.FileHandler):
+    """FileHandler som mäter kostnaden för varje skriven loggrad."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        started = time.perf_counter()
+        super().emit(record)
+        LOG_WRITE_SECONDS.observe(time.perf_counter() - started, logger=record.name)
+
 
 def setup_logger(
     name: str,
@@ -23,7 +39,7 @@ def setup_logger(
     if log_dir:
         os.makedirs(log_dir, exist_ok=True)
 
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler = TimedFileHandler(log_file, encoding='utf-8')
     file_handler.setLevel(level)
 
     formatter = logging.Formatter(format_string)
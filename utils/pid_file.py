@@ -0,0 +1,32 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+
+def write_pid_file(pid_file: str, **info: Any) -> None:
+    data = {"pid": os.getpid(), "started_at": time.time()}
+    data.update(info)
+    temp_file = f"{pid_file}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(temp_file, pid_file)
+
+
+def read_pid_file(pid_file: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(pid_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) and "pid" in data else None
+    except (OSError, ValueError):
+        return None
+
+
+def remove_pid_file(pid_file: str) -> None:
+    """Tar bara bort filen om den tillhör den här processen."""
+    data = read_pid_file(pid_file)
+    if data is not None and data.get("pid") == os.getpid():
+        try:
+            os.remove(pid_file)
+        except OSError:
+            pass
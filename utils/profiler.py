@@ -0,0 +1,263 @@
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from flask import Flask, Response, g, request
+
+PROFILE_HEADER = "X-Profile-Token"
+
+# Kategorier för uppdelningen; stacken läses från lövet och uppåt och första träff vinner
+CATEGORY_RULES = (
+    ("lock_wait", lambda module, function: module == "locks.py" and function in ("_acquire", "hold")),
+    ("json_parse", lambda module, function: module == "decoder.py" or function in ("load", "loads") and module == "__init__.py"),
+    ("json_encode", lambda module, function: module in ("encoder.py", "provider.py") or function in ("jsonify", "dumps")),
+    ("logging", lambda module, function: module == "__init__.py" and function in ("info", "_log", "handle", "emit", "format")
+                                         or module in ("logger.py", "handlers.py")),
+    ("file_io", lambda module, function: function in ("_read_file_untimed", "_write_file_untimed", "write_json", "read_json")),
+    ("template", lambda module, function: module in ("environment.py", "runtime.py") or function == "render_template"),
+)
+
+
+@dataclass
+class RequestProfile:
+    id: str
+    method: str
+    path: str
+    route: str
+    thread_id: int
+    started: float
+    started_at: datetime
+    stacks: Counter = field(default_factory=Counter)
+    duration_ms: float = 0.0
+    status: int = 0
+    breakdown: Dict[str, float] = field(default_factory=dict)
+    file: Optional[str] = None
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": self.samples,
+            "breakdown_ms": self.breakdown,
+            "file": os.path.basename(self.file) if self.file else None
+        }
+
+
+def frame_label(frame) -> str:
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+
+def collapse_stack(frame) -> str:
+    """Stacken från rot till löv i collapsed-format (a;b;c), med början i Flasks wsgi_app."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        if frame.f_code.co_name == "wsgi_app":
+            break
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def categorize(stack: str) -> str:
+    for label in reversed(stack.split(";")):
+        module, _, function = label.partition(":")
+        for category, rule in CATEGORY_RULES:
+            if rule(module, function):
+                return category
+    return "other"
+
+
+class RequestProfiler:
+    """
+    Samplande profilering av ett urval förfrågningar.
+
+    En bakgrundstråd läser stacken för de trådar som just nu hanterar en
+    profilerad förfrågan via sys._current_frames(), var `interval_ms`.
+    Övriga förfrågningar påverkas inte, och tråden sover när inget profileras.
+    Varje profil sparas som en collapsed-fil (flamegraph.pl/speedscope) i en
+    katalog med begränsat antal filer; de senaste hålls i minnet för adminsidan.
+    """
+
+    def __init__(self, logger: logging.Logger, profile_dir: str, sample_rate: float = 0.0,
+                 interval_ms: float = 5.0, max_files: int = 200, admin_token: str = "", recent: int = 200):
+        self.logger = logger
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.max_files = max_files
+        self.admin_token = admin_token
+        self._lock = threading.Lock()
+        self._active: Dict[str, RequestProfile] = {}
+        self._recent: Deque[RequestProfile] = deque(maxlen=recent)
+        self._aggregate: Dict[str, Counter] = {}
+        self._wake = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def init_app(self, app: Flask) -> None:
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+
+    def is_admin(self) -> bool:
+        # Bara header: en token i URL:en hamnar i åtkomstloggar och Referer
+        token = request.headers.get(PROFILE_HEADER, "")
+        return bool(self.admin_token) and hmac.compare_digest(token, self.admin_token)
+
+    def _should_profile(self) -> bool:
+        if request.headers.get(PROFILE_HEADER) and self.is_admin():
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _ensure_sampler(self) -> None:
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    # Rensas under låset så att en ny registrering inte kan missas
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            sampled = []
+            for profile in active:
+                frame = frames.get(profile.thread_id)
+                if frame is not None:
+                    sampled.append((profile, collapse_stack(frame)))
+            del frames
+            with self._lock:
+                # En förfrågan som hunnit avslutas läses redan av _finish och får inga fler sampel
+                for profile, stack in sampled:
+                    if profile.id in self._active:
+                        profile.stacks[stack] += 1
+            time.sleep(self.interval)
+
+    def before_request(self) -> None:
+        if request.path.startswith(("/static/", "/admin/profiles", "/api/profiles")) or not self._should_profile():
+            return
+        profile = RequestProfile(
+            id=uuid.uuid4().hex[:12],
+            method=request.method,
+            path=request.full_path.rstrip("?"),
+            route=request.url_rule.rule if request.url_rule is not None else "unmatched",
+            thread_id=threading.get_ident(),
+            started=time.perf_counter(),
+            started_at=datetime.now()
+        )
+        g.request_profile = profile
+        with self._lock:
+            self._active[profile.id] = profile
+            self._ensure_sampler()
+            self._wake.set()
+
+    def after_request(self, response: Response) -> Response:
+        profile = g.get("request_profile")
+        if profile is not None:
+            profile.status = response.status_code
+            response.headers["X-Profile-Id"] = profile.id
+        return response
+
+    def teardown_request(self, exc: Optional[BaseException] = None) -> None:
+        profile = g.pop("request_profile", None)
+        if profile is None:
+            return
+        with self._lock:
+            self._active.pop(profile.id, None)
+        profile.duration_ms = (time.perf_counter() - profile.started) * 1000
+        if exc is not None and not profile.status:
+            profile.status = 500
+        self._finish(profile)
+
+    def _finish(self, profile: RequestProfile) -> None:
+        samples = profile.samples
+        per_category: Counter = Counter()
+        for stack, count in profile.stacks.items():
+            per_category[categorize(stack)] += count
+        # Samplen fördelar den uppmätta tiden; osamplad rest hamnar under "other"
+        profile.breakdown = {
+            category: round(profile.duration_ms * count / samples, 2)
+            for category, count in per_category.most_common()
+        } if samples else {"other": round(profile.duration_ms, 2)}
+
+        if samples:
+            try:
+                profile.file = self._write_collapsed(profile)
+            except OSError as e:
+                self.logger.warning(f"Kunde inte spara profil {profile.id}: {e}")
+
+        with self._lock:
+            self._recent.append(profile)
+            self._aggregate.setdefault(profile.route, Counter()).update(profile.stacks)
+
+    def _write_collapsed(self, profile: RequestProfile) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = f"{profile.started_at:%Y%m%d-%H%M%S-%f}-{profile.id}.collapsed"
+        path = os.path.join(self.profile_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(format_collapsed(profile.stacks))
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        files = sorted(name for name in os.listdir(self.profile_dir) if name.endswith(".collapsed"))
+        for name in files[:max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.profile_dir, name))
+            except OSError:
+                pass
+
+    def slowest(self, limit: int = 50) -> List[RequestProfile]:
+        with self._lock:
+            profiles = list(self._recent)
+        return sorted(profiles, key=lambda profile: profile.duration_ms, reverse=True)[:limit]
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            for profile in self._recent:
+                if profile.id == profile_id:
+                    return profile
+        return None
+
+    def aggregate(self, route: Optional[str] = None) -> Counter:
+        with self._lock:
+            if route is not None:
+                return Counter(self._aggregate.get(route, Counter()))
+            total: Counter = Counter()
+            for stacks in self._aggregate.values():
+                total.update(stacks)
+            return total
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval * 1000,
+            "header_enabled": bool(self.admin_token),
+            "profile_dir": self.profile_dir,
+            "max_files": self.max_files
+        }
+
+
+def format_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,49 @@
+import time
+
+from flask import Flask, g, request
+
+from utils.metrics import get_metrics
+
+_metrics = get_metrics()
+REQUEST_SECONDS = _metrics.histogram(
+    "http_request_duration_seconds", "Svarstid per route", ["method", "route", "status"]
+)
+REQUESTS_TOTAL = _metrics.counter(
+    "http_requests_total", "Antal förfrågningar per route", ["method", "route", "status"]
+)
+REQUESTS_IN_PROGRESS = _metrics.gauge(
+    "http_requests_in_progress", "Förfrågningar som hanteras just nu"
+)
+
+
+def instrument_app(app: Flask) -> None:
+    """Registrerar before/after/teardown-hooks som mäter svarstid per route."""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.request_in_progress = True
+        REQUESTS_IN_PROGRESS.inc()
+
+    def record(started: float, status: int) -> None:
+        # Route-mallen (/api/inventory/<int:item_id>) ger begränsat antal etiketter
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        labels = {"method": request.method, "route": route, "status": str(status)}
+        REQUEST_SECONDS.observe(time.perf_counter() - started, **labels)
+        REQUESTS_TOTAL.inc(**labels)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            record(started, response.status_code)
+        return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        # after_request körs inte vid ohanterade undantag; teardown körs alltid
+        if g.pop("request_in_progress", False):
+            REQUESTS_IN_PROGRESS.dec()
+        started = g.pop("request_started", None)
+        if started is not None:
+            record(started, 500)
@@ -0,0 +1,215 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def _parse_time(at: str):
+    hour, minute = at.split(":")
+    return int(hour), int(minute)
+
+
+class IntervalTrigger:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def next_run(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+    def describe(self) -> str:
+        return f"var {self.seconds:g}:e sekund"
+
+
+class DailyTrigger:
+    """Kör kl. HH:MM var N:e dag, räknat från schemaläggarens start."""
+
+    def __init__(self, at: str, every_days: int = 1):
+        self.hour, self.minute = _parse_time(at)
+        self.every_days = every_days
+        self.at = at
+
+    def next_run(self, after: datetime) -> datetime:
+        candidate = after.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if candidate <= after:
+            candidate += timedelta(days=1)
+        return candidate
+
+    def following_run(self, previous: datetime) -> datetime:
+        return previous + timedelta(days=self.every_days)
+
+    def describe(self) -> str:
+        if self.every_days == 1:
+            return f"dagligen kl {self.at}"
+        return f"var {self.every_days}:e dag kl {self.at}"
+
+
+class WeeklyTrigger:
+    def __init__(self, day: str, at: str):
+        self.weekday = WEEKDAYS.index(day.lower())
+        self.hour, self.minute = _parse_time(at)
+        self.day = day.lower()
+        self.at = at
+
+    def next_run(self, after: datetime) -> datetime:
+        candidate = after.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        candidate += timedelta(days=(self.weekday - candidate.weekday()) % 7)
+        if candidate <= after:
+            candidate += timedelta(days=7)
+        return candidate
+
+    def describe(self) -> str:
+        return f"varje {self.day} kl {self.at}"
+
+
+@dataclass
+class JobStats:
+    runs: int = 0
+    failures: int = 0
+    skipped_overlaps: int = 0
+    last_started: Optional[float] = None
+    last_finished: Optional[float] = None
+    last_duration: Optional[float] = None
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+    last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_overlaps": self.skipped_overlaps,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+            "avg_duration": self.total_duration / self.runs if self.runs else None,
+            "last_error": self.last_error
+        }
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Any]
+    trigger: Any
+    next_run: datetime = None
+    running: bool = False
+    stats: JobStats = field(default_factory=JobStats)
+
+
+class JobScheduler:
+    """
+    Händelsestyrd schemaläggare.
+
+    En heap med nästa körtid per jobb; schemaläggartråden sover exakt till
+    närmaste deadline (eller tills ett nytt jobb läggs till). Jobben körs i en
+    begränsad trådpool och ett jobb som fortfarande kör hoppas över istället
+    för att startas parallellt med sig självt.
+    """
+
+    def __init__(self, logger: logging.Logger, max_workers: int = 2):
+        self.logger = logger
+        self._jobs: Dict[str, Job] = {}
+        self._heap: List = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def add_job(self, name: str, func: Callable[[], Any], trigger: Any, run_immediately: bool = False) -> Job:
+        with self._condition:
+            now = datetime.now()
+            job = Job(name, func, trigger)
+            job.next_run = now if run_immediately else trigger.next_run(now)
+            self._jobs[name] = job
+            heapq.heappush(self._heap, (job.next_run, next(self._counter), name))
+            self._condition.notify()
+
+        self.logger.info(f"Schemalagt jobb '{name}': {trigger.describe()} (nästa körning {job.next_run:%Y-%m-%d %H:%M:%S})")
+        return job
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = False) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._executor.shutdown(wait=wait)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        with self._condition:
+            while not self._stopped:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                next_run, _, name = self._heap[0]
+                delay = (next_run - datetime.now()).total_seconds()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+
+                heapq.heappop(self._heap)
+                job = self._jobs.get(name)
+                if job is None or job.next_run != next_run:
+                    continue
+
+                self._dispatch(job)
+
+                now = datetime.now()
+                if hasattr(job.trigger, "following_run"):
+                    job.next_run = job.trigger.following_run(next_run)
+                if not hasattr(job.trigger, "following_run") or job.next_run <= now:
+                    job.next_run = job.trigger.next_run(now)
+                heapq.heappush(self._heap, (job.next_run, next(self._counter), name))
+
+    def _dispatch(self, job: Job) -> None:
+        if job.running:
+            job.stats.skipped_overlaps += 1
+            self.logger.warning(f"Jobb '{job.name}' kör fortfarande, hoppar över denna körning")
+            return
+
+        job.running = True
+        try:
+            self._executor.submit(self._execute, job)
+        except RuntimeError:
+            job.running = False
+
+    def _execute(self, job: Job) -> None:
+        started = time.time()
+        job.stats.last_started = started
+        perf_started = time.perf_counter()
+        try:
+            job.func()
+        except Exception as e:
+            job.stats.failures += 1
+            job.stats.last_error = str(e)
+            self.logger.error(f"Fel i schemalagt jobb '{job.name}': {e}")
+        finally:
+            duration = time.perf_counter() - perf_started
+            job.stats.runs += 1
+            job.stats.last_finished = time.time()
+            job.stats.last_duration = duration
+            job.stats.total_duration += duration
+            job.stats.max_duration = max(job.stats.max_duration, duration)
+            job.running = False
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._condition:
+            return {
+                name: dict(job.stats.to_dict(), next_run=job.next_run.isoformat(), running=job.running)
+                for name, job in self._jobs.items()
+            }
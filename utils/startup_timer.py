@@ -0,0 +1,53 @@
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class StartupTimer:
+    """
+    Mäter uppstartens faser, i stil med `python -X importtime`.
+
+    Varje fas registreras med egen tid och kumulativ tid sedan processens
+    start, så rapporten visar både vad som är dyrt och när porten binds
+    respektive första förfrågan besvaras.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases: List[Tuple[str, float, float]] = []
+        self.first_request_ms: Optional[float] = None
+
+    def _elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def record(self, name: str, since: float) -> None:
+        self.phases.append((name, (time.perf_counter() - since) * 1000, self._elapsed_ms()))
+
+    @contextmanager
+    def phase(self, name: str):
+        since = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, since)
+
+    def mark_first_request(self) -> bool:
+        if self.first_request_ms is not None:
+            return False
+        self.first_request_ms = self._elapsed_ms()
+        return True
+
+    def report(self, logger: logging.Logger) -> None:
+        logger.info("Uppstartstider:   self [ms] | cumulative [ms] | fas")
+        for name, self_ms, cumulative_ms in self.phases:
+            logger.info(f"Uppstartstider: {self_ms:10.1f} | {cumulative_ms:15.1f} | {name}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "phases": [
+                {"name": name, "ms": round(self_ms, 1), "cumulative_ms": round(cumulative_ms, 1)}
+                for name, self_ms, cumulative_ms in self.phases
+            ],
+            "time_to_first_request_ms": round(self.first_request_ms, 1) if self.first_request_ms is not None else None
+        }
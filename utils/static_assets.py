@@ -0,0 +1,102 @@
+import hashlib
+import mimetypes
+import os
+import logging
+from typing import Dict
+
+from flask import Flask, abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+from utils.compression import brotli, choose_encoding, compress
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+PRECOMPRESS_EXTENSIONS = (".js", ".css", ".svg", ".html", ".json", ".txt")
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+class StaticAssets:
+    """
+    Fingeravtryck och förkomprimering för filerna i static/.
+
+    Vid start beräknas en innehållshash per fil och .gz/.br-varianter
+    skrivs bredvid originalet om de saknas eller är äldre. Mallarna länkar
+    via `asset_url()`, som lägger hashen i URL:en; sådana förfrågningar får
+    far-future `Cache-Control: immutable` eftersom en ändrad fil får en ny URL.
+    """
+
+    def __init__(self, logger: logging.Logger, level: int = 9):
+        self.logger = logger
+        self.level = level
+        self.static_folder = None
+        self.hashes: Dict[str, str] = {}
+
+    def init_app(self, app: Flask) -> None:
+        self.static_folder = app.static_folder
+        self.refresh()
+        app.add_template_global(self.asset_url)
+        app.view_functions["static"] = self.serve
+
+    def _precompress(self, path: str) -> None:
+        with open(path, 'rb') as f:
+            data = f.read()
+        mtime = os.path.getmtime(path)
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            if encoding == "br" and brotli is None:
+                continue
+            target = path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                continue
+            temp_path = f"{target}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(compress(data, encoding, self.level))
+            os.replace(temp_path, target)
+
+    def refresh(self) -> None:
+        hashes = {}
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                if name.endswith((".gz", ".br", ".tmp")):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.static_folder).replace(os.sep, "/")
+                with open(path, 'rb') as f:
+                    hashes[relative] = hashlib.sha256(f.read()).hexdigest()[:12]
+                if name.endswith(PRECOMPRESS_EXTENSIONS):
+                    try:
+                        self._precompress(path)
+                    except OSError as e:
+                        self.logger.warning(f"Kunde inte förkomprimera {relative}: {e}")
+        self.hashes = hashes
+
+    def asset_url(self, filename: str) -> str:
+        filename = filename.lstrip("/")
+        version = self.hashes.get(filename)
+        if version is None:
+            return url_for("static", filename=filename)
+        return url_for("static", filename=filename, v=version)
+
+    def serve(self, filename: str):
+        path = safe_join(self.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        available = tuple(
+            encoding for encoding, suffix in ENCODING_SUFFIXES.items()
+            if os.path.isfile(path + suffix) and os.path.getmtime(path + suffix) >= os.path.getmtime(path)
+        )
+        encoding = choose_encoding(available) if available else None
+
+        if encoding is not None:
+            response = send_file(path + ENCODING_SUFFIXES[encoding], mimetype=mimetype, conditional=True)
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = send_file(path, mimetype=mimetype, conditional=True)
+        response.vary.add("Accept-Encoding")
+
+        relative = filename.replace(os.sep, "/")
+        if request.args.get("v") and request.args.get("v") == self.hashes.get(relative):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
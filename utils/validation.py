@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 
 @dataclass
@@ -153,6 +153,168 @@ class InventoryItemValidator:
         return result
 
 
+class BatchValidationResult:
+    """
+    Resultat för en hel kolumnbatch.
+
+    Fel lagras kompakt som (fält, meddelande) → radindex, så en batch med
+    tiotusentals rader bara skapar objekt för de felkategorier som finns.
+    Tolkade heltalskolumner följer med i `values` (None där värde saknas).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.errors: Dict[Tuple[str, str], List[int]] = {}
+        self.values: Dict[str, List[Optional[int]]] = {}
+
+    def add_errors(self, field: str, message: str, rows: List[int]) -> None:
+        if rows:
+            self.errors.setdefault((field, message), []).extend(rows)
+
+    def has_errors(self) -> bool:
+        return bool(self.errors)
+
+    def invalid_rows(self) -> List[int]:
+        return sorted({row for rows in self.errors.values() for row in rows})
+
+    def valid_mask(self) -> List[bool]:
+        mask = [True] * self.size
+        for rows in self.errors.values():
+            for row in rows:
+                mask[row] = False
+        return mask
+
+    def row_errors(self, row: int) -> Dict[str, str]:
+        """Felen för en rad i samma form som ValidationResult.get_error_messages()."""
+        return {field: message for (field, message), rows in self.errors.items() if row in rows}
+
+    def errors_by_row(self, limit: Optional[int] = None) -> Dict[int, Dict[str, str]]:
+        """Fel per rad för de första `limit` ogiltiga raderna."""
+        wanted = set(self.invalid_rows()[:limit] if limit is not None else self.invalid_rows())
+        by_row: Dict[int, Dict[str, str]] = {}
+        for (field, message), rows in self.errors.items():
+            for row in rows:
+                if row in wanted:
+                    by_row.setdefault(row, {})[field] = message
+        return dict(sorted(by_row.items()))
+
+    def summary(self, sample: int = 5) -> List[Dict[str, Any]]:
+        return [
+            {"field": field, "message": message, "count": len(rows), "rows": rows[:sample]}
+            for (field, message), rows in self.errors.items()
+        ]
+
+
+def _missing(value: Any) -> bool:
+    return value is None or value == ""
+
+
+def _parse_int_column(values: Sequence[Any]) -> Tuple[List[Optional[int]], List[int]]:
+    """Tolkar en kolumn som heltal; returnerar (värden med None för saknade, index som inte gick att tolka)."""
+    try:
+        # Vanligaste fallet: hela kolumnen går att tolka, och int() över map körs i C
+        return list(map(int, values)), []
+    except (ValueError, TypeError):
+        pass
+
+    parsed: List[Optional[int]] = []
+    invalid: List[int] = []
+    append = parsed.append
+    for index, value in enumerate(values):
+        if type(value) is int:
+            append(value)
+        elif _missing(value):
+            append(None)
+        else:
+            try:
+                append(int(value))
+            except (ValueError, TypeError):
+                append(None)
+                invalid.append(index)
+    return parsed, invalid
+
+
+def _fill_missing(values: Sequence[Any], parsed: List[Optional[int]],
+                  defaults: Optional[Sequence[int]]) -> List[Optional[int]]:
+    """Tolkade värden med `defaults` där värdet saknas; ogiltiga värden förblir None."""
+    if defaults is None:
+        return parsed
+    return [default if _missing(value) else number for value, number, default in zip(values, parsed, defaults)]
+
+
+def _blank_text_rows(values: Sequence[Any]) -> List[int]:
+    try:
+        # str.strip över map kastar TypeError för allt som inte är str
+        if all(map(str.strip, values)):
+            return []
+    except TypeError:
+        pass
+    return [i for i, value in enumerate(values) if not isinstance(value, str) or not value.strip()]
+
+
+class BatchInventoryValidator:
+    """
+    Kolumnvis validering av många inventarieobjekt på en gång.
+
+    Indata är kolumner (fält → lista med ett värde per rad). Varje regel körs
+    som ett svep över en hel kolumn, i första hand med inbyggda funktioner
+    (map, min, all) som går i C; radindex letas bara fram för kolumner där
+    svepet hittar fel. Regler och meddelanden är desamma som i
+    InventoryItemValidator.validate_add_item, och inga objekt skapas för
+    giltiga rader.
+
+    `fallback` ger gällande low_status/high_status per rad (det befintliga
+    objektets värden, eller standardvärdena för ett nytt). De används där
+    raden saknar värdet, så att low < high kontrolleras på det objekt som
+    importen faktiskt ger och inte bara när båda står på raden.
+    """
+
+    TEXT_FIELDS = {"product_family": "Product family", "spare_part": "Spare part"}
+    INTEGER_FIELDS = {"quantity": "Quantity", "low_status": "Low status", "high_status": "High status"}
+
+    @classmethod
+    def validate_columns(cls, columns: Dict[str, Sequence[Any]], size: Optional[int] = None,
+                         fallback: Optional[Dict[str, Sequence[int]]] = None) -> BatchValidationResult:
+        if size is None:
+            size = max((len(values) for values in columns.values()), default=0)
+        result = BatchValidationResult(size)
+        empty = [None] * size
+
+        brands = columns.get("Brand", empty)
+        if not set(map(type, brands)) <= {str, type(None)}:
+            result.add_errors("Brand", "Brand must be a string",
+                              [i for i, value in enumerate(brands) if value is not None and not isinstance(value, str)])
+
+        for field, label in cls.TEXT_FIELDS.items():
+            result.add_errors(field, f"{label} is required and must be a non-empty string",
+                              _blank_text_rows(columns.get(field, empty)))
+
+        for field, label in cls.INTEGER_FIELDS.items():
+            values = columns.get(field, empty)
+            parsed, invalid = _parse_int_column(values)
+            result.values[field] = parsed
+            result.add_errors(field, f"{label} must be a valid integer", invalid)
+            present = parsed if not invalid and None not in parsed else [value for value in parsed if value is not None]
+            if present and min(present) < 0:
+                result.add_errors(field, f"{label} must be non-negative",
+                                  [i for i, value in enumerate(parsed) if value is not None and value < 0])
+            if field == "quantity" and (invalid or None in parsed):
+                result.add_errors("quantity", "Quantity is required", [i for i, value in enumerate(values) if _missing(value)])
+
+        low, high = result.values["low_status"], result.values["high_status"]
+        if fallback:
+            low = _fill_missing(columns.get("low_status", empty), low, fallback.get("low_status"))
+            high = _fill_missing(columns.get("high_status", empty), high, fallback.get("high_status"))
+        if None not in low and None not in high:
+            inconsistent = any(map(int.__le__, high, low))
+        else:
+            inconsistent = True
+        if inconsistent:
+            result.add_errors("high_status", "High status must be greater than low status",
+                              [i for i, (lo, hi) in enumerate(zip(low, high)) if lo is not None and hi is not None and hi <= lo])
+        return result
+
+
 class SettingsValidator:
     @staticmethod
     def validate_settings(data: Dict[str, Any]) -> ValidationResult: